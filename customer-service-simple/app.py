@@ -1,49 +1,24 @@
 #!/usr/bin/env python3
 """
-Simple Customer Service - # Health endpoint
-@app.route('/health', methods=['GET'])
-@app.route('/customer/health', methods=['GET'])
-def health():
-    """Health check endpoint"""
-    logger.info("Health check requested")
-    return jsonify({
-        "status": "healthy",
-        "service": "customer-service-simple",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
-    })
-
-# Root endpoint
-@app.route('/', methods=['GET'])
-@app.route('/customer', methods=['GET'])
-@app.route('/customer/', methods=['GET'])
-def root():
-    """Root endpoint"""
-    return jsonify({
-        "service": "customer-service-simple",
-        "version": "1.0.0",
-        "endpoints": [
-            "/health",
-            "/createcustomer",
-            "/customers", 
-            "/findcustomerbyid",
-            "/updatecustomer"
-        ]
-    })
-
-# Create customer endpoint
-@app.route('/createcustomer', methods=['POST'])
-@app.route('/customer/createcustomer', methods=['POST'])
-def create_customer():o bullshit, just working code
+Simple Customer Service - No bullshit, just working code
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, redirect, request, jsonify
 from flask_cors import CORS
+import fcntl
 import logging
 import json
 import os
 import requests
+import threading
+import atexit
+from bisect import bisect_left
 from datetime import datetime
 
+from cluster import FORWARDED_HEADER, IMPORT_PATH, LOCAL_HEADER, Cluster
+from persistence import CustomerPersistence
+from shared_store import SharedCustomerPersistence, SharedCustomerStore, prepare_shared_store
+from store import CustomerStore, decode_cursor, encode_cursor
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -51,8 +26,210 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# In-memory storage for now (could be upgraded to real DB later)
-customers = {}
+# Set to share one customer table between worker processes (see shared_store.py)
+SHARED_STORE_PATH = os.getenv('SHARED_STORE_PATH', '')
+SHARED_STORE_SLOTS = int(os.getenv('SHARED_STORE_SLOTS', '1048576'))
+SHARED_STORE_SLOT_SIZE = int(os.getenv('SHARED_STORE_SLOT_SIZE', '1024'))
+
+# In-memory storage with email/name/document indexes, made durable by an
+# append-only log and snapshots in DATA_DIR
+if SHARED_STORE_PATH:
+    customers = SharedCustomerStore(SHARED_STORE_PATH, slots=SHARED_STORE_SLOTS, slot_size=SHARED_STORE_SLOT_SIZE)
+else:
+    customers = CustomerStore(
+        page_cache_size=int(os.getenv('PAGE_CACHE_SIZE', '256')),
+        lock_stripes=int(os.getenv('STORE_LOCK_STRIPES', '16'))
+    )
+# customers.lock_for(document) is held around every change and its log append;
+# store_lock takes every stripe, so snapshots match a log position
+store_lock = customers.lock
+
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '3000'))
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+PERSISTENCE_ENABLED = os.getenv('PERSISTENCE_ENABLED', 'true').lower() == 'true'
+persistence = None
+
+# Cluster mode: instances partition customers on a consistent-hash ring (see cluster.py)
+CLUSTER_ENABLED = os.getenv('CLUSTER_ENABLED', 'false').lower() == 'true'
+CLUSTER_ROUTING = os.getenv('CLUSTER_ROUTING', 'forward')  # or 'redirect'
+cluster = None
+
+
+def init_persistence():
+    """Recover customers from DATA_DIR and start logging writes"""
+    global persistence
+    if persistence is not None:
+        return
+    data_dir = os.getenv('DATA_DIR', 'data')
+    if SHARED_STORE_PATH and os.getenv('SHARED_STORE_RECOVERED') != 'true':
+        # Single process: nobody rebuilt the shared table before us
+        prepare_shared_store(
+            SHARED_STORE_PATH, data_dir, SHARED_STORE_SLOTS, SHARED_STORE_SLOT_SIZE, PERSISTENCE_ENABLED
+        )
+        customers.reopen()
+    if not PERSISTENCE_ENABLED:
+        logger.info("💾 Persistence disabled, customers live in memory only")
+        return
+
+    options = dict(
+        data_dir=data_dir,
+        fsync_mode=os.getenv('FSYNC_MODE', 'batch'),
+        fsync_interval=float(os.getenv('FSYNC_INTERVAL_MS', '50')) / 1000,
+        snapshot_every=int(os.getenv('SNAPSHOT_EVERY_WRITES', '100000'))
+    )
+    if SHARED_STORE_PATH:
+        # The table already holds the recovered customers
+        persistence = SharedCustomerPersistence(customers, **options)
+        logger.info(f"💾 Attached to shared table {SHARED_STORE_PATH} with {len(customers)} customers")
+    else:
+        persistence = CustomerPersistence(**options)
+        customers.load(persistence.replay())
+        logger.info(f"💾 Recovered {len(customers)} customers in {persistence.recovery_stats['total_seconds']}s")
+    persistence.open()
+    persistence.start_snapshots(store_lock, customers.records, customers.record_to_dict)
+    atexit.register(persistence.close)
+
+def cluster_self_url():
+    """
+    URL the other members reach this instance at
+
+    It must be the URL this instance is listed under (its Consul
+    registration, or its CLUSTER_PEERS entry): under any other URL the ring
+    would hold this process twice and hand customers off to itself.
+
+    Raises:
+        RuntimeError: If the two cannot be told to match
+    """
+    self_url = os.getenv('CLUSTER_SELF_URL', '').rstrip('/')
+    peers = [peer.strip().rstrip('/') for peer in os.getenv('CLUSTER_PEERS', '').split(',') if peer.strip()]
+    if peers:
+        if self_url not in peers:
+            raise RuntimeError("Cluster mode with CLUSTER_PEERS needs CLUSTER_SELF_URL set to this instance's entry")
+        return self_url
+    service_address = os.getenv('SERVICE_ADDRESS')
+    if not service_address:
+        raise RuntimeError("Cluster mode with Consul needs SERVICE_ADDRESS, the address this instance registers")
+    registered = f"http://{service_address}:{SERVICE_PORT}"
+    if self_url and self_url != registered:
+        raise RuntimeError(f"CLUSTER_SELF_URL {self_url} differs from the registered address {registered}")
+    return registered
+
+def init_cluster():
+    """
+    Join the cluster and follow its membership (call after init_persistence)
+
+    Raises:
+        RuntimeError: If this instance's URL does not match how it is listed
+    """
+    global cluster
+    if not CLUSTER_ENABLED or cluster is not None:
+        return
+    service_name = os.getenv('SERVICE_NAME', 'customer-service')
+    cluster = Cluster(
+        self_url=cluster_self_url(),
+        service_name=service_name,
+        consul_url=f"http://{os.getenv('CONSUL_HOST', 'localhost')}:{os.getenv('CONSUL_PORT', '8500')}",
+        peers=os.getenv('CLUSTER_PEERS', '').split(','),
+        vnodes=int(os.getenv('CLUSTER_VNODES', '64')),
+        refresh_interval=float(os.getenv('CLUSTER_REFRESH_SECONDS', '10')),
+        timeout=float(os.getenv('CLUSTER_TIMEOUT_SECONDS', '5')),
+        handoff_seconds=float(os.getenv('CLUSTER_HANDOFF_SECONDS', '60'))
+    )
+    try:
+        cluster.refresh()
+    except Exception as e:
+        logger.warning(f"Cluster membership check failed, retrying in the background: {e}")
+    cluster.start(rebalance_cluster)
+    atexit.register(cluster.close)
+    logger.info(f"🔗 Cluster mode: {cluster.self_url} among {len(cluster.ring)} members")
+
+def rebalance_cluster() -> int:
+    """Hand the customers owned by other members over to them"""
+    to_dict = customers.record_to_dict or (lambda record: record)
+    if not SHARED_STORE_PATH:
+        return cluster.rebalance((to_dict(record) for record in customers.records()), drop_handed_off)
+    # Workers share the table, so one of them at a time hands it off
+    with open(f"{SHARED_STORE_PATH}.rebalance", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        return cluster.rebalance((to_dict(record) for record in customers.records()), drop_handed_off)
+
+def drop_handed_off(customer):
+    """Remove a customer its new owner accepted, unless it changed here meanwhile"""
+    document = customer['document']
+    with customers.lock_for(document):
+        if cluster.is_local(document) or customers.get(document) != customer:
+            return False
+        customers.remove(document)
+        seq = persistence.append_removal(document) if persistence else None
+    if seq:
+        persistence.wait_durable(seq)
+    return True
+
+def adopt(customer):
+    """
+    Store a customer received from another member if it is newer than ours
+
+    Returns:
+        Tuple of (whether it was stored, write-log sequence number)
+
+    Raises:
+        ValueError: If its email belongs to another customer here
+    """
+    with customers.lock_for(customer['document']):
+        if not customers.put_if_newer(customer):
+            return False, None
+        return True, persistence.append(customer) if persistence else None
+
+def adopt_from_previous_owner(document):
+    """Pull a customer that a running handoff has not brought here yet"""
+    if cluster is None or request.headers.get(LOCAL_HEADER):
+        return None
+    customer = cluster.fetch_from_previous_owner(document)
+    if customer is None:
+        return None
+    try:
+        _, seq = adopt(customer)
+    except ValueError as e:
+        logger.warning(f"Cannot take {document} from its previous owner: {e}")
+        return None
+    if seq:
+        persistence.wait_durable(seq)
+    return customers.get(document)
+
+def owner_response(document):
+    """
+    Answer from the member owning `document`
+
+    Returns:
+        The owner's response, or None if this instance serves the request
+    """
+    if cluster is None or request.headers.get(FORWARDED_HEADER) or cluster.is_local(document):
+        return None
+    owner = cluster.owner(document)
+    if CLUSTER_ROUTING == 'redirect':
+        # 307 keeps the method and body
+        return redirect(f"{owner}{request.full_path}", code=307)
+    try:
+        status, body, content_type = cluster.forward(owner, request.method, request.full_path, request.get_data())
+    except requests.RequestException as e:
+        logger.error(f"Owner {owner} of {document} unavailable: {e}")
+        return jsonify({"error": "Owner instance unavailable"}), 503
+    return Response(body, status=status, content_type=content_type)
+
+def email_used_elsewhere(email, document):
+    """Whether another member holds a different customer with `email` (best effort)"""
+    if cluster is None:
+        return False
+    return any(
+        status == 200 and found['document'] != document
+        for _, status, found in cluster.gather('/findcustomerbyemail', {'email': email})
+    )
 
 def register_with_consul():
     """Register this service with Consul"""
@@ -61,17 +238,22 @@ def register_with_consul():
         consul_port = os.getenv('CONSUL_PORT', '8500')
         service_name = os.getenv('SERVICE_NAME', 'customer-service')
         service_port = int(os.getenv('SERVICE_PORT', '3000'))
+        # Each cluster member needs its own ID and an address the others can reach
+        service_id = os.getenv('SERVICE_ID', f"{service_name}-1")
+        service_address = os.getenv('SERVICE_ADDRESS')
         
         registration_data = {
-            "ID": f"{service_name}-1",
+            "ID": service_id,
             "Name": service_name,
             "Tags": ["customer", "api", "microservice"],
             "Port": service_port,
             "Check": {
-                "HTTP": f"http://{service_name}:{service_port}/health",
+                "HTTP": f"http://{service_address or service_name}:{service_port}/health",
                 "Interval": "30s"
             }
         }
+        if service_address:
+            registration_data["Address"] = service_address
         
         consul_url = f"http://{consul_host}:{consul_port}/v1/agent/service/register"
         response = requests.put(consul_url, json=registration_data)
@@ -96,6 +278,57 @@ def health():
         "timestamp": datetime.now().isoformat()
     })
 
+# Cluster state
+@app.route('/cluster/status', methods=['GET'])
+def cluster_status():
+    """Cluster membership and this member's share of customers"""
+    if cluster is None:
+        return jsonify({"enabled": False, "customers": len(customers)})
+    return jsonify({"enabled": True, "customers": len(customers), **cluster.stats()})
+
+# Handoff from other cluster members
+@app.route(IMPORT_PATH, methods=['POST'])
+def import_customers():
+    """
+    Take customers handed over by another member (the newer version wins)
+
+    The response lists in `held` the documents this instance now holds at
+    the pushed version or a newer one; the sender drops only those. Only
+    other members may push: records taken here skip createcustomer's checks.
+    """
+    if cluster is None:
+        return jsonify({"error": "Not found"}), 404
+    try:
+        sender = request.headers.get(FORWARDED_HEADER)
+        if sender == cluster.self_url:
+            logger.error(f"❌ Refusing a handoff from this instance's own URL {sender}")
+            return jsonify({"error": "Handoff to self"}), 409
+        if not sender or not cluster.is_member(sender):
+            logger.warning(f"⚠️ Refusing a handoff from {sender or 'an unknown sender'}, not a cluster member")
+            return jsonify({"error": "Not a cluster member"}), 403
+        imported, held, conflicts, last_seq = 0, [], [], None
+        for customer in request.get_json():
+            document = customer['document']
+            try:
+                stored, seq = adopt(customer)
+            except ValueError as e:
+                logger.warning(str(e))
+                conflicts.append(document)
+                continue
+            current = customers.get(document) if not stored else None
+            if stored or (current is not None and current['updated_at'] >= customer['updated_at']):
+                held.append(document)
+            imported += stored
+            last_seq = seq or last_seq
+        if last_seq:
+            persistence.wait_durable(last_seq)
+        logger.info(f"Imported {imported} customers from {sender}")
+        return jsonify({"imported": imported, "held": held, "conflicts": conflicts}), 200
+
+    except Exception as e:
+        logger.error(f"Error importing customers: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 # Create customer endpoint
 @app.route('/createcustomer', methods=['POST'])
 def create_customer():
@@ -112,10 +345,12 @@ def create_customer():
                 return jsonify({"createCustomerValid": False}), 400
         
         document = data['document']
-        
-        # Check if customer already exists
-        if document in customers:
-            logger.warning(f"Customer {document} already exists")
+
+        routed = owner_response(document)
+        if routed is not None:
+            return routed
+        if adopt_from_previous_owner(document) is not None or email_used_elsewhere(data['email'], document):
+            logger.warning(f"Customer {document} or email {data['email']} already exists in the cluster")
             return jsonify({"createCustomerValid": False}), 400
         
         # Create customer
@@ -130,7 +365,20 @@ def create_customer():
             "updated_at": datetime.now().isoformat()
         }
         
-        customers[document] = customer
+        with customers.lock_for(document):
+            # Rejects an existing document or an email used by another customer
+            try:
+                created = customers.create(customer)
+            except ValueError as e:
+                logger.warning(str(e))
+                return jsonify({"createCustomerValid": False}), 400
+            if not created:
+                logger.warning(f"Customer {document} or email {customer['email']} already exists")
+                return jsonify({"createCustomerValid": False}), 400
+            
+            seq = persistence.append(customer) if persistence else None
+        if seq:
+            persistence.wait_durable(seq)
         logger.info(f"Customer {document} created successfully")
         
         return jsonify({"createCustomerValid": True}), 200
@@ -143,16 +391,141 @@ def create_customer():
 @app.route('/customers', methods=['GET'])
 @app.route('/customer/customers', methods=['GET'])
 def get_customers():
-    """Get all customers"""
+    """
+    Get customers in document order, one page at a time
+
+    Query params: limit (default 100, max 1000) and cursor (from the
+    X-Next-Cursor header of the previous page, absent on the last page)
+    """
     try:
-        logger.info(f"Getting all customers. Total: {len(customers)}")
-        customer_list = list(customers.values())
-        return jsonify(customer_list), 200
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        logger.info(f"Getting customers page (limit {limit}). Total: {len(customers)}")
+        if cluster is not None and not request.headers.get(LOCAL_HEADER):
+            try:
+                customer_page, next_cursor = cluster_page(cursor, limit)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            except requests.RequestException as e:
+                logger.error(f"Cluster member unavailable while listing: {e}")
+                return jsonify({"error": "Cluster member unavailable"}), 503
+            response = jsonify(customer_page)
+            if next_cursor is not None:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
+        try:
+            after = decode_cursor(cursor) if cursor else None
+            body, last_document = customers.page(after, limit)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        response = Response(body, status=200, mimetype='application/json')
+        if last_document is not None:
+            response.headers['X-Next-Cursor'] = encode_cursor(last_document)
+        return response
         
     except Exception as e:
         logger.error(f"Error getting customers: {e}")
         return jsonify([]), 500
 
+def cluster_page(cursor, limit):
+    """
+    One page of the whole cluster: members in URL order, each one's customers in its own order
+
+    The cursor encodes [member, that member's cursor]; a member that left
+    meanwhile is skipped. Customers moving during a rebalance may be
+    skipped or listed twice.
+
+    Returns:
+        Tuple of (customers, next cursor or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+        requests.RequestException: If a member cannot be reached
+    """
+    members = list(cluster.ring.nodes)
+    start, member_cursor = 0, None
+    if cursor:
+        try:
+            member, member_cursor = json.loads(decode_cursor(cursor))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        start = bisect_left(members, member)
+        if start == len(members) or members[start] != member:
+            member_cursor = None
+
+    found = []
+    for index in range(start, len(members)):
+        member = members[index]
+        if member == cluster.self_url:
+            body, last_document = customers.page(decode_cursor(member_cursor) if member_cursor else None, limit - len(found))
+            found.extend(json.loads(body))
+            member_cursor = encode_cursor(last_document) if last_document is not None else None
+        else:
+            params = {'limit': limit - len(found)}
+            if member_cursor:
+                params['cursor'] = member_cursor
+            status, body, headers = cluster.get_json(member, '/customers', params)
+            if status != 200:
+                raise requests.HTTPError(f"{member} answered {status}")
+            found.extend(body)
+            member_cursor = headers.get('X-Next-Cursor')
+        if member_cursor:
+            return found, encode_cursor(json.dumps([member, member_cursor]))
+        if len(found) == limit:
+            if index + 1 == len(members):
+                return found, None
+            return found, encode_cursor(json.dumps([members[index + 1], None]))
+    return found, None
+
+# Find customer by email endpoint
+@app.route('/findcustomerbyemail', methods=['GET'])
+@app.route('/customer/findcustomerbyemail', methods=['GET'])
+def find_customer_by_email():
+    """Find customer by email (case-insensitive)"""
+    try:
+        email = request.args.get('email')
+        if not email:
+            return jsonify({"error": "email parameter required"}), 400
+
+        customer = customers.get_by_email(email)
+        if customer is None and cluster is not None and not request.headers.get(LOCAL_HEADER):
+            customer = next(
+                (found for _, status, found in cluster.gather('/findcustomerbyemail', {'email': email}) if status == 200),
+                None
+            )
+        if customer is not None:
+            return jsonify(customer), 200
+        else:
+            return jsonify({"error": "Customer not found"}), 404
+
+    except Exception as e:
+        logger.error(f"Error finding customer by email: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+# Search customers by name endpoint
+@app.route('/searchcustomers', methods=['GET'])
+@app.route('/customer/searchcustomers', methods=['GET'])
+def search_customers():
+    """Find customers whose first or last name has a word starting with `name`"""
+    try:
+        name = request.args.get('name', '').strip()
+        if not name:
+            return jsonify({"error": "name parameter required"}), 400
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+        found = customers.search_by_name(name, limit)
+        if cluster is not None and not request.headers.get(LOCAL_HEADER):
+            # Merge every member's matches in document order
+            for _, status, matches in cluster.gather('/searchcustomers', {'name': name, 'limit': limit}):
+                if status == 200:
+                    found.extend(matches)
+            found = sorted(found, key=lambda customer: customer['document'])[:limit]
+        return jsonify(found), 200
+
+    except Exception as e:
+        logger.error(f"Error searching customers: {e}")
+        return jsonify([]), 500
+
 # Find customer by ID endpoint
 @app.route('/findcustomerbyid', methods=['GET'])
 @app.route('/customer/findcustomerbyid', methods=['GET'])
@@ -164,9 +537,14 @@ def find_customer_by_id():
             return jsonify({"error": "customerid parameter required"}), 400
         
         logger.info(f"Finding customer by ID: {customer_id}")
+
+        routed = owner_response(customer_id)
+        if routed is not None:
+            return routed
         
-        if customer_id in customers:
-            return jsonify(customers[customer_id]), 200
+        customer = customers.get(customer_id) or adopt_from_previous_owner(customer_id)
+        if customer is not None:
+            return jsonify(customer), 200
         else:
             return jsonify({"error": "Customer not found"}), 404
             
@@ -185,20 +563,32 @@ def update_customer():
         
         if not customer_id:
             return jsonify({"updateCustomerValid": False}), 400
-            
-        if customer_id not in customers:
-            return jsonify({"updateCustomerValid": False}), 404
         
-        logger.info(f"Updating customer {customer_id}")
+        routed = owner_response(customer_id)
+        if routed is not None:
+            return routed
+        if customer_id not in customers:
+            adopt_from_previous_owner(customer_id)
         
-        # Update customer data
-        customer = customers[customer_id]
-        for field in ['firstname', 'lastname', 'address', 'phone', 'email']:
-            if field in data:
-                customer[field] = data[field]
+        changes = {field: data[field] for field in ['firstname', 'lastname', 'address', 'phone', 'email'] if field in data}
+        changes['updated_at'] = datetime.now().isoformat()
+        if 'email' in changes and email_used_elsewhere(changes['email'], customer_id):
+            logger.warning(f"Email {changes['email']} already used by another customer in the cluster")
+            return jsonify({"updateCustomerValid": False}), 400
         
-        customer['updated_at'] = datetime.now().isoformat()
-        customers[customer_id] = customer
+        with customers.lock_for(customer_id):
+            try:
+                customer = customers.update(customer_id, changes)
+            except ValueError as e:
+                logger.warning(str(e))
+                return jsonify({"updateCustomerValid": False}), 400
+            if customer is None:
+                return jsonify({"updateCustomerValid": False}), 404
+            
+            logger.info(f"Updating customer {customer_id}")
+            seq = persistence.append(customer) if persistence else None
+        if seq:
+            persistence.wait_durable(seq)
         
         logger.info(f"Customer {customer_id} updated successfully")
         return jsonify({"updateCustomerValid": True}), 200
@@ -210,11 +600,18 @@ def update_customer():
 if __name__ == '__main__':
     logger.info("🚀 Starting Simple Customer Service...")
     logger.info("📍 Service: customer-service-simple")
-    logger.info("🌐 Port: 3000")
+    logger.info(f"🌐 Port: {SERVICE_PORT}")
     
     # Register with Consul
     register_with_consul()
+
+    # Load persisted customers and join the cluster in the reloader's serving
+    # child only: the parent must not replay the log, compact it or hand customers off
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_persistence()
+        init_cluster()
     
     logger.info("✅ Service ready!")
     
-    app.run(host='0.0.0.0', port=3000, debug=True)
\ No newline at end of file
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=SERVICE_PORT, debug=True)
\ No newline at end of file
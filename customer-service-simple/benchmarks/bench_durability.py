@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Durability benchmark for customer-service-simple
+
+Measures write-log throughput (batched and per-write fsync), snapshot time
+and recovery time (snapshot + log tail, and log replay only) for N records.
+
+Usage:
+    python benchmarks/bench_durability.py --records 1000000 --output durability.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistence import CustomerPersistence  # noqa: E402
+
+
+def make_record(i: int) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "document": f"{1000000000 + i}",
+        "firstname": "Juan",
+        "lastname": "Pérez Gómez",
+        "address": f"Calle {i % 200} #{i % 99}-{i % 97}, Bogotá",
+        "phone": f"+57 300 {i % 10000000:07d}",
+        "email": f"cliente{i}@email.com",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def bench_batch_writes(data_dir: str, records: int) -> dict:
+    persistence = CustomerPersistence(data_dir, fsync_mode="batch")
+    persistence.recover()
+    persistence.open()
+    lock = threading.Lock()
+    started = time.perf_counter()
+    for i in range(records):
+        with lock:
+            persistence.append(make_record(i))
+    persistence.close()
+    elapsed = time.perf_counter() - started
+    return {"records": records, "seconds": round(elapsed, 2), "writes_per_sec": round(records / elapsed)}
+
+
+def bench_always_writes(data_dir: str, records: int, threads: int) -> dict:
+    persistence = CustomerPersistence(data_dir, fsync_mode="always")
+    persistence.recover()
+    persistence.open()
+    lock = threading.Lock()
+    per_thread = records // threads
+
+    def writer(offset: int):
+        for i in range(offset, offset + per_thread):
+            with lock:
+                seq = persistence.append(make_record(i))
+            persistence.wait_durable(seq)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=writer, args=(t * per_thread,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    persistence.close()
+    total = per_thread * threads
+    return {"records": total, "threads": threads, "seconds": round(elapsed, 2), "writes_per_sec": round(total / elapsed)}
+
+
+def bench_recovery(data_dir: str) -> dict:
+    persistence = CustomerPersistence(data_dir)
+    started = time.perf_counter()
+    customers = persistence.recover()
+    return {"records": len(customers), "seconds": round(time.perf_counter() - started, 2), **persistence.recovery_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--always-records", type=int, default=20_000, help="records for the fsync-per-write run")
+    parser.add_argument("--threads", type=int, default=16, help="writer threads for the fsync-per-write run")
+    parser.add_argument("--tail", type=int, default=50_000, help="log entries written after the snapshot")
+    parser.add_argument("--dir", help="scratch directory (default: a temporary directory)")
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="bench-durability-")
+    report = {"records": args.records}
+    try:
+        log_dir = os.path.join(root, "log-only")
+        print(f"Writing {args.records} records (batched fsync)...", file=sys.stderr)
+        report["batch_writes"] = bench_batch_writes(log_dir, args.records)
+
+        print("Recovering from the log only...", file=sys.stderr)
+        report["recovery_log_only"] = bench_recovery(log_dir)
+
+        print("Writing a snapshot...", file=sys.stderr)
+        persistence = CustomerPersistence(log_dir)
+        customers = persistence.recover()
+        persistence.open()
+        lock = threading.Lock()
+        started = time.perf_counter()
+        persistence.snapshot(lock, lambda: list(customers.values()))
+        report["snapshot"] = {"records": len(customers), "seconds": round(time.perf_counter() - started, 2)}
+        for i in range(args.tail):
+            with lock:
+                persistence.append(make_record(i))
+        persistence.close()
+
+        print("Recovering from snapshot + log tail...", file=sys.stderr)
+        report["recovery_snapshot_and_tail"] = bench_recovery(log_dir)
+
+        print(f"Writing {args.always_records} records (fsync per write, {args.threads} threads)...", file=sys.stderr)
+        report["always_writes"] = bench_always_writes(os.path.join(root, "always"), args.always_records, args.threads)
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
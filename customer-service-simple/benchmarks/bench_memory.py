@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for customer-service-simple
+
+Measures resident memory per customer for N records in three layouts:
+    dict      the original storage, {document: dict of eight strings}
+    records   {document: CustomerRecord} without indexes
+    store     CustomerStore with every index (what the service runs)
+
+Each (layout, size) pair runs in its own process, and the RSS growth while
+building is divided by N. A pair that runs out of memory is reported as
+failed instead of stopping the run.
+
+Usage:
+    python benchmarks/bench_memory.py --sizes 1000000 10000000 --output memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import CustomerRecord, CustomerStore  # noqa: E402
+
+LAYOUTS = ("dict", "records", "store")
+
+FIRST_NAMES = ("Juan", "María", "Carlos", "Ana", "Luis", "Laura", "Andrés", "Camila", "Jorge", "Valentina",
+               "Diego", "Sofía", "Felipe", "Daniela", "Santiago", "Paula", "Sebastián", "Natalia")
+LAST_NAMES = ("Pérez", "Gómez", "Rodríguez", "López", "Martínez", "García", "Hernández", "Díaz", "Moreno",
+              "Álvarez", "Romero", "Torres", "Ramírez", "Vargas", "Castro", "Rojas")
+CITIES = ("Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga", "Pereira", "Tunja")
+
+
+def make_records(count: int):
+    """Customers shaped like the ones create_customer builds"""
+    started = datetime.now()
+    for i in range(count):
+        timestamp = (started + timedelta(microseconds=i * 37)).isoformat()
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = f"{LAST_NAMES[i % len(LAST_NAMES)]} {LAST_NAMES[(i // 7) % len(LAST_NAMES)]}"
+        yield {
+            "document": f"{1000000000 + i}",
+            "firstname": first,
+            "lastname": last,
+            "address": f"Calle {i % 200} #{i % 99}-{i % 97}, {CITIES[i % len(CITIES)]}",
+            "phone": f"+57 300 {i % 10000000:07d}",
+            "email": f"cliente{i}@email.com",
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        }
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is not available)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def measure(layout: str, count: int) -> dict:
+    """Build one layout in this process and report its memory"""
+    gc.collect()
+    before = rss_bytes()
+    started = time.perf_counter()
+    if layout == "dict":
+        held = {record["document"]: record for record in make_records(count)}
+    elif layout == "records":
+        held = {record["document"]: CustomerRecord.from_dict(record) for record in make_records(count)}
+    else:
+        held = CustomerStore()
+        held.load(make_records(count))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    grown = rss_bytes() - before
+    assert len(held) == count
+    return {
+        "layout": layout,
+        "records": count,
+        "rss_mb": round(grown / 2**20, 1),
+        "bytes_per_customer": round(grown / count),
+        "build_seconds": round(elapsed, 2),
+    }
+
+
+def run(layout: str, count: int) -> dict:
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", layout, str(count)],
+        capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        reason = "out of memory" if process.returncode < 0 else process.stderr.strip().splitlines()[-1:]
+        return {"layout": layout, "records": count, "error": reason}
+    return json.loads(process.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--child", nargs=2, metavar=("LAYOUT", "RECORDS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]))))
+        return
+
+    results = []
+    print(f"{'layout':<10}{'records':>12}{'RSS MB':>10}{'B/customer':>12}{'build s':>10}")
+    for count in args.sizes:
+        for layout in args.layouts:
+            result = run(layout, count)
+            results.append(result)
+            if "error" in result:
+                print(f"{layout:<10}{count:>12,}  failed: {result['error']}")
+            else:
+                print(
+                    f"{layout:<10}{count:>12,}{result['rss_mb']:>10,.1f}"
+                    f"{result['bytes_per_customer']:>12,}{result['build_seconds']:>10.2f}"
+                )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
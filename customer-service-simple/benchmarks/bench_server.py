@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: Flask dev server vs gunicorn (gthread)
+
+Starts the service in each mode on a seeded data directory and drives it
+with client processes doing a mix of lookups, creates and updates over
+keep-alive connections. After each run the customers are counted through
+the paginated listing to check that no concurrent write was lost.
+
+Usage:
+    python benchmarks/bench_server.py --clients 16 --duration 15 --seed 10000
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from persistence import CustomerPersistence  # noqa: E402
+
+MODES = {
+    "dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+}
+
+
+def seed_document(i: int) -> str:
+    return f"{1000000000 + i}"
+
+
+def seed(data_dir: str, count: int):
+    """Write `count` customers to the write log the service will recover"""
+    persistence = CustomerPersistence(data_dir, fsync_mode="off")
+    persistence.recover()
+    persistence.open()
+    now = datetime.now().isoformat()
+    for i in range(count):
+        persistence.append({
+            "document": seed_document(i),
+            "firstname": "Juan",
+            "lastname": "Pérez",
+            "address": f"Calle {i % 200} #{i % 99}-{i % 97}",
+            "phone": f"+57 300 {i:07d}",
+            "email": f"cliente{i}@email.com",
+            "created_at": now,
+            "updated_at": now,
+        })
+    persistence.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode: str, port: int, data_dir: str, threads: int) -> subprocess.Popen:
+    env = dict(
+        os.environ, SERVICE_PORT=str(port), DATA_DIR=data_dir, GUNICORN_THREADS=str(threads),
+        CONSUL_HOST="127.0.0.1", CONSUL_PORT="1"
+    )
+    process = subprocess.Popen(
+        MODES[mode], cwd=SERVICE_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{mode} server did not become healthy")
+
+
+def stop_server(process: subprocess.Popen):
+    # The dev server's reloader forks a child; stop the whole group
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def client(task) -> dict:
+    """One client process: run the operation mix until the deadline"""
+    client_id, port, deadline, seeded, write_ratio = task
+    rng = random.Random(client_id)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    counts = {"read": 0, "create": 0, "update": 0, "errors": 0}
+    created = 0
+    while time.time() < deadline:
+        roll = rng.random()
+        if roll >= write_ratio:
+            op = "read"
+            method, path, body = "GET", f"/findcustomerbyid?customerid={seed_document(rng.randrange(seeded))}", None
+        elif roll < write_ratio / 2:
+            op = "create"
+            document = f"9{client_id:03d}{created:08d}"
+            created += 1
+            method, path = "POST", "/createcustomer"
+            body = json.dumps({
+                "document": document, "firstname": "Ana", "lastname": "Gómez", "address": "Carrera 7",
+                "phone": "+57 310 0000000", "email": f"bench{document}@email.com",
+            })
+        else:
+            op = "update"
+            method, path = "PUT", f"/updatecustomer?customerid={seed_document(rng.randrange(seeded))}"
+            body = json.dumps({"address": f"Calle {rng.randrange(1000)}"})
+
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            ok = False
+        latencies.append(time.perf_counter() - started)
+        counts[op if ok else "errors"] += 1
+    return {"counts": counts, "latencies": latencies}
+
+
+def count_customers(port: int) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    total, cursor = 0, None
+    while True:
+        path = "/customers?limit=1000" + (f"&cursor={cursor}" if cursor else "")
+        connection.request("GET", path)
+        response = connection.getresponse()
+        total += len(json.loads(response.read()))
+        cursor = response.getheader("X-Next-Cursor")
+        if not cursor:
+            return total
+
+
+def bench_mode(mode: str, args) -> dict:
+    data_dir = tempfile.mkdtemp(prefix=f"bench-{mode}-")
+    try:
+        seed(data_dir, args.seed)
+        port = free_port()
+        process = start_server(mode, port, data_dir, args.threads)
+        try:
+            deadline = time.time() + args.duration
+            tasks = [(i, port, deadline, args.seed, args.write_ratio) for i in range(args.clients)]
+            started = time.perf_counter()
+            with Pool(args.clients) as pool:
+                results = pool.map(client, tasks)
+            elapsed = time.perf_counter() - started
+            stored = count_customers(port)
+        finally:
+            stop_server(process)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    counts = {key: sum(result["counts"][key] for result in results) for key in results[0]["counts"]}
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    requests = sum(counts.values())
+    return {
+        "mode": mode,
+        "requests_per_sec": round(requests / elapsed),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        **counts,
+        # Every acknowledged create must be in the store
+        "consistent": stored == args.seed + counts["create"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client processes")
+    parser.add_argument("--threads", type=int, default=16, help="gunicorn threads")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per mode")
+    parser.add_argument("--seed", type=int, default=10_000, help="customers loaded before the run")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="share of creates + updates")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<10}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'reads':>8}{'creates':>9}{'updates':>9}{'errors':>8}  consistent")
+    for mode in args.modes:
+        result = bench_mode(mode, args)
+        results.append(result)
+        print(
+            f"{mode:<10}{result['requests_per_sec']:>8,}{result['p50_ms']:>9}{result['p99_ms']:>9}"
+            f"{result['read']:>8,}{result['create']:>9,}{result['update']:>9,}{result['errors']:>8,}  {result['consistent']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Cluster mode for customer-service-simple
+Partitions customers across instances with a consistent-hash ring
+
+Every instance places `vnodes` points per member on a 64-bit hash ring and
+owns the documents whose hash falls right before one of its points, so a
+member joining or leaving only moves about 1/N of the customers. Members
+are the instances registered in Consul under SERVICE_NAME with a passing
+health check, or a static CLUSTER_PEERS list for local runs.
+
+Requests for a document owned elsewhere are forwarded (or redirected) to
+the owner; lookups by email or name and listings ask every member. When
+membership changes, each instance pushes the customers it no longer owns
+to their new owner and drops them once accepted. There is no replication:
+the customers of an instance that is down are unavailable until it returns.
+"""
+import hashlib
+import logging
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Set on requests between instances: a forwarded request is always served
+# where it lands, a local one is answered from that instance's data only
+FORWARDED_HEADER = "X-Cluster-Forwarded"
+LOCAL_HEADER = "X-Cluster-Local"
+
+IMPORT_PATH = "/cluster/import"
+
+
+def _hash(key: str) -> int:
+    """Process-independent hash (the builtin hash() is randomized per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys to member URLs"""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.nodes: Tuple[str, ...] = tuple(sorted(set(nodes)))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def owner(self, key: str) -> Optional[str]:
+        """Member owning `key` (None on an empty ring)"""
+        if not self._hashes:
+            return None
+        index = bisect_right(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class Cluster:
+    """
+    This instance's view of the cluster
+
+    Usage:
+        cluster = Cluster("http://10.0.0.5:3000", "customer-service", consul_url="http://consul:8500")
+        cluster.refresh()                       # initial membership
+        cluster.start(rebalance)                # keep it current in the background
+        if not cluster.is_local(document):
+            cluster.forward(cluster.owner(document), "GET", "/findcustomerbyid?customerid=...")
+    """
+
+    def __init__(
+        self,
+        self_url: str,
+        service_name: str,
+        consul_url: Optional[str] = None,
+        peers: Iterable[str] = (),
+        vnodes: int = 64,
+        refresh_interval: float = 10.0,
+        timeout: float = 5.0,
+        handoff_seconds: float = 60.0,
+        batch_size: int = 500
+    ):
+        """
+        Args:
+            self_url: Base URL other members reach this instance at
+            service_name: Consul service the members register under
+            consul_url: Consul HTTP API (unused with static peers)
+            peers: Static member URLs; when set, Consul is not queried and
+                the peers answering /health are the members
+            vnodes: Ring points per member
+            refresh_interval: Seconds between membership checks
+            timeout: Seconds to wait for another member
+            handoff_seconds: How long after a membership change the previous
+                owner is asked for documents missing here
+            batch_size: Customers per handoff request
+        """
+        self.self_url = self_url.rstrip("/")
+        self.service_name = service_name
+        self.consul_url = consul_url.rstrip("/") if consul_url else None
+        self.peers = sorted({peer.rstrip("/") for peer in peers if peer.strip()})
+        self.vnodes = vnodes
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.handoff_seconds = handoff_seconds
+        self.batch_size = batch_size
+
+        self.ring = HashRing([self.self_url], vnodes)
+        self.previous_ring: Optional[HashRing] = None
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cluster")
+        self.rebalances = 0
+        self.moved = 0
+
+    # Membership
+
+    def _healthy(self, url: str) -> bool:
+        try:
+            return self._session.get(f"{url}/health", timeout=self.timeout).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def discover(self) -> List[str]:
+        """
+        Current members, this instance included
+
+        Raises:
+            requests.RequestException: If Consul cannot be queried
+        """
+        if self.peers:
+            members = [peer for peer in self.peers if peer == self.self_url or self._healthy(peer)]
+        else:
+            response = self._session.get(
+                f"{self.consul_url}/v1/health/service/{self.service_name}",
+                params={"passing": "true"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            members = [
+                f"http://{entry['Service']['Address'] or entry['Node']['Address']}:{entry['Service']['Port']}"
+                for entry in response.json()
+            ]
+        return sorted(set(members) | {self.self_url})
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the ring if membership changed
+
+        Returns:
+            True if it did
+        """
+        members = self.discover()
+        with self._lock:
+            if tuple(members) == self.ring.nodes:
+                return False
+            self.previous_ring, self.ring = self.ring, HashRing(members, self.vnodes)
+            self._changed_at = time.monotonic()
+        logger.info(f"🔄 Cluster membership changed: {', '.join(members)}")
+        return True
+
+    def start(self, rebalance: Callable[[], int]):
+        """
+        Check membership every refresh_interval and call `rebalance` after a change
+
+        `rebalance` is retried on the next check until it succeeds; the first
+        pass also hands off what a previous run left here.
+        """
+        def loop():
+            pending = True
+            while not self._closed.wait(0 if pending else self.refresh_interval):
+                try:
+                    pending = self.refresh() or pending
+                except Exception as e:
+                    logger.warning(f"Cluster membership check failed: {e}")
+                if not pending:
+                    continue
+                try:
+                    moved = rebalance()
+                    self.rebalances += 1
+                    self.moved += moved
+                    pending = False
+                    if moved:
+                        logger.info(f"🔄 Handed off {moved} customers")
+                except Exception as e:
+                    logger.error(f"Rebalance failed, retrying: {e}")
+                    self._closed.wait(self.refresh_interval)
+
+        threading.Thread(target=loop, name="cluster", daemon=True).start()
+
+    def close(self):
+        self._closed.set()
+        self._pool.shutdown(wait=False)
+
+    # Ownership
+
+    def owner(self, document: str) -> str:
+        return self.ring.owner(document)
+
+    def is_local(self, document: str) -> bool:
+        return self.ring.owner(document) == self.self_url
+
+    def is_member(self, url: str) -> bool:
+        """
+        Whether `url` is another member, in the current or the previous ring
+
+        A member this instance has not noticed yet is looked up without
+        touching the ring, which only the membership loop changes.
+        """
+        if url == self.self_url:
+            return False
+        with self._lock:
+            rings = [ring for ring in (self.ring, self.previous_ring) if ring is not None]
+        if any(url in ring.nodes for ring in rings):
+            return True
+        try:
+            return url in self.discover()
+        except requests.RequestException as e:
+            logger.warning(f"Cannot check cluster membership of {url}: {e}")
+            return False
+
+    def previous_owner(self, document: str) -> Optional[str]:
+        """Owner of `document` before the last membership change, while its handoff may be running"""
+        with self._lock:
+            ring = self.previous_ring
+            if ring is None or time.monotonic() - self._changed_at > self.handoff_seconds:
+                return None
+        owner = ring.owner(document)
+        return owner if owner != self.self_url else None
+
+    # Requests to other members
+
+    def forward(self, node: str, method: str, path: str, body: Optional[bytes] = None,
+                local: bool = False) -> Tuple[int, bytes, str]:
+        """
+        Send a request to another member
+
+        Args:
+            node: Member URL
+            method: HTTP method
+            path: Path and query string
+            body: JSON request body
+            local: Ask for that member's own data only
+
+        Returns:
+            Tuple of (status, body, content type)
+
+        Raises:
+            requests.RequestException: If the member cannot be reached
+        """
+        headers = {FORWARDED_HEADER: self.self_url, "Content-Type": "application/json"}
+        if local:
+            headers[LOCAL_HEADER] = "true"
+        response = self._session.request(method, f"{node}{path}", data=body, headers=headers, timeout=self.timeout)
+        return response.status_code, response.content, response.headers.get("Content-Type", "application/json")
+
+    def get_json(self, node: str, path: str, params: Dict[str, Any]) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        GET another member's own data
+
+        Returns:
+            Tuple of (status, decoded body, response headers)
+
+        Raises:
+            requests.RequestException: If the member cannot be reached
+        """
+        response = self._session.get(
+            f"{node}{path}", params=params, timeout=self.timeout,
+            headers={FORWARDED_HEADER: self.self_url, LOCAL_HEADER: "true"}
+        )
+        return response.status_code, response.json(), response.headers
+
+    def gather(self, path: str, params: Dict[str, Any]) -> List[Tuple[str, int, Any]]:
+        """
+        GET the same path from every other member, in parallel
+
+        Members that cannot be reached are logged and left out.
+
+        Returns:
+            List of (member, status, decoded body)
+        """
+        peers = [node for node in self.ring.nodes if node != self.self_url]
+
+        def fetch(node):
+            try:
+                status, body, _ = self.get_json(node, path, params)
+                return node, status, body
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Cluster member {node} did not answer {path}: {e}")
+                return None
+
+        return [answer for answer in self._pool.map(fetch, peers) if answer is not None]
+
+    def fetch_from_previous_owner(self, document: str) -> Optional[Dict[str, Any]]:
+        """The customer from its previous owner, if a handoff may not have brought it here yet"""
+        node = self.previous_owner(document)
+        if node is None:
+            return None
+        try:
+            status, customer, _ = self.get_json(node, "/findcustomerbyid", {"customerid": document})
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Previous owner {node} of {document} did not answer: {e}")
+            return None
+        return customer if status == 200 else None
+
+    # Rebalancing
+
+    def push(self, node: str, records: List[Dict[str, Any]]) -> List[str]:
+        """
+        Hand customers over to `node`
+
+        Returns:
+            Documents it now holds at the pushed version or a newer one;
+            the others (email conflicts, anything not reported) stay here
+
+        Raises:
+            requests.RequestException: If the member cannot be reached or fails
+        """
+        response = self._session.post(
+            f"{node}{IMPORT_PATH}", json=records, timeout=self.timeout * 6,
+            headers={FORWARDED_HEADER: self.self_url}
+        )
+        response.raise_for_status()
+        body = response.json()
+        if body["conflicts"]:
+            logger.warning(f"{node} refused {len(body['conflicts'])} customers with conflicting emails; kept here")
+        return body.get("held", [])
+
+    def rebalance(self, records: Iterable[Dict[str, Any]], drop: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Push the customers owned by other members to them, then drop the ones they hold
+
+        Args:
+            records: Every customer of this instance
+            drop: Removes a handed-off customer, unless it changed since it
+                was pushed; returns whether it did
+
+        Returns:
+            Number of customers dropped
+
+        Raises:
+            requests.RequestException: If a member cannot take its customers
+        """
+        moved = 0
+        batches: Dict[str, List[Dict[str, Any]]] = {}
+
+        def flush(node):
+            nonlocal moved
+            batch = batches.pop(node)
+            held = set(self.push(node, batch))
+            moved += sum(1 for record in batch if record["document"] in held and drop(record))
+
+        for record in records:
+            node = self.owner(record["document"])
+            if node == self.self_url:
+                continue
+            batches.setdefault(node, []).append(record)
+            if len(batches[node]) >= self.batch_size:
+                flush(node)
+        for node in list(batches):
+            flush(node)
+        return moved
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cluster state for monitoring"""
+        return {
+            "self": self.self_url,
+            "members": list(self.ring.nodes),
+            "discovery": "static" if self.peers else "consul",
+            "vnodes": self.vnodes,
+            "rebalances": self.rebalances,
+            "moved": self.moved,
+        }
@@ -0,0 +1,65 @@
+"""
+Gunicorn configuration for customer-service-simple (production mode)
+
+    gunicorn -c gunicorn.conf.py app:app
+
+By default one worker process with a pool of threads (gthread): customers
+live in the worker's memory, so a second worker would have its own,
+divergent copy. Concurrent requests are safe through the lock-striped
+CustomerStore.
+
+With SHARED_STORE_PATH set, customers live in a shared-memory table instead
+and GUNICORN_WORKERS processes serve it; the master rebuilds the table from
+DATA_DIR before forking them.
+"""
+import os
+
+SHARED_STORE_PATH = os.getenv('SHARED_STORE_PATH', '')
+
+bind = f"0.0.0.0:{os.getenv('SERVICE_PORT', '3000')}"
+worker_class = "gthread"
+workers = int(os.getenv('GUNICORN_WORKERS', '4')) if SHARED_STORE_PATH else 1
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Rebuild the shared table once, before any worker maps it"""
+    if not SHARED_STORE_PATH:
+        return
+    from shared_store import prepare_shared_store
+
+    prepare_shared_store(
+        SHARED_STORE_PATH,
+        os.getenv('DATA_DIR', 'data'),
+        int(os.getenv('SHARED_STORE_SLOTS', '1048576')),
+        int(os.getenv('SHARED_STORE_SLOT_SIZE', '1024')),
+        os.getenv('PERSISTENCE_ENABLED', 'true').lower() == 'true'
+    )
+    # Inherited by the workers, which then only attach
+    os.environ['SHARED_STORE_RECOVERED'] = 'true'
+
+
+def post_worker_init(worker):
+    """Recover persisted customers, register with Consul and join the cluster once the worker has loaded the app"""
+    import app
+
+    app.init_persistence()
+    app.register_with_consul()
+    app.init_cluster()
+    worker.log.info("✅ Service ready!")
+
+
+def worker_exit(server, worker):
+    """Flush the write log before the worker goes away"""
+    import app
+
+    if app.cluster is not None:
+        app.cluster.close()
+    if app.persistence is not None:
+        app.persistence.close()
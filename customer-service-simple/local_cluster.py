@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for cluster mode: N instances on one machine
+
+Each instance runs under gunicorn on its own port and data directory, with
+a static CLUSTER_PEERS list instead of Consul.
+
+    python local_cluster.py --nodes 3             # serve until Ctrl-C
+    python local_cluster.py --nodes 3 --check     # join/rebalance check, then stop
+
+The check starts all instances but the last, creates customers through
+random instances, starts the last one and waits for the handoff, and
+verifies that every customer is still readable through every instance and
+listed exactly once.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def request(port: int, method: str, path: str, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"null"), response.getheader("X-Next-Cursor")
+    finally:
+        connection.close()
+
+
+def start_node(port: int, peers: list, data_dir: str, refresh: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        SERVICE_PORT=str(port),
+        SERVICE_ID=f"customer-service-{port}",
+        DATA_DIR=data_dir,
+        CLUSTER_ENABLED="true",
+        CLUSTER_PEERS=",".join(peers),
+        CLUSTER_SELF_URL=f"http://127.0.0.1:{port}",
+        CLUSTER_REFRESH_SECONDS=str(refresh),
+        # No Consul here: registration fails fast and is only logged
+        CONSUL_HOST="127.0.0.1",
+        CONSUL_PORT="1",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=SERVICE_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=open(os.path.join(data_dir, "service.log"), "ab")
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if request(port, "GET", "/health")[0] == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_node(process)
+    raise RuntimeError(f"Instance on port {port} did not become healthy")
+
+
+def stop_node(process: subprocess.Popen):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_until(condition, timeout: float, what: str):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.5)
+    raise RuntimeError(f"Timed out waiting for {what}")
+
+
+def list_all(port: int) -> list:
+    found, cursor = [], None
+    while True:
+        path = "/customers?limit=500" + (f"&cursor={cursor}" if cursor else "")
+        status, page, cursor = request(port, "GET", path)
+        assert status == 200, f"listing answered {status}"
+        found.extend(customer["document"] for customer in page)
+        if not cursor:
+            return found
+
+
+def verify(ports: list, documents: list, rng: random.Random):
+    for document in documents:
+        status, customer, _ = request(rng.choice(ports), "GET", f"/findcustomerbyid?customerid={document}")
+        assert status == 200 and customer["document"] == document, f"{document} not readable ({status})"
+    email = f"cliente{documents[-1]}@email.com"
+    status, customer, _ = request(rng.choice(ports), "GET", f"/findcustomerbyemail?email={email}")
+    assert status == 200 and customer["document"] == documents[-1], f"{email} not found ({status})"
+    for port in ports:
+        listed = list_all(port)
+        assert sorted(listed) == sorted(documents), f"port {port} lists {len(listed)} of {len(documents)}"
+
+
+def check(ports: list, start_node_at, customers: int):
+    rng = random.Random(0)
+    processes = {port: start_node_at(port) for port in ports[:-1]}
+    try:
+        wait_until(
+            lambda: all(len(request(port, "GET", "/cluster/status")[1]["members"]) == len(ports) - 1 for port in ports[:-1]),
+            60, "the instances to see each other"
+        )
+        documents = [f"{1000000000 + i}" for i in range(customers)]
+        for document in documents:
+            status, _, _ = request(rng.choice(ports[:-1]), "POST", "/createcustomer", {
+                "document": document, "firstname": "Juan", "lastname": "Pérez", "address": "Calle 1",
+                "phone": "+57 300 0000000", "email": f"cliente{document}@email.com",
+            })
+            assert status == 200, f"create {document} answered {status}"
+        status, _, _ = request(ports[0], "POST", "/createcustomer", {
+            "document": "2000000000", "firstname": "Ana", "lastname": "Gómez", "address": "Calle 2",
+            "phone": "+57 300 0000001", "email": f"cliente{documents[0]}@email.com",
+        })
+        assert status == 400, "duplicate email on another instance was accepted"
+        verify(ports[:-1], documents, rng)
+        print(f"✅ {customers} customers on {len(ports) - 1} instances")
+
+        started = time.perf_counter()
+        processes[ports[-1]] = start_node_at(ports[-1])
+
+        def settled():
+            shares = [request(port, "GET", "/cluster/status")[1] for port in ports]
+            return (all(len(share["members"]) == len(ports) and share["rebalances"] > 0 for share in shares)
+                    and sum(share["customers"] for share in shares) == customers)
+
+        wait_until(settled, 120, "the handoff to the new instance")
+        shares = {port: request(port, "GET", "/cluster/status")[1]["customers"] for port in ports}
+        print(f"✅ Rebalanced in {time.perf_counter() - started:.1f}s: customers per instance {shares}")
+        assert shares[ports[-1]] > 0, "the new instance took no customers"
+        verify(ports, documents, rng)
+        print("✅ Every customer readable through every instance and listed once")
+    finally:
+        for process in processes.values():
+            stop_node(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--base-port", type=int, default=3101)
+    parser.add_argument("--data-dir", help="parent of the instances' data directories (default: a temporary one)")
+    parser.add_argument("--refresh", type=float, default=2.0, help="seconds between membership checks")
+    parser.add_argument("--check", action="store_true", help="run the join/rebalance check and exit")
+    parser.add_argument("--customers", type=int, default=300, help="customers created by --check")
+    args = parser.parse_args()
+
+    ports = [args.base_port + i for i in range(args.nodes)]
+    peers = [f"http://127.0.0.1:{port}" for port in ports]
+    root = args.data_dir or tempfile.mkdtemp(prefix="customer-cluster-")
+
+    def start_node_at(port):
+        data_dir = os.path.join(root, f"node-{port}")
+        os.makedirs(data_dir, exist_ok=True)
+        return start_node(port, peers, data_dir, args.refresh)
+
+    try:
+        if args.check:
+            check(ports, start_node_at, args.customers)
+            return
+        processes = [start_node_at(port) for port in ports]
+        print(f"🔗 Cluster running on {', '.join(peers)} (data in {root}); Ctrl-C to stop")
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in processes:
+                stop_node(process)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Durable storage for the simple customer service
+Append-only write log with batched fsync, compacted snapshots and mmap recovery
+
+Layout of DATA_DIR:
+    wal-<first seq>.log       one JSON line per write: {"seq": n, "r": record},
+                              or {"seq": n, "d": document} for a removal
+    snapshot-<seq>.jsonl      header line {"seq": n, "count": m} + one record per line
+
+A snapshot holds the state up to and including <seq>; the log is rotated at
+the same point, so recovery loads the newest snapshot and replays the log
+segments that start after it. Every log entry is a full record or a
+removal, so replaying an entry that a snapshot already contains is harmless.
+"""
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOG_PREFIX = "wal-"
+LOG_SUFFIX = ".log"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".jsonl"
+
+# fsync modes. Every entry is handed to the OS as it is appended, so a crash
+# of the process alone loses nothing; these decide what a machine crash loses
+FSYNC_ALWAYS = "always"  # writers wait for the fsync that covers them (group commit)
+FSYNC_BATCH = "batch"    # fsync every interval; a crash loses at most one interval
+FSYNC_OFF = "off"        # leave it to the OS (usually up to 30s of writes)
+
+
+def _seq_from_name(name: str, prefix: str, suffix: str) -> Optional[int]:
+    if not (name.startswith(prefix) and name.endswith(suffix)):
+        return None
+    try:
+        return int(name[len(prefix):-len(suffix)])
+    except ValueError:
+        return None
+
+
+# Key set on what replay() yields for a removed customer: {"document": d, REMOVED: True}
+REMOVED = "_removed"
+
+# Bytes parsed per json.loads call during recovery
+RECOVERY_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def _iter_entries(path: str, skip_lines: int = 0):
+    """
+    Yield the JSON lines of a file, read through a read-only mmap
+
+    Lines are decoded a few MB at a time as one JSON array, which is several
+    times faster than one json.loads per line. A chunk that fails to parse
+    (a torn write at the end of the log) is retried line by line and
+    iteration stops at the first broken line.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = 0
+            for _ in range(skip_lines):
+                position = mm.find(b"\n", position) + 1
+                if position == 0:
+                    return
+            while position < size:
+                end = mm.rfind(b"\n", position, min(size, position + RECOVERY_CHUNK_BYTES)) + 1
+                if end <= position:
+                    end = mm.find(b"\n", position) + 1 or size
+                chunk = mm[position:end].rstrip(b"\n")
+                position = end
+                if not chunk:
+                    continue
+                try:
+                    yield from json.loads(b"[" + chunk.replace(b"\n", b",") + b"]")
+                except ValueError:
+                    for line in chunk.split(b"\n"):
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            logger.warning(f"Ignoring incomplete log entry in {os.path.basename(path)}")
+                            return
+
+
+class CustomerPersistence:
+    """
+    Write log and snapshots for the in-memory customer store
+
+    Usage:
+        persistence = CustomerPersistence("/data")
+        customers = persistence.recover()         # or store.load(persistence.replay())
+        persistence.open()
+        seq = persistence.append(record)          # under the store lock
+        persistence.wait_durable(seq)             # after releasing it
+        persistence.append_removal(document)      # same, for a removed customer
+        persistence.start_snapshots(lock, get)    # periodic compaction
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        fsync_mode: str = FSYNC_BATCH,
+        fsync_interval: float = 0.05,
+        snapshot_every: int = 100_000,
+        snapshot_check_interval: float = 5.0
+    ):
+        self.data_dir = data_dir
+        self.fsync_mode = fsync_mode
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_check_interval = snapshot_check_interval
+
+        self.seq = 0
+        self._synced_seq = 0
+        self._snapshot_seq = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.recovery_stats: Dict[str, float] = {}
+
+        os.makedirs(data_dir, exist_ok=True)
+
+    # Recovery
+
+    def _list(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        entries = []
+        for name in os.listdir(self.data_dir):
+            seq = _seq_from_name(name, prefix, suffix)
+            if seq is not None:
+                entries.append((seq, os.path.join(self.data_dir, name)))
+        return sorted(entries)
+
+    def replay(self) -> Iterator[dict]:
+        """
+        Yield the records of the newest snapshot, then those of the log tail
+
+        Records come in write order, so when a document appears more than
+        once the last one wins; a removal comes as {"document": d, REMOVED: True}.
+        Lets the caller build its own representation without a dict of every
+        record in between.
+        """
+        started = time.perf_counter()
+        snapshot_records = 0
+        snapshots = self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)
+        if snapshots:
+            self._snapshot_seq, path = snapshots[-1]
+            for record in _iter_entries(path, skip_lines=1):
+                snapshot_records += 1
+                yield record
+        snapshot_loaded = time.perf_counter()
+
+        replayed = 0
+        self.seq = self._snapshot_seq
+        for first_seq, path in self._list(LOG_PREFIX, LOG_SUFFIX):
+            for entry in _iter_entries(path):
+                if entry["seq"] <= self._snapshot_seq:
+                    continue
+                self.seq = max(self.seq, entry["seq"])
+                replayed += 1
+                if "d" in entry:
+                    yield {"document": entry["d"], REMOVED: True}
+                else:
+                    yield entry["r"]
+
+        self._synced_seq = self.seq
+        self.recovery_stats = {
+            "snapshot_records": snapshot_records,
+            "snapshot_seq": self._snapshot_seq,
+            "replayed_log_entries": replayed,
+            "snapshot_load_seconds": round(snapshot_loaded - started, 3),
+            "log_replay_seconds": round(time.perf_counter() - snapshot_loaded, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Recovered customers: {self.recovery_stats}")
+
+    def recover(self) -> Dict[str, dict]:
+        """
+        Rebuild the customer dict from the newest snapshot and the log tail
+
+        Returns:
+            Customers keyed by document
+        """
+        customers = {}
+        for record in self.replay():
+            if record.get(REMOVED):
+                customers.pop(record["document"], None)
+            else:
+                customers[record["document"]] = record
+        self.recovery_stats["records"] = len(customers)
+        return customers
+
+    # Write log
+
+    def _open_segment(self):
+        path = os.path.join(self.data_dir, f"{LOG_PREFIX}{self.seq + 1:020d}{LOG_SUFFIX}")
+        self._file = open(path, "ab")
+
+    def open(self):
+        """Start a new log segment and the background fsync thread (call after recover)"""
+        self._open_segment()
+        if self.fsync_mode != FSYNC_OFF:
+            thread = threading.Thread(target=self._flush_loop, name="wal-fsync", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def append(self, record: dict) -> int:
+        """
+        Append a full customer record to the log
+
+        The entry reaches the OS before this returns, so it survives the
+        process crashing; call wait_durable() outside the store lock when the
+        caller must not answer before it is on disk.
+
+        Returns:
+            Sequence number of the entry
+        """
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        return self._write_entry(b'"r":' + payload)
+
+    def append_removal(self, document: str) -> int:
+        """
+        Append the removal of a customer to the log (same contract as append)
+
+        Returns:
+            Sequence number of the entry
+        """
+        return self._write_entry(b'"d":' + json.dumps(document).encode("utf-8"))
+
+    def _write_entry(self, body: bytes) -> int:
+        with self._lock:
+            self.seq += 1
+            seq = self.seq
+            self._file.write(b'{"seq":%d,%s}\n' % (seq, body))
+            # One write per entry; only the fsync is batched
+            self._file.flush()
+        return seq
+
+    def wait_durable(self, seq: int):
+        """
+        In "always" mode, block until entry `seq` has been fsynced
+
+        Concurrent writers waiting here share a single fsync (group commit).
+        """
+        if self.fsync_mode != FSYNC_ALWAYS:
+            return
+        with self._lock:
+            self._synced.notify_all()
+            while self._synced_seq < seq and not self._closed.is_set():
+                self._synced.wait()
+
+    def _sync_locked(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced_seq = self.seq
+        self._synced.notify_all()
+
+    def _sync(self):
+        """fsync without blocking writers: only the buffer flush happens under the lock"""
+        with self._lock:
+            if self._file is None or self._synced_seq == self.seq:
+                return
+            self._file.flush()
+            target = self.seq
+            # A duplicate descriptor stays valid if the segment is rotated meanwhile
+            fd = os.dup(self._file.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        with self._lock:
+            self._synced_seq = max(self._synced_seq, target)
+            self._synced.notify_all()
+
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            with self._lock:
+                if self._synced_seq == self.seq:
+                    self._synced.wait(timeout=self.fsync_interval)
+                if self._synced_seq == self.seq:
+                    continue
+            if self.fsync_mode == FSYNC_BATCH:
+                # Let writers accumulate for one interval
+                time.sleep(self.fsync_interval)
+            self._sync()
+
+    # Snapshots
+
+    def snapshot(
+        self,
+        state_lock,
+        get_records: Callable[[], List[Any]],
+        to_dict: Optional[Callable[[Any], dict]] = None
+    ) -> int:
+        """
+        Write a compacted snapshot and drop the log segments it covers
+
+        The log is rotated while `state_lock` (the lock writers hold around
+        a change and its append) is held, so the snapshot matches a log
+        position; the records are serialized after the lock is released.
+
+        Args:
+            state_lock: Lock guarding the customer store
+            get_records: Returns the current records (called under state_lock);
+                they must not be mutated afterwards
+            to_dict: Converts a record to its dict form, if records are not dicts
+
+        Returns:
+            Sequence number covered by the snapshot
+        """
+        started = time.perf_counter()
+        with state_lock:
+            snapshot_seq = self._rotate()
+            records = list(get_records())
+
+        self._write_snapshot(snapshot_seq, records, len(records), to_dict)
+        self._drop_covered(snapshot_seq)
+        logger.info(
+            f"Snapshot of {len(records)} customers at seq {snapshot_seq} "
+            f"written in {time.perf_counter() - started:.2f}s"
+        )
+        return snapshot_seq
+
+    def _rotate(self) -> int:
+        """Close the current segment and start the next one; returns the last seq of the old one"""
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            snapshot_seq = self.seq
+            self._open_segment()
+        return snapshot_seq
+
+    def _write_snapshot(
+        self,
+        snapshot_seq: int,
+        records: Iterable[Any],
+        count: int,
+        to_dict: Optional[Callable[[Any], dict]]
+    ):
+        tmp_path = os.path.join(self.data_dir, f"{SNAPSHOT_PREFIX}{snapshot_seq:020d}.tmp")
+        final_path = os.path.join(self.data_dir, f"{SNAPSHOT_PREFIX}{snapshot_seq:020d}{SNAPSHOT_SUFFIX}")
+        with open(tmp_path, "wb", buffering=4 * 1024 * 1024) as f:
+            f.write(json.dumps({"seq": snapshot_seq, "count": count}).encode("utf-8") + b"\n")
+            for record in records:
+                if to_dict is not None:
+                    record = to_dict(record)
+                f.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+        dir_fd = os.open(self.data_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _drop_covered(self, snapshot_seq: int):
+        """Record the new snapshot and delete the files it makes redundant"""
+        self._snapshot_seq = snapshot_seq
+        for seq, path in self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+            if seq < snapshot_seq:
+                os.remove(path)
+        for first_seq, path in self._list(LOG_PREFIX, LOG_SUFFIX):
+            if first_seq <= snapshot_seq:
+                os.remove(path)
+
+    def _snapshot_due(self) -> bool:
+        return self.seq - self._snapshot_seq >= self.snapshot_every
+
+    def start_snapshots(
+        self,
+        state_lock,
+        get_records: Callable[[], List[Any]],
+        to_dict: Optional[Callable[[Any], dict]] = None
+    ):
+        """Snapshot in the background whenever `snapshot_every` writes have accumulated"""
+        def loop():
+            while not self._closed.wait(self.snapshot_check_interval):
+                if self._snapshot_due():
+                    try:
+                        self.snapshot(state_lock, get_records, to_dict)
+                    except Exception as e:
+                        logger.error(f"Snapshot failed: {e}")
+
+        thread = threading.Thread(target=loop, name="snapshotter", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def close(self):
+        """Flush the log and stop the background threads"""
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+            self._closed.set()
+            self._synced.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict[str, object]:
+        """Get persistence state for monitoring"""
+        return {
+            "data_dir": self.data_dir,
+            "fsync_mode": self.fsync_mode,
+            "seq": self.seq,
+            "synced_seq": self._synced_seq,
+            "snapshot_seq": self._snapshot_seq,
+            "recovery": self.recovery_stats,
+        }
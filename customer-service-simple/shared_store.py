@@ -0,0 +1,668 @@
+"""
+Shared-memory customer store for multi-process serving
+An mmap'd hash table that every worker process maps, so N workers serve one
+dataset; readers take no lock and make no IPC
+
+Layout of the table file:
+    header (4 KB)        magic, geometry, customer count, write-log counters
+    customer slots       slots x slot_size:  seqlock | state | key | JSON record
+    email slots          slots x 256 B:      seqlock | state | email | document
+
+Both regions are open-addressed (linear probing) on a stable 64-bit hash.
+Each slot starts with a seqlock counter: a writer makes it odd, writes,
+then makes it even again; a reader copies the slot and retries if the
+counter was odd or changed meanwhile. This relies on stores becoming
+visible in program order (x86-64 TSO); every mmap access is a separate
+C call, so the interpreter does not reorder them. Other architectures are
+refused.
+
+Deleted slots are tombstones that lookups must probe past. Once they pile
+up, the writer holding the lock rebuilds the table into a new file and
+swaps it in; the old file is flagged as retired and every process maps the
+new one on its next access.
+
+Writers in any process serialize on a file lock (plus a thread lock within
+the process). The table is rebuilt from DATA_DIR when the service starts,
+so a worker killed in the middle of a write only loses that slot until the
+next restart.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import platform
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from persistence import LOG_PREFIX, LOG_SUFFIX, REMOVED, CustomerPersistence
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CUSTSHM1"
+HEADER_SIZE = 4096
+
+# Header fields: name -> (offset, struct format)
+HEADER_FIELDS = {
+    "magic": (0, "8s"),
+    "slot_size": (8, "<I"),
+    "slots": (16, "<Q"),
+    "count": (24, "<Q"),
+    "log_seq": (32, "<Q"),
+    "snapshot_seq": (40, "<Q"),
+    "segment_seq": (48, "<Q"),
+    "retired": (56, "<Q"),
+    "record_tombstones": (64, "<Q"),
+    "email_tombstones": (72, "<Q"),
+}
+
+SLOT_HEADER = struct.Struct("<IBxHH6x")  # seqlock, state, key length, value length
+EMPTY, USED, DELETED = 0, 1, 2
+
+KEY_SIZE = 64
+EMAIL_SLOT_SIZE = 256
+EMAIL_SIZE = 176
+EMAIL_DOCUMENT_OFFSET = SLOT_HEADER.size + EMAIL_SIZE
+
+# A table fuller than this refuses new customers (probe chains grow quickly past it)
+MAX_LOAD_FACTOR = 0.9
+# How long a reader waits for a slot whose writer never finishes
+SEQLOCK_TIMEOUT = 1.0
+
+
+def _hash(key: str) -> int:
+    """Process-independent hash (the builtin hash() is randomized per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class ProcessLock:
+    """
+    Re-entrant lock shared by threads and processes
+
+    flock() excludes other processes but not other threads of the same
+    process, so it is paired with an RLock and only taken at depth 1.
+    """
+
+    def __init__(self, path: str):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+class SharedCustomerStore:
+    """
+    CustomerStore API on top of the shared table
+
+    Differences with the in-process store: listing pages follow slot order
+    (the cursor is a slot position, still proportional to the page size),
+    name search scans the whole table, and every write takes one table-wide
+    lock. Lookups by document and email are lock-free.
+    """
+
+    record_to_dict = None  # records() already yields dicts
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = 1 << 20,
+        slot_size: int = 1024,
+        create: bool = False,
+        lock: Optional[ProcessLock] = None
+    ):
+        """
+        Map the table at `path`
+
+        Args:
+            path: Table file (on tmpfs such as /dev/shm it never touches disk)
+            slots: Number of customer slots (only used when creating)
+            slot_size: Bytes per customer slot (only used when creating)
+            create: Start from an empty table, discarding an existing one
+            lock: Write lock to use instead of the one next to `path`
+
+        Raises:
+            RuntimeError: On CPUs without x86-64 store ordering
+        """
+        if platform.machine().lower() not in ("x86_64", "amd64"):
+            raise RuntimeError(
+                f"The shared customer table relies on x86-64 store ordering; unset SHARED_STORE_PATH "
+                f"on {platform.machine()}"
+            )
+        self.path = path
+        if create or not os.path.exists(path):
+            self._create(path, slots, slot_size)
+        self.lock = lock or ProcessLock(f"{path}.lock")
+        self._remap_lock = threading.Lock()
+        # Bumped every time the table is mapped again after a rebuild
+        self._generation = 0
+        self._map()
+
+    def _map(self):
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._mm = mmap.mmap(self._fd, 0, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        if self._get("magic") != MAGIC:
+            raise ValueError(f"{self.path} is not a customer table")
+        self.slots = self._get("slots")
+        self.slot_size = self._get("slot_size")
+        self._records_offset = HEADER_SIZE
+        self._emails_offset = HEADER_SIZE + self.slots * self.slot_size
+
+    def _follow(self) -> bool:
+        """
+        Map the rebuilt table if the mapped one was retired
+
+        The old mapping is left to the garbage collector rather than closed,
+        since other threads may still be reading it.
+
+        Returns:
+            True if the table was mapped again
+        """
+        offset, fmt = HEADER_FIELDS["retired"]
+        if not struct.unpack_from(fmt, self._mm, offset)[0]:
+            return False
+        with self._remap_lock:
+            if struct.unpack_from(fmt, self._mm, offset)[0]:
+                fd = self._fd
+                self._map()
+                os.close(fd)
+                self._generation += 1
+        return True
+
+    def reopen(self):
+        """Map the table again, after prepare_shared_store replaced the file"""
+        with self.lock:
+            self.close()
+            self._map()
+
+    @staticmethod
+    def _create(path: str, slots: int, slot_size: int):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            # Sparse: pages are only backed by memory once a slot is written
+            f.truncate(HEADER_SIZE + slots * (slot_size + EMAIL_SLOT_SIZE))
+            f.write(MAGIC)
+            f.seek(HEADER_FIELDS["slot_size"][0])
+            f.write(struct.pack("<I", slot_size))
+            f.seek(HEADER_FIELDS["slots"][0])
+            f.write(struct.pack("<Q", slots))
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    # Header
+
+    def _get(self, field: str):
+        self._follow()
+        offset, fmt = HEADER_FIELDS[field]
+        return struct.unpack_from(fmt, self._mm, offset)[0]
+
+    def _set(self, field: str, value):
+        self._follow()
+        offset, fmt = HEADER_FIELDS[field]
+        struct.pack_into(fmt, self._mm, offset, value)
+
+    # Slots
+
+    def _read(self, offset: int, size: int, mm: Optional[mmap.mmap] = None) -> bytes:
+        """Consistent copy of a slot (seqlock read), from `mm` or the current mapping"""
+        mm = mm if mm is not None else self._mm
+        deadline = None
+        while True:
+            before = struct.unpack_from("<I", mm, offset)[0]
+            if not before & 1:
+                raw = mm[offset:offset + size]
+                if struct.unpack_from("<I", mm, offset)[0] == before:
+                    return raw
+            if deadline is None:
+                deadline = time.monotonic() + SEQLOCK_TIMEOUT
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Slot at offset {offset} of {self.path} stays locked")
+            time.sleep(0)
+
+    def _write(self, offset: int, state: int, key: bytes, value: bytes, value_offset: int):
+        """Replace a slot's content (caller holds the write lock)"""
+        previous = self._mm[offset + 4]
+        if (previous == DELETED) != (state == DELETED):
+            field = "email_tombstones" if offset >= self._emails_offset else "record_tombstones"
+            self._set(field, self._get(field) + (1 if state == DELETED else -1))
+        seq = struct.unpack_from("<I", self._mm, offset)[0]
+        # Odd counter first: readers from here on retry
+        struct.pack_into("<I", self._mm, offset, (seq + 1) & 0xFFFFFFFF)
+        SLOT_HEADER.pack_into(self._mm, offset, (seq + 1) & 0xFFFFFFFF, state, len(key), len(value))
+        self._mm[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(key)] = key
+        self._mm[offset + value_offset:offset + value_offset + len(value)] = value
+        struct.pack_into("<I", self._mm, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def _probe(self, region: int, slot_size: int, key: bytes, value_offset: int) -> Tuple[Optional[int], Optional[bytes], Optional[int]]:
+        """
+        Look `key` up in a region
+
+        Returns:
+            Tuple of (offset of the key's slot, its value, offset of the first
+            reusable slot on the way), with None for what was not found
+        """
+        self._follow()
+        generation = self._generation
+        index = _hash(key.decode("utf-8")) % self.slots
+        reusable = None
+        for _ in range(self.slots):
+            offset = region + index * slot_size
+            raw = self._read(offset, slot_size)
+            _, state, key_length, value_length = SLOT_HEADER.unpack_from(raw)
+            if state == EMPTY:
+                if self._follow() or generation != self._generation:
+                    # The table was rebuilt under this lookup: a miss may be stale
+                    return self._probe(region, slot_size, key, value_offset)
+                return None, None, reusable if reusable is not None else offset
+            if state == USED and raw[SLOT_HEADER.size:SLOT_HEADER.size + key_length] == key:
+                return offset, raw[value_offset:value_offset + value_length], reusable
+            if state == DELETED and reusable is None:
+                reusable = offset
+            index = (index + 1) % self.slots
+        return None, None, reusable
+
+    def _find(self, document: str) -> Tuple[Optional[int], Optional[bytes], Optional[int]]:
+        return self._probe(self._records_offset, self.slot_size, document.encode("utf-8"), KEY_SIZE + SLOT_HEADER.size)
+
+    def _email_document(self, email: str) -> Optional[str]:
+        _, value, _ = self._probe(self._emails_offset, EMAIL_SLOT_SIZE, email.lower().encode("utf-8"), EMAIL_DOCUMENT_OFFSET)
+        return value.decode("utf-8") if value is not None else None
+
+    def _set_email(self, email: str, document: str):
+        key = email.lower().encode("utf-8")
+        if len(key) > EMAIL_SIZE:
+            raise ValueError(f"Email longer than {EMAIL_SIZE} bytes")
+        offset, _, free = self._probe(self._emails_offset, EMAIL_SLOT_SIZE, key, EMAIL_DOCUMENT_OFFSET)
+        self._write(offset if offset is not None else free, USED, key, document.encode("utf-8"), EMAIL_DOCUMENT_OFFSET)
+
+    def _delete_email(self, email: str, document: str):
+        key = email.lower().encode("utf-8")
+        offset, value, _ = self._probe(self._emails_offset, EMAIL_SLOT_SIZE, key, EMAIL_DOCUMENT_OFFSET)
+        if offset is not None and value == document.encode("utf-8"):
+            self._write(offset, DELETED, b"", b"", EMAIL_DOCUMENT_OFFSET)
+
+    def _put(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace a record and its email entry (caller holds the write lock)"""
+        document = record["document"]
+        key = document.encode("utf-8")
+        value = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        if len(key) > KEY_SIZE:
+            raise ValueError(f"Document longer than {KEY_SIZE} bytes")
+        if len(value) > self.slot_size - KEY_SIZE - SLOT_HEADER.size:
+            raise ValueError(f"Customer {document} does not fit in a {self.slot_size} byte slot")
+        offset, current, free = self._find(document)
+        if offset is None:
+            if self._get("count") >= self.slots * MAX_LOAD_FACTOR:
+                raise ValueError(f"Shared customer table is full ({self.slots} slots)")
+            offset = free
+            self._set("count", self._get("count") + 1)
+        else:
+            old_email = json.loads(current)["email"]
+            if old_email.lower() != record["email"].lower():
+                self._delete_email(old_email, document)
+        self._set_email(record["email"], document)
+        self._write(offset, USED, key, value, KEY_SIZE + SLOT_HEADER.size)
+        # Replacing an email leaves a tombstone too
+        self._compact_if_needed()
+        return record
+
+    def _remove(self, document: str) -> bool:
+        """Delete a record and its email entry (caller holds the write lock)"""
+        offset, current, _ = self._find(document)
+        if offset is None:
+            return False
+        self._delete_email(json.loads(current)["email"], document)
+        self._write(offset, DELETED, b"", b"", KEY_SIZE + SLOT_HEADER.size)
+        self._set("count", self._get("count") - 1)
+        self._compact_if_needed()
+        return True
+
+    def _compact_if_needed(self):
+        """
+        Rebuild the table once tombstones fill half of the free slots (caller holds the write lock)
+
+        Keeps empty slots, which end every miss, at a twentieth of the table
+        or more; each rebuild is paid for by that many deletions.
+        """
+        tombstones = max(self._get("record_tombstones"), self._get("email_tombstones"))
+        if tombstones and tombstones * 2 >= self.slots - self._get("count"):
+            self.compact()
+
+    def compact(self):
+        """
+        Rebuild the table without tombstones and swap it in
+
+        Runs under the write lock, so writers wait for it; readers keep
+        using the old table until it is flagged as retired. Needs room for
+        a second table next to the first while it runs.
+        """
+        with self.lock:
+            started = time.perf_counter()
+            tombstones = self._get("record_tombstones")
+            compact_path = f"{self.path}.compact"
+            fresh = SharedCustomerStore(compact_path, self.slots, self.slot_size, create=True, lock=self.lock)
+            try:
+                for _, value in self._scan():
+                    fresh._put(json.loads(value))
+                for field in ("log_seq", "snapshot_seq", "segment_seq"):
+                    fresh._set(field, self._get(field))
+            finally:
+                fresh.close()
+            os.replace(compact_path, self.path)
+            self._set("retired", 1)
+            self._follow()
+        logger.info(
+            f"🧹 Shared table rebuilt without {tombstones} deleted slots in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _scan(self, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (slot index, JSON record) of the used slots from `start` on
+
+        The scan stays on the table mapped when it started. A rebuild
+        retires that table and moves records to other slots, so following
+        it halfway would skip records; the retired table takes no more
+        writes and still holds every record as of the rebuild.
+        """
+        self._follow()
+        with self._remap_lock:
+            mm, records_offset, slots, slot_size = self._mm, self._records_offset, self.slots, self.slot_size
+        for index in range(start, slots):
+            offset = records_offset + index * slot_size
+            # Cheap peek at the state byte before copying the slot
+            if mm[offset + 4] != USED:
+                continue
+            raw = self._read(offset, slot_size, mm)
+            _, state, _, value_length = SLOT_HEADER.unpack_from(raw)
+            if state == USED:
+                value_offset = KEY_SIZE + SLOT_HEADER.size
+                yield index, raw[value_offset:value_offset + value_length]
+
+    # CustomerStore API
+
+    def __len__(self) -> int:
+        return self._get("count")
+
+    def __contains__(self, document: str) -> bool:
+        return self._find(document)[0] is not None
+
+    def lock_for(self, document: str) -> ProcessLock:
+        """Lock serializing the changes to `document` (one lock for the whole table)"""
+        return self.lock
+
+    def load(self, records):
+        """Insert records in write order; a later record for the same document wins, a removal drops it"""
+        with self.lock:
+            for record in records:
+                if record.get(REMOVED):
+                    self._remove(record["document"])
+                else:
+                    self._put(record)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Every customer, read slot by slot without locking"""
+        for _, value in self._scan():
+            yield json.loads(value)
+
+    def values(self) -> List[Dict[str, Any]]:
+        return list(self.records())
+
+    def get(self, document: str) -> Optional[Dict[str, Any]]:
+        _, value, _ = self._find(document)
+        return json.loads(value) if value is not None else None
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        document = self._email_document(email)
+        return self.get(document) if document is not None else None
+
+    def email_owner(self, email: str) -> Optional[str]:
+        return self._email_document(email)
+
+    def create(self, data: Dict[str, Any]) -> bool:
+        """
+        Insert a new customer
+
+        Returns:
+            False if the document or the email is already taken
+
+        Raises:
+            ValueError: If the customer does not fit in a slot or the table is full
+        """
+        with self.lock:
+            if data["document"] in self or self._email_document(data["email"]) is not None:
+                return False
+            self._put(data)
+            return True
+
+    def update(self, document: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply field changes to a customer
+
+        Returns:
+            The updated customer, or None if the customer does not exist
+
+        Raises:
+            ValueError: If the new email belongs to another customer
+        """
+        with self.lock:
+            current = self.get(document)
+            if current is None:
+                return None
+            if "email" in changes:
+                owner = self._email_document(changes["email"])
+                if owner is not None and owner != document:
+                    raise ValueError(f"Email {changes['email']} already used by another customer")
+            return self._put({**current, **changes})
+
+    def put_if_newer(self, data: Dict[str, Any]) -> bool:
+        """
+        Insert a customer, or replace it if `data` was updated later (cluster handoff)
+
+        Returns:
+            False if the stored customer is as recent or more
+
+        Raises:
+            ValueError: If the email belongs to another customer, or the
+                customer does not fit
+        """
+        with self.lock:
+            current = self.get(data["document"])
+            if current is not None and current["updated_at"] >= data["updated_at"]:
+                return False
+            owner = self._email_document(data["email"])
+            if owner is not None and owner != data["document"]:
+                raise ValueError(f"Email {data['email']} already used by another customer")
+            self._put(data)
+            return True
+
+    def remove(self, document: str) -> bool:
+        """
+        Delete a customer
+
+        Returns:
+            False if the customer does not exist
+        """
+        with self.lock:
+            return self._remove(document)
+
+    def page(self, after: Optional[str], limit: int) -> Tuple[bytes, Optional[str]]:
+        """
+        One page of customers in slot order, serialized as a JSON array
+
+        A rebuild of the table (see compact) moves records to other slots,
+        so a listing whose pages span one may skip or repeat customers.
+
+        Args:
+            after: Slot position returned with the previous page (None for the first page)
+            limit: Page size
+
+        Returns:
+            Tuple of (JSON body, slot position to continue from if more may follow)
+        """
+        try:
+            start = int(after) + 1 if after is not None else 0
+        except ValueError:
+            raise ValueError(f"Invalid page position: {after}")
+        values = []
+        last = None
+        for index, value in self._scan(start):
+            values.append(value)
+            last = index
+            if len(values) == limit:
+                break
+        body = b"[" + b",".join(values) + b"]"
+        return body, str(last) if len(values) == limit else None
+
+    def search_by_name(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Customers whose first or last name has a word starting with `prefix` (full scan)"""
+        prefix = prefix.lower()
+        found = []
+        for record in self.records():
+            words = f"{record['firstname']} {record['lastname']}".lower().split()
+            if any(word.startswith(prefix) for word in words):
+                found.append(record)
+                if len(found) == limit:
+                    break
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store statistics for monitoring"""
+        count = self._get("count")
+        return {
+            "customers": count,
+            "shared_table": self.path,
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "load_factor": round(count / self.slots, 3),
+            "deleted_slots": self._get("record_tombstones"),
+            "deleted_email_slots": self._get("email_tombstones"),
+        }
+
+
+class SharedCustomerPersistence(CustomerPersistence):
+    """
+    Write log shared by every worker process
+
+    All workers append to the same segment under the table's write lock;
+    the log sequence number and the current segment live in the table
+    header. Any worker may take a snapshot: it rotates the segment for
+    everybody under the write lock, then reads the table without blocking
+    writers. Such a snapshot can hold records newer than its seq, which
+    recovery tolerates because it replays full records from the log on top.
+    A rebuild of the table during the snapshot does not lose records: the
+    scan keeps reading the retired table (see SharedCustomerStore._scan).
+    """
+
+    def __init__(self, store: SharedCustomerStore, data_dir: str, **kwargs):
+        self._store = store
+        self._segment_seq = 0
+        super().__init__(data_dir, **kwargs)
+        self._snapshotter = os.open(os.path.join(data_dir, ".snapshot.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def recover_into_store(self):
+        """Rebuild the table from DATA_DIR (once, before the workers start)"""
+        self._store.load(self.replay())
+        self._store._set("log_seq", self.seq)
+        self._store._set("snapshot_seq", self._snapshot_seq)
+        self._store._set("segment_seq", self.seq + 1)
+
+    def _open_segment(self):
+        with self._store.lock:
+            if not self._store._get("segment_seq"):
+                self._store._set("segment_seq", self.seq + 1)
+            self._segment_seq = self._store._get("segment_seq")
+        path = os.path.join(self.data_dir, f"{LOG_PREFIX}{self._segment_seq:020d}{LOG_SUFFIX}")
+        self._file = open(path, "ab")
+
+    def open(self):
+        self.seq = self._synced_seq = self._store._get("log_seq")
+        self._snapshot_seq = self._store._get("snapshot_seq")
+        super().open()
+
+    def _write_entry(self, body: bytes) -> int:
+        """Append under the table's write lock, which orders entries across processes"""
+        with self._store.lock:
+            if self._store._get("segment_seq") != self._segment_seq:
+                # Another worker rotated the log for a snapshot
+                with self._lock:
+                    self._sync_locked()
+                    self._file.close()
+                    self._open_segment()
+            with self._lock:
+                self.seq = self._store._get("log_seq")
+            # Flushed whole before the lock is released: other processes append to the same file
+            seq = super()._write_entry(body)
+            self._store._set("log_seq", seq)
+        return seq
+
+    def _rotate(self) -> int:
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            self.seq = self._store._get("log_seq")
+            snapshot_seq = self.seq
+            self._store._set("segment_seq", snapshot_seq + 1)
+            self._open_segment()
+        return snapshot_seq
+
+    def snapshot(self, state_lock, get_records: Callable[[], Iterator[dict]], to_dict=None) -> int:
+        try:
+            fcntl.flock(self._snapshotter, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another worker is taking one
+            return self._store._get("snapshot_seq")
+        try:
+            started = time.perf_counter()
+            with state_lock:
+                snapshot_seq = self._rotate()
+            # Writers go on meanwhile; see the class docstring
+            self._write_snapshot(snapshot_seq, get_records(), len(self._store), to_dict)
+            self._drop_covered(snapshot_seq)
+            self._store._set("snapshot_seq", snapshot_seq)
+        finally:
+            fcntl.flock(self._snapshotter, fcntl.LOCK_UN)
+        logger.info(f"Snapshot of the shared table at seq {snapshot_seq} written in {time.perf_counter() - started:.2f}s")
+        return snapshot_seq
+
+    def _snapshot_due(self) -> bool:
+        return self._store._get("log_seq") - self._store._get("snapshot_seq") >= self.snapshot_every
+
+    def stats(self) -> Dict[str, object]:
+        stats = super().stats()
+        stats["seq"] = self._store._get("log_seq")
+        stats["snapshot_seq"] = self._store._get("snapshot_seq")
+        return stats
+
+
+def prepare_shared_store(path: str, data_dir: str, slots: int, slot_size: int, persistence_enabled: bool):
+    """
+    Build a fresh shared table from DATA_DIR
+
+    Called once per service start, before any worker maps the table
+    (gunicorn's on_starting hook, or init_persistence in the dev server).
+    """
+    store = SharedCustomerStore(path, slots=slots, slot_size=slot_size, create=True)
+    try:
+        if persistence_enabled:
+            persistence = SharedCustomerPersistence(store, data_dir)
+            persistence.recover_into_store()
+            logger.info(f"💾 Shared table {path} rebuilt with {len(store)} customers")
+    finally:
+        store.close()
@@ -0,0 +1,544 @@
+"""
+In-memory customer store with secondary indexes
+Compact records, email index, name prefix index, sorted document index for
+cursor pagination and a cache of serialized pages
+"""
+import base64
+import binascii
+import json
+import sys
+import threading
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from persistence import REMOVED
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _pack_time(value: str) -> Union[int, str]:
+    """Naive ISO timestamp -> microseconds since 1970 (other values are kept as they are)"""
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    if moment.tzinfo is not None:
+        return value
+    return (moment - EPOCH) // MICROSECOND
+
+
+def _unpack_time(value: Union[int, str]) -> str:
+    if isinstance(value, int):
+        return (EPOCH + value * MICROSECOND).isoformat()
+    return value
+
+
+class CustomerRecord:
+    """
+    Immutable, compact form of a customer
+
+    Compared with a dict of eight strings, slots, interned names and integer
+    timestamps save about 40% per customer (see benchmarks/bench_memory.py).
+    Updates build a new record, so a record can be shared with readers and
+    snapshots without copying.
+    """
+
+    __slots__ = ("document", "firstname", "lastname", "address", "phone", "email", "created_at", "updated_at")
+
+    def __init__(self, document, firstname, lastname, address, phone, email, created_at, updated_at):
+        self.document = document
+        # Names repeat a lot across customers, so share one string per value
+        self.firstname = sys.intern(firstname)
+        self.lastname = sys.intern(lastname)
+        self.address = address
+        self.phone = phone
+        self.email = email
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CustomerRecord":
+        created_at = _pack_time(data.get("created_at"))
+        # Never-updated customers share one int for both timestamps
+        if data.get("updated_at") == data.get("created_at"):
+            updated_at = created_at
+        else:
+            updated_at = _pack_time(data.get("updated_at"))
+        return cls(
+            data["document"], data["firstname"], data["lastname"], data["address"], data["phone"],
+            data["email"], created_at, updated_at
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "document": self.document,
+            "firstname": self.firstname,
+            "lastname": self.lastname,
+            "address": self.address,
+            "phone": self.phone,
+            "email": self.email,
+            "created_at": _unpack_time(self.created_at),
+            "updated_at": _unpack_time(self.updated_at),
+        }
+
+
+class SortedKeyIndex:
+    """
+    Sorted set of keys stored as a list of bounded sorted blocks
+
+    Inserts and deletes touch a single block (O(sqrt n) instead of the O(n)
+    memmove of one big sorted list), and range scans start with two bisects.
+    """
+
+    def __init__(self, block_size: int = 1000):
+        self._block_size = block_size
+        self._blocks: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def build(self, keys: Iterable):
+        """Replace the contents with unique `keys` (sorted once, much faster than repeated add)"""
+        ordered = sorted(keys)
+        size = self._block_size
+        self._blocks = [ordered[i:i + size] for i in range(0, len(ordered), size)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(ordered)
+
+    def add(self, key):
+        """Insert a key (no-op if present)"""
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+        index = bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            index -= 1
+        block = self._blocks[index]
+        position = bisect_left(block, key)
+        if position < len(block) and block[position] == key:
+            return
+        insort(block, key)
+        self._maxes[index] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self._block_size:
+            half = len(block) // 2
+            self._blocks[index:index + 1] = [block[:half], block[half:]]
+            self._maxes[index:index + 1] = [block[half - 1], block[-1]]
+
+    def discard(self, key):
+        """Remove a key if present"""
+        index = bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return
+        block = self._blocks[index]
+        position = bisect_left(block, key)
+        if position == len(block) or block[position] != key:
+            return
+        del block[position]
+        self._len -= 1
+        if block:
+            self._maxes[index] = block[-1]
+        else:
+            del self._blocks[index]
+            del self._maxes[index]
+
+    def iter_from(self, start=None, inclusive: bool = True) -> Iterator:
+        """Iterate keys in order, starting at `start` (from the beginning if None)"""
+        if start is None:
+            index, position = 0, 0
+        else:
+            find = bisect_left if inclusive else bisect_right
+            index = find(self._maxes, start)
+            if index == len(self._maxes):
+                return
+            position = find(self._blocks[index], start)
+        for block in self._blocks[index:]:
+            yield from block[position:]
+            position = 0
+
+
+class PageCache:
+    """
+    LRU cache of serialized listing pages
+
+    A page is identified by (after, limit) and remembers its last key, so a
+    write to document d only evicts the pages whose range can contain d.
+    """
+
+    def __init__(self, max_pages: int = 256):
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[Tuple[Optional[str], int], Tuple[bytes, Optional[str], bool]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, after: Optional[str], limit: int) -> Optional[Tuple[bytes, Optional[str]]]:
+        entry = self._pages.get((after, limit))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._pages.move_to_end((after, limit))
+        self.hits += 1
+        body, last_key, full = entry
+        return body, last_key if full else None
+
+    def put(self, after: Optional[str], limit: int, body: bytes, last_key: Optional[str], full: bool):
+        self._pages[(after, limit)] = (body, last_key, full)
+        self._pages.move_to_end((after, limit))
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def invalidate(self, document: str):
+        """Evict every page whose key range contains `document`"""
+        stale = [
+            key for key, (_, last_key, full) in self._pages.items()
+            if (key[0] is None or key[0] < document) and (not full or document <= last_key)
+        ]
+        for key in stale:
+            del self._pages[key]
+
+    def clear(self):
+        self._pages.clear()
+
+
+def encode_cursor(document: str) -> str:
+    """Opaque pagination cursor for the last document of a page"""
+    return base64.urlsafe_b64encode(document.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a pagination cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        # validate: characters outside the urlsafe alphabet are an error, not skipped
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _name_tokens(record: CustomerRecord) -> set:
+    return set(f"{record.firstname} {record.lastname}".lower().split())
+
+
+def _email_key(email: str) -> str:
+    key = email.lower()
+    # Reuse the record's string when it is already lowercase
+    return email if key == email else key
+
+
+class StripedLock:
+    """
+    Fixed set of re-entrant locks, one picked per key
+
+    Writers to different keys rarely wait for each other; entering the
+    object itself takes every stripe (in order), which stops all writers.
+    """
+
+    def __init__(self, stripes: int = 16):
+        self._locks = [threading.RLock() for _ in range(max(1, stripes))]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def for_key(self, key: str) -> threading.RLock:
+        return self._locks[zlib.crc32(key.encode("utf-8")) % len(self._locks)]
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+class CustomerStore:
+    """
+    Customers keyed by document, with maintained secondary indexes
+
+    Records are kept as CustomerRecord; the API takes and returns dicts.
+
+    Locking: a change to a document runs under that document's stripe
+    (`lock_for(document)`, re-entrant, so callers can hold it around a change
+    and its write-log append), and touches the shared indexes under a short
+    internal lock. Serialization happens outside both. `lock` takes every
+    stripe, for snapshots and bulk loads.
+    """
+
+    # Turns the items of records() into dicts (for snapshots)
+    record_to_dict = staticmethod(CustomerRecord.to_dict)
+
+    def __init__(self, page_cache_size: int = 256, lock_stripes: int = 16):
+        self.lock = StripedLock(lock_stripes)
+        self._index_lock = threading.Lock()
+        self._version = 0
+        self._records: Dict[str, CustomerRecord] = {}
+        self._by_email: Dict[str, str] = {}
+        self._keys = SortedKeyIndex()
+        # Lowercase name word -> sorted documents, plus the sorted distinct words
+        self._by_name: Dict[str, List[str]] = {}
+        self._names = SortedKeyIndex()
+        self._pages = PageCache(page_cache_size)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, document: str) -> bool:
+        return document in self._records
+
+    def lock_for(self, document: str) -> threading.RLock:
+        """Lock serializing the changes to `document`"""
+        return self.lock.for_key(document)
+
+    def load(self, records: Iterable[Dict[str, Any]]):
+        """
+        Replace the contents and rebuild every index in bulk
+
+        Args:
+            records: Customer dicts in write order; a later record for the
+                same document replaces the earlier one, a removal marker
+                (see persistence.replay) drops it
+        """
+        loaded: Dict[str, CustomerRecord] = {}
+        for data in records:
+            if data.get(REMOVED):
+                loaded.pop(data["document"], None)
+            else:
+                loaded[data["document"]] = CustomerRecord.from_dict(data)
+        keys = SortedKeyIndex()
+        keys.build(loaded.keys())
+        by_name: Dict[str, List[str]] = {}
+        for document in keys.iter_from():
+            for token in _name_tokens(loaded[document]):
+                by_name.setdefault(token, []).append(document)
+        names = SortedKeyIndex()
+        names.build(by_name.keys())
+        by_email = {_email_key(record.email): document for document, record in loaded.items()}
+
+        with self.lock, self._index_lock:
+            self._records = loaded
+            self._by_email = by_email
+            self._keys = keys
+            self._by_name = by_name
+            self._names = names
+            self._pages.clear()
+            self._version += 1
+
+    def values(self) -> List[Dict[str, Any]]:
+        """Snapshot of every customer"""
+        return [record.to_dict() for record in self.records()]
+
+    def records(self) -> List[CustomerRecord]:
+        """Snapshot of every record (records are immutable, so this only copies references)"""
+        with self._index_lock:
+            return list(self._records.values())
+
+    def get(self, document: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(document)
+        return record.to_dict() if record is not None else None
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._index_lock:
+            document = self._by_email.get(email.lower())
+            record = self._records.get(document) if document is not None else None
+        return record.to_dict() if record is not None else None
+
+    def email_owner(self, email: str) -> Optional[str]:
+        """Document of the customer using `email`, if any"""
+        return self._by_email.get(email.lower())
+
+    def _index(self, record: CustomerRecord):
+        document = record.document
+        self._by_email[_email_key(record.email)] = document
+        for token in _name_tokens(record):
+            documents = self._by_name.get(token)
+            if documents is None:
+                self._by_name[token] = [document]
+                self._names.add(token)
+            else:
+                insort(documents, document)
+
+    def _unindex(self, record: CustomerRecord):
+        document = record.document
+        if self._by_email.get(record.email.lower()) == document:
+            del self._by_email[record.email.lower()]
+        for token in _name_tokens(record):
+            documents = self._by_name.get(token, [])
+            position = bisect_left(documents, document)
+            if position < len(documents) and documents[position] == document:
+                del documents[position]
+            if not documents:
+                self._by_name.pop(token, None)
+                self._names.discard(token)
+
+    def create(self, data: Dict[str, Any]) -> bool:
+        """
+        Insert a new customer
+
+        Returns:
+            False if the document or the email is already taken
+        """
+        document = data["document"]
+        record = CustomerRecord.from_dict(data)
+        with self.lock_for(document):
+            if document in self._records:
+                return False
+            with self._index_lock:
+                if self.email_owner(record.email) is not None:
+                    return False
+                self._records[document] = record
+                self._keys.add(document)
+                self._index(record)
+                self._pages.invalidate(document)
+                self._version += 1
+            return True
+
+    def update(self, document: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply field changes to a customer
+
+        Returns:
+            The updated customer, or None if the customer does not exist
+
+        Raises:
+            ValueError: If the new email belongs to another customer
+        """
+        with self.lock_for(document):
+            current = self._records.get(document)
+            if current is None:
+                return None
+            updated = {**current.to_dict(), **changes}
+            record = CustomerRecord.from_dict(updated)
+            with self._index_lock:
+                if "email" in changes:
+                    owner = self.email_owner(changes["email"])
+                    if owner is not None and owner != document:
+                        raise ValueError(f"Email {changes['email']} already used by another customer")
+                self._unindex(current)
+                self._records[document] = record
+                self._index(record)
+                self._pages.invalidate(document)
+                self._version += 1
+            return updated
+
+    def put_if_newer(self, data: Dict[str, Any]) -> bool:
+        """
+        Insert a customer, or replace it if `data` was updated later (cluster handoff)
+
+        Returns:
+            False if the stored customer is as recent or more
+
+        Raises:
+            ValueError: If the email belongs to another customer
+        """
+        document = data["document"]
+        record = CustomerRecord.from_dict(data)
+        with self.lock_for(document):
+            current = self._records.get(document)
+            if current is not None and _unpack_time(current.updated_at) >= data["updated_at"]:
+                return False
+            with self._index_lock:
+                owner = self.email_owner(record.email)
+                if owner is not None and owner != document:
+                    raise ValueError(f"Email {record.email} already used by another customer")
+                if current is None:
+                    self._keys.add(document)
+                else:
+                    self._unindex(current)
+                self._records[document] = record
+                self._index(record)
+                self._pages.invalidate(document)
+                self._version += 1
+            return True
+
+    def remove(self, document: str) -> bool:
+        """
+        Delete a customer
+
+        Returns:
+            False if the customer does not exist
+        """
+        with self.lock_for(document):
+            with self._index_lock:
+                record = self._records.pop(document, None)
+                if record is None:
+                    return False
+                self._keys.discard(document)
+                self._unindex(record)
+                self._pages.invalidate(document)
+                self._version += 1
+            return True
+
+    def page(self, after: Optional[str], limit: int) -> Tuple[bytes, Optional[str]]:
+        """
+        One page of customers in document order, serialized as a JSON array
+
+        Args:
+            after: Last document of the previous page (None for the first page)
+            limit: Page size
+
+        Returns:
+            Tuple of (JSON body, last document of the page if more may follow)
+        """
+        with self._index_lock:
+            cached = self._pages.get(after, limit)
+            if cached is not None:
+                return cached
+            version = self._version
+            documents = list(islice(self._keys.iter_from(after, inclusive=after is None), limit))
+            records = [self._records[document] for document in documents]
+
+        body = json.dumps([record.to_dict() for record in records]).encode("utf-8")
+        full = len(documents) == limit
+        with self._index_lock:
+            # A write while serializing may have changed this page: don't cache it
+            if self._version == version:
+                self._pages.put(after, limit, body, documents[-1] if documents else after, full)
+        return body, documents[-1] if full else None
+
+    def search_by_name(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Customers whose first or last name has a word starting with `prefix`
+
+        Args:
+            prefix: Case-insensitive name prefix
+            limit: Maximum number of customers
+
+        Returns:
+            Matching customers, ordered by matching word then document
+        """
+        prefix = prefix.lower()
+        found: Dict[str, CustomerRecord] = {}
+        with self._index_lock:
+            for token in self._names.iter_from(prefix):
+                if not token.startswith(prefix) or len(found) == limit:
+                    break
+                for document in self._by_name[token]:
+                    if len(found) == limit:
+                        break
+                    found.setdefault(document, self._records[document])
+        return [record.to_dict() for record in found.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store statistics for monitoring"""
+        return {
+            "customers": len(self._records),
+            "lock_stripes": len(self.lock),
+            "emails_indexed": len(self._by_email),
+            "name_words_indexed": len(self._names),
+            "page_cache_hits": self._pages.hits,
+            "page_cache_misses": self._pages.misses,
+        }
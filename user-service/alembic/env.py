@@ -11,13 +11,19 @@ import sys
 # Add the app directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from app.core.config import settings
 from app.core.database import Base
 from app.models.customer import Customer
+from app.models.outbox import OutboxEvent
+from app.models.tombstone import CustomerFeedHorizon, CustomerTombstone
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# Use the same database as the application
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -0,0 +1,57 @@
+"""initial schema: customer and customer_outbox
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'customer',
+        sa.Column('document', sa.String(length=50), nullable=False),
+        sa.Column('firstname', sa.String(length=100), nullable=False),
+        sa.Column('lastname', sa.String(length=100), nullable=False),
+        sa.Column('address', sa.String(length=500), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('document'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table(
+        'customer_outbox',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('aggregate_id', sa.String(length=50), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.String(length=500), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_customer_outbox_pending', 'customer_outbox', ['id'],
+        postgresql_where=sa.text('dispatched_at IS NULL')
+    )
+    op.create_index('ix_customer_outbox_aggregate_id', 'customer_outbox', ['aggregate_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_outbox_aggregate_id', table_name='customer_outbox')
+    op.drop_index('ix_customer_outbox_pending', table_name='customer_outbox')
+    op.drop_table('customer_outbox')
+    op.drop_table('customer')
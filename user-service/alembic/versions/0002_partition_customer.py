@@ -0,0 +1,28 @@
+"""hash-partition customer on document (moved to 0005)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 14:00:00.000000
+
+Partitioning used to happen here, in the middle of the history, so a
+database already at head could only be partitioned by downgrading past
+0003, which drops customer_tombstone. It now runs in revision 0005, at the
+head. This revision is kept, empty, so databases stamped with it stay valid;
+a table it already partitioned is left alone by 0005 and turned back into
+the plain layout by 0005's downgrade.
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,33 @@
+"""customer change feed: updated_at index and tombstones
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_customer_updated_at', 'customer', ['updated_at', 'document'])
+    op.create_table(
+        'customer_tombstone',
+        sa.Column('document', sa.String(length=50), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('document')
+    )
+    op.create_index('ix_customer_tombstone_deleted_at', 'customer_tombstone', ['deleted_at', 'document'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_tombstone_deleted_at', table_name='customer_tombstone')
+    op.drop_table('customer_tombstone')
+    op.drop_index('ix_customer_updated_at', table_name='customer')
@@ -0,0 +1,67 @@
+"""customer change feed: order by writing transaction id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00.000000
+
+updated_at/deleted_at are the transaction start time, so a transaction that
+commits later than CHANGES_SAFETY_LAG after it started lands behind cursors
+already handed out. customer and customer_tombstone get a change_seq column
+with the id of the transaction that last wrote the row (stamped by default
+and by a BEFORE UPDATE trigger); the feed only returns rows whose
+transaction is below the snapshot xmin, i.e. already finished, so nothing
+can commit behind the cursor. Requires PostgreSQL 13 (pg_current_xact_id).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+TABLES = ('customer', 'customer_tombstone')
+
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(f"""
+        CREATE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := {CURRENT_XID};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        # Existing rows all belong to finished transactions: 0 keeps them first
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+        op.alter_column(table, 'change_seq', server_default=sa.text(CURRENT_XID))
+        op.execute(
+            f"CREATE TRIGGER {table}_change_seq BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()"
+        )
+    op.create_index('ix_customer_change_seq', 'customer', ['change_seq', 'document'])
+    op.create_index('ix_customer_tombstone_change_seq', 'customer_tombstone', ['change_seq', 'document'])
+    op.drop_index('ix_customer_updated_at', table_name='customer')
+    op.drop_index('ix_customer_tombstone_deleted_at', table_name='customer_tombstone')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.create_index('ix_customer_tombstone_deleted_at', 'customer_tombstone', ['deleted_at', 'document'])
+    op.create_index('ix_customer_updated_at', 'customer', ['updated_at', 'document'])
+    op.drop_index('ix_customer_tombstone_change_seq', table_name='customer_tombstone')
+    op.drop_index('ix_customer_change_seq', table_name='customer')
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_change_seq ON {table}")
+        op.drop_column(table, 'change_seq')
+    op.execute("DROP FUNCTION stamp_change_seq()")
@@ -0,0 +1,175 @@
+"""hash-partition customer on document
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00.000000
+
+Replaces the customer table with one hash-partitioned on document
+(CUSTOMER_PARTITIONS partitions, 16 by default). PostgreSQL cannot enforce a
+unique index that does not contain the partition key, so global email
+uniqueness moves to the customer_email table (email -> document), kept in
+sync by triggers on customer. The new table gets everything the plain one
+has at this point: change_seq with its default, values and BEFORE UPDATE
+trigger (revision 0004) and the (change_seq, document) index, so change
+feed cursors stay valid. The previous table is kept as customer_legacy
+until it is dropped manually.
+
+Opt-in: the tables are only replaced when CUSTOMER_PARTITIONED=true while
+migrating; otherwise the revision is a no-op and customer keeps its plain
+layout with the email unique index. Being the head, it also partitions a
+database that is already fully migrated: run `alembic downgrade 0004` and
+`CUSTOMER_PARTITIONED=true alembic upgrade head`. Run with the service
+stopped: existing rows are copied in one transaction.
+"""
+import os
+from typing import Optional
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+PARTITIONS = int(os.getenv("CUSTOMER_PARTITIONS", "16"))
+ENABLED = os.getenv("CUSTOMER_PARTITIONED", "false").lower() == "true"
+
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+COLUMNS = "document, firstname, lastname, address, phone, email, created_at, updated_at, change_seq"
+
+
+def _is_partitioned() -> Optional[bool]:
+    # Offline (--sql) scripts cannot look: they assume the table needs the change
+    if context.is_offline_mode():
+        return None
+    relkind = op.get_bind().exec_driver_sql(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('customer')"
+    ).scalar()
+    return relkind == "p"
+
+
+def _stamp_change_seq_on_update():
+    op.execute(
+        "CREATE TRIGGER customer_change_seq BEFORE UPDATE ON customer "
+        "FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()"
+    )
+    op.execute("CREATE INDEX ix_customer_change_seq ON customer (change_seq, document)")
+
+
+def upgrade() -> None:
+    # Databases partitioned by the former revision 0002 are already done
+    if op.get_bind().dialect.name != "postgresql" or not ENABLED or _is_partitioned() is True:
+        return
+
+    op.execute(f"""
+        CREATE TABLE customer_partitioned (
+            document varchar(50) NOT NULL,
+            firstname varchar(100) NOT NULL,
+            lastname varchar(100) NOT NULL,
+            address varchar(500) NOT NULL,
+            phone varchar(20) NOT NULL,
+            email varchar(100) NOT NULL,
+            created_at timestamptz DEFAULT now(),
+            updated_at timestamptz DEFAULT now(),
+            change_seq bigint NOT NULL DEFAULT {CURRENT_XID},
+            CONSTRAINT customer_partitioned_pkey PRIMARY KEY (document)
+        ) PARTITION BY HASH (document)
+    """)
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE customer_p{remainder:02d} PARTITION OF customer_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+    op.execute("""
+        CREATE TABLE customer_email (
+            email varchar(100) PRIMARY KEY,
+            document varchar(50) NOT NULL
+        )
+    """)
+
+    # change_seq is copied as is: feed cursors keep pointing at the same rows
+    op.execute(f"INSERT INTO customer_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM customer")
+    op.execute("INSERT INTO customer_email (email, document) SELECT email, document FROM customer")
+
+    op.execute("ALTER TABLE customer RENAME TO customer_legacy")
+    op.execute("ALTER TABLE customer_legacy RENAME CONSTRAINT customer_pkey TO customer_legacy_pkey")
+    op.execute("ALTER TABLE customer_legacy RENAME CONSTRAINT customer_email_key TO customer_legacy_email_key")
+    op.execute("ALTER INDEX ix_customer_change_seq RENAME TO ix_customer_legacy_change_seq")
+    op.execute("ALTER TABLE customer_partitioned RENAME TO customer")
+    op.execute("ALTER TABLE customer RENAME CONSTRAINT customer_partitioned_pkey TO customer_pkey")
+    _stamp_change_seq_on_update()
+
+    # A duplicate email fails the customer_email insert, which aborts the
+    # statement on customer exactly like the old unique constraint did
+    op.execute("""
+        CREATE FUNCTION customer_email_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO customer_email (email, document) VALUES (NEW.email, NEW.document);
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF NEW.email IS DISTINCT FROM OLD.email OR NEW.document IS DISTINCT FROM OLD.document THEN
+                    DELETE FROM customer_email WHERE email = OLD.email;
+                    INSERT INTO customer_email (email, document) VALUES (NEW.email, NEW.document);
+                END IF;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM customer_email WHERE email = OLD.email;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER customer_email_sync
+        AFTER INSERT OR UPDATE OF email, document OR DELETE ON customer
+        FOR EACH ROW EXECUTE FUNCTION customer_email_sync()
+    """)
+    op.execute("""
+        CREATE FUNCTION customer_email_truncate() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE customer_email;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER customer_email_truncate
+        AFTER TRUNCATE ON customer
+        FOR EACH STATEMENT EXECUTE FUNCTION customer_email_truncate()
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql" or _is_partitioned() is False:
+        return
+
+    op.execute(f"""
+        CREATE TABLE customer_plain (
+            document varchar(50) NOT NULL,
+            firstname varchar(100) NOT NULL,
+            lastname varchar(100) NOT NULL,
+            address varchar(500) NOT NULL,
+            phone varchar(20) NOT NULL,
+            email varchar(100) NOT NULL,
+            created_at timestamptz DEFAULT now(),
+            updated_at timestamptz DEFAULT now(),
+            change_seq bigint NOT NULL DEFAULT {CURRENT_XID},
+            CONSTRAINT customer_plain_pkey PRIMARY KEY (document),
+            CONSTRAINT customer_plain_email_key UNIQUE (email)
+        )
+    """)
+    op.execute(f"INSERT INTO customer_plain ({COLUMNS}) SELECT {COLUMNS} FROM customer")
+
+    op.execute("DROP TABLE customer")
+    op.execute("DROP FUNCTION customer_email_sync()")
+    op.execute("DROP FUNCTION customer_email_truncate()")
+    op.execute("DROP TABLE customer_email")
+    op.execute("DROP TABLE IF EXISTS customer_legacy")
+
+    op.execute("ALTER TABLE customer_plain RENAME TO customer")
+    op.execute("ALTER TABLE customer RENAME CONSTRAINT customer_plain_pkey TO customer_pkey")
+    op.execute("ALTER TABLE customer RENAME CONSTRAINT customer_plain_email_key TO customer_email_key")
+    _stamp_change_seq_on_update()
@@ -0,0 +1,39 @@
+"""customer tombstone retention: purge by age behind a feed horizon
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+
+Tombstones are purged after CUSTOMER_TOMBSTONE_RETENTION_DAYS, by
+deleted_at (indexed again for it). customer_feed_horizon keeps the newest
+(change_seq, document) position purged; the change feed refuses cursors
+behind it, since they may have missed deletions.
+
+The downgrade keeps customer_feed_horizon: going down and back up (say, to
+partition customer with 0005) must not let stale cursors through again.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_customer_tombstone_deleted_at', 'customer_tombstone', ['deleted_at'])
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS customer_feed_horizon (
+            id integer NOT NULL,
+            change_seq bigint NOT NULL,
+            document varchar(50) NOT NULL,
+            purged_at timestamptz DEFAULT now() NOT NULL,
+            CONSTRAINT customer_feed_horizon_pkey PRIMARY KEY (id)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_tombstone_deleted_at', table_name='customer_tombstone')
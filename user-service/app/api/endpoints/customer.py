@@ -1,20 +1,27 @@
 """
 Customer API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
+import base64
+import binascii
 import logging
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.crud.customer import customer_crud
+from app.services.group_commit import group_committer
+from app.services.customer_cache import customer_cache
 from app.schemas.customer import (
     CustomerCreateDTO,
     CustomerCreateResponseDTO,
     CustomerUpdateDTO,
     CustomerUpdateResponseDTO,
     CustomerFindResponseDTO,
-    CustomerResponseDTO
+    CustomerResponseDTO,
+    CustomerChangeDTO,
+    CustomerChangesResponseDTO
 )
 
 logger = logging.getLogger(__name__)
@@ -23,6 +30,44 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _encode_cursor(change_seq: int, document: str) -> str:
+    """Opaque change feed cursor for a (change_seq, document) position"""
+    raw = f"{change_seq}|{document}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Decode a change feed cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        # Strict: characters outside the urlsafe alphabet are an error, not skipped
+        raw = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+        change_seq, document = raw.split("|", 1)
+        return int(change_seq), document
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _customer_dict(customer) -> Optional[dict]:
+    """JSON-ready customer fields, as kept by the customer cache"""
+    if customer is None:
+        return None
+    return {
+        "document": customer.document,
+        "firstname": customer.firstname,
+        "lastname": customer.lastname,
+        "address": customer.address,
+        "phone": customer.phone,
+        "email": customer.email,
+        "created_at": customer.created_at.isoformat() if customer.created_at else None,
+        "updated_at": customer.updated_at.isoformat() if customer.updated_at else None
+    }
+
+
 @router.post("/createcustomer")
 async def create_customer(customer_data: dict, db: Session = Depends(get_db)):
     """
@@ -42,7 +87,7 @@ async def create_customer(customer_data: dict, db: Session = Depends(get_db)):
                 )
         
         # Check if customer already exists by document
-        existing_customer = customer_crud.get_customer_by_id(db, customer_data['document'])
+        existing_customer = customer_crud.get_customer_row_by_id(db, customer_data['document'])
         if existing_customer:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -50,15 +95,18 @@ async def create_customer(customer_data: dict, db: Session = Depends(get_db)):
             )
         
         # Check if email already exists
-        existing_email = customer_crud.get_customer_by_email(db, customer_data['email'])
+        existing_email = customer_crud.get_customer_row_by_email(db, customer_data['email'])
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Customer with email {customer_data['email']} already exists"
             )
         
-        # Create the customer
-        new_customer = customer_crud.create_customer(db, customer_data)
+        # Create the customer, in a shared transaction when group commit is on
+        if group_committer.running:
+            new_customer = await group_committer.create_customer(customer_data)
+        else:
+            new_customer = customer_crud.create_customer(db, customer_data)
         
         # Verify creation was successful
         if not new_customer:
@@ -107,8 +155,11 @@ async def find_customer_by_id(
     try:
         logger.info(f"Finding customer with ID: {customerid}")
         
-        # Get customer using CRUD
-        customer = customer_crud.get_customer_by_id(db, customerid)
+        # Cached customer, or plain row from the Core fast path on a miss
+        customer = await customer_cache.get(
+            lambda: _customer_dict(customer_crud.get_customer_row_by_id(db, customerid)),
+            document=customerid
+        )
         
         if not customer:
             logger.warning(f"Customer not found: {customerid}")
@@ -119,12 +170,12 @@ async def find_customer_by_id(
         
         logger.info(f"Customer found: {customerid}")
         return CustomerFindResponseDTO(
-            document=customer.document,
-            firstname=customer.firstname,
-            lastname=customer.lastname,
-            address=customer.address,
-            phone=customer.phone,
-            email=customer.email
+            document=customer["document"],
+            firstname=customer["firstname"],
+            lastname=customer["lastname"],
+            address=customer["address"],
+            phone=customer["phone"],
+            email=customer["email"]
         )
         
     except HTTPException:
@@ -161,6 +212,7 @@ async def update_customer(
         updated_customer = customer_crud.update_customer(db, customerid, customer)
         
         if updated_customer:
+            await customer_cache.invalidate(customerid)
             logger.info(f"Customer updated successfully: {customerid}")
             return CustomerUpdateResponseDTO(updateCustomerValid=True)
         else:
@@ -197,6 +249,7 @@ async def delete_customer(
         deleted = customer_crud.delete_customer(db, customerid)
         
         if deleted:
+            await customer_cache.invalidate(customerid)
             logger.info(f"Customer deleted successfully: {customerid}")
             return {"message": f"Customer {customerid} deleted successfully"}
         else:
@@ -280,7 +333,12 @@ async def get_customer_by_email(
     try:
         logger.info(f"Finding customer by email: {email}")
         
-        customer = customer_crud.get_customer_by_email(db, email)
+        # Cached customer, or plain row from the Core fast path on a miss,
+        # validated into the response model
+        customer = await customer_cache.get(
+            lambda: _customer_dict(customer_crud.get_customer_row_by_email(db, email)),
+            email=email
+        )
         
         if not customer:
             logger.warning(f"Customer not found by email: {email}")
@@ -301,3 +359,75 @@ async def get_customer_by_email(
             detail="Internal server error"
         )
 
+
+@router.get("/changes", response_model=CustomerChangesResponseDTO)
+async def get_customer_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Get customers created, updated or deleted after a cursor
+
+    Start without `since` for a full sync, then keep passing `next_cursor`.
+    Changes are returned once the transaction that wrote them has finished,
+    ordered by transaction id, so a cursor never skips a late commit.
+    Deletions are kept for CUSTOMER_TOMBSTONE_RETENTION_DAYS: a cursor
+    behind purged ones gets 410 and the consumer must start over.
+
+    Args:
+        since: Cursor returned by a previous call
+        limit: Maximum number of changes (capped at CHANGES_MAX_LIMIT)
+        db: Database session
+
+    Returns:
+        Page of changes with the cursor to resume from
+    """
+    try:
+        after = _decode_cursor(since) if since else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        limit = min(limit, settings.CHANGES_MAX_LIMIT)
+        rows = customer_crud.get_changes(db, after, limit)
+        # Checked after reading: a purge that ran before the read moved the horizon
+        if after is not None and customer_crud.is_behind_feed_horizon(db, after):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Cursor predates purged deletions; resync without since"
+            )
+
+        changes = [
+            CustomerChangeDTO(
+                op=row.op,
+                document=row.document,
+                changed_at=row.changed_at,
+                customer=CustomerFindResponseDTO(
+                    document=row.document,
+                    firstname=row.firstname,
+                    lastname=row.lastname,
+                    address=row.address,
+                    phone=row.phone,
+                    email=row.email
+                ) if row.op == "upsert" else None
+            )
+            for row in rows
+        ]
+
+        if rows:
+            next_cursor = _encode_cursor(rows[-1].change_seq, rows[-1].document)
+        else:
+            next_cursor = since
+
+        logger.info(f"Returning {len(changes)} customer changes")
+        return CustomerChangesResponseDTO(changes=changes, next_cursor=next_cursor, has_more=len(rows) == limit)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_customer_changes endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
@@ -0,0 +1,89 @@
+"""
+Customer event stream endpoints
+"""
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+
+from app.core.config import settings
+from app.services.change_stream import change_stream
+
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter()
+
+
+def _format_event(event: Dict[str, Any]) -> str:
+    """Format an outbox message as a Server-Sent Event"""
+    return f"id: {event['event_id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/events/stream")
+async def stream_customer_events(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream customer create/update/delete events as Server-Sent Events
+
+    Browsers resume automatically through the Last-Event-ID header; other
+    clients can pass `last_event_id`. A client that cannot keep up receives
+    an `overflow` event and is disconnected, and should reconnect with the
+    last id it processed. A `reset` event means the position is too old to
+    resume and the client should resync through /customer/changes.
+
+    Args:
+        request: Incoming request
+        last_event_id: Id of the last event received (query parameter)
+        last_event_id_header: Id of the last event received (SSE header)
+
+    Returns:
+        text/event-stream response
+    """
+    if not settings.CHANGE_STREAM_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Change stream is disabled")
+
+    resume_from = last_event_id_header or last_event_id
+    try:
+        resume_id = int(resume_from) if resume_from else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid event id: {resume_from}")
+
+    subscriber, replay, position_lost = await change_stream.subscribe(resume_id)
+    logger.info(f"Change stream subscriber connected (resume from {resume_id})")
+
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            if position_lost:
+                yield f"event: reset\ndata: {json.dumps({'since': resume_id})}\n\n"
+            for event in replay:
+                yield _format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.CHANGE_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    if subscriber.overflowed:
+                        yield "event: overflow\ndata: {}\n\n"
+                    return
+                yield _format_event(event)
+        finally:
+            change_stream.unsubscribe(subscriber)
+            logger.info("Change stream subscriber disconnected")
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
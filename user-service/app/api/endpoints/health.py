@@ -1,14 +1,19 @@
 """
 Health check endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db, check_database_connection
+from fastapi import APIRouter, HTTPException, status
 from app.core.config import settings
+from app.core.startup import startup_state
+from app.services.health_monitor import health_monitor
+from app.services.service_client import service_client
+from app.utils.rate_limited_log import RateLimitedLogger
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Probes arrive every few seconds from several sources; log them sparingly
+probe_logger = RateLimitedLogger(logger, settings.PROBE_LOG_INTERVAL)
+
 # Create router
 router = APIRouter()
 
@@ -19,58 +24,49 @@ async def health_check():
     Basic health check endpoint
     Returns service status
     """
-    try:
-        logger.info("Health check requested")
-        return {
-            "status": "healthy",
-            "service": settings.SERVICE_NAME,
-            "version": settings.VERSION,
-            "message": "User Service is running"
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Service unhealthy"
-        )
+    probe_logger.info("health", "Health check requested")
+    return {
+        "status": "healthy",
+        "service": settings.SERVICE_NAME,
+        "version": settings.VERSION,
+        "message": "User Service is running"
+    }
 
 
 @router.get("/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check():
     """
     Readiness check endpoint
     Verifies that the service is ready to accept requests
-    Checks database connectivity
+    Answered from the background health snapshot (no I/O per probe)
     """
-    try:
-        logger.info("Readiness check requested")
-        
-        # Check database connection
-        db_healthy = check_database_connection()
-        
-        if db_healthy:
-            logger.info("Service is ready")
-            return {
-                "status": "ready",
-                "service": settings.SERVICE_NAME,
-                "database": "connected",
-                "message": "Service is ready to accept requests"
-            }
+    probe_logger.info("ready", "Readiness check requested")
+    snapshot = health_monitor.snapshot()
+    
+    if not health_monitor.is_ready():
+        if not startup_state.ready:
+            reason = startup_state.error or "warming up"
+        elif not snapshot.get("database"):
+            reason = "health snapshot not available yet"
+        elif snapshot["database"]["status"] != "connected":
+            reason = "database connection failed"
         else:
-            logger.warning("Service not ready - database connection failed")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Service not ready - database connection failed"
-            )
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Readiness check failed: {e}")
+            reason = "health snapshot is stale"
+        probe_logger.warning("not-ready", f"Service not ready - {reason}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Service not ready"
+            detail=f"Service not ready - {reason}"
         )
+    
+    return {
+        "status": "ready",
+        "service": settings.SERVICE_NAME,
+        "database": snapshot["database"]["status"],
+        "pool": snapshot["pool"],
+        "dependencies": snapshot["dependencies"],
+        "snapshot_age_seconds": snapshot["age_seconds"],
+        "message": "Service is ready to accept requests"
+    }
 
 
 @router.get("/live")
@@ -79,17 +75,34 @@ async def liveness_check():
     Liveness check endpoint
     Verifies that the service is alive and running
     """
-    try:
-        logger.info("Liveness check requested")
-        return {
-            "status": "alive",
-            "service": settings.SERVICE_NAME,
-            "message": "Service is alive and running"
-        }
-    except Exception as e:
-        logger.error(f"Liveness check failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Service not alive"
-        )
+    probe_logger.info("live", "Liveness check requested")
+    return {
+        "status": "alive",
+        "service": settings.SERVICE_NAME,
+        "loop_lag_ms": health_monitor.snapshot().get("loop_lag_ms"),
+        "message": "Service is alive and running"
+    }
 
+
+@router.get("/circuit-breakers")
+async def circuit_breaker_status():
+    """
+    Circuit breaker endpoint
+    Exposes breaker state, retry budget and latency per downstream service
+    """
+    return {
+        "service": settings.SERVICE_NAME,
+        "dependencies": service_client.get_circuit_breaker_states()
+    }
+
+
+@router.get("/dependencies")
+async def dependency_health():
+    """
+    Dependency health endpoint
+    Returns the background-refreshed dependency snapshot without doing any I/O
+    """
+    return {
+        "service": settings.SERVICE_NAME,
+        **service_client.get_dependency_snapshot()
+    }
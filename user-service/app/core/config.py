@@ -19,9 +19,45 @@ class Settings:
     SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", "8000"))
     SERVICE_HOST: str = os.getenv("SERVICE_HOST", "0.0.0.0")
     
+    # Production serving (gunicorn.conf.py); 0 means one worker per CPU
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    # Set by gunicorn.conf.py: the master creates the tables and registers
+    # with Consul, so workers skip both
+    GUNICORN_MASTER: bool = os.getenv("GUNICORN_MASTER", "false").lower() == "true"
+    # Lock electing the worker that runs service-wide jobs (outbox, TTL heartbeat)
+    WORKER_LEADER_LOCK: str = os.getenv("WORKER_LEADER_LOCK", "/tmp/user-service-leader.lock")
+    WORKER_LEADER_RETRY: float = float(os.getenv("WORKER_LEADER_RETRY", "5"))  # seconds
+    
+    # Database pool settings
+    # When DB_CONNECTION_BUDGET is set, it is split evenly across workers,
+    # after reserving each worker's change stream LISTEN connection
+    DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Recent checkouts kept for the pool hold-time percentiles in /health
+    DB_POOL_HOLD_WINDOW: int = int(os.getenv("DB_POOL_HOLD_WINDOW", "1000"))
+    
+    # Hash-partitioned customer table (alembic revision 0005, applied only
+    # when this is true while migrating). At startup the service detects the
+    # actual layout and overrides this; email lookups on the partitioned
+    # layout go through the customer_email table
+    CUSTOMER_PARTITIONED: bool = os.getenv("CUSTOMER_PARTITIONED", "false").lower() == "true"
+    
+    # Change feed (/customer/changes)
+    CHANGES_MAX_LIMIT: int = int(os.getenv("CHANGES_MAX_LIMIT", "1000"))
+    # Deletion tombstones older than this are purged (0 keeps them); feed
+    # cursors behind a purged one get 410 and must resync
+    CUSTOMER_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv("CUSTOMER_TOMBSTONE_RETENTION_DAYS", "30"))
+    
     # Consul configuration
     CONSUL_HOST: str = os.getenv("CONSUL_HOST", "consul")
     CONSUL_PORT: int = int(os.getenv("CONSUL_PORT", "8500"))
+    CONSUL_REQUEST_TIMEOUT: float = float(os.getenv("CONSUL_REQUEST_TIMEOUT", "5"))  # seconds
+    # "http": Consul polls /health; "ttl": the service pushes heartbeats
+    CONSUL_CHECK_MODE: str = os.getenv("CONSUL_CHECK_MODE", "http").lower()
+    CONSUL_TTL_SECONDS: int = int(os.getenv("CONSUL_TTL_SECONDS", "15"))
+    CONSUL_LOOP_LAG_WARNING_MS: float = float(os.getenv("CONSUL_LOOP_LAG_WARNING_MS", "200"))
+    CONSUL_LOOP_LAG_CRITICAL_MS: float = float(os.getenv("CONSUL_LOOP_LAG_CRITICAL_MS", "1000"))
     
     # API configuration
     API_V1_STR: str = "/api/v1"
@@ -40,10 +76,112 @@ class Settings:
     
     # Health check settings
     HEALTH_CHECK_INTERVAL: int = 30  # seconds
-    
+    HEALTH_SNAPSHOT_INTERVAL: float = float(os.getenv("HEALTH_SNAPSHOT_INTERVAL", "5"))  # seconds
+    HEALTH_SNAPSHOT_MAX_AGE: float = float(os.getenv("HEALTH_SNAPSHOT_MAX_AGE", "30"))  # seconds
+    PROBE_LOG_INTERVAL: float = float(os.getenv("PROBE_LOG_INTERVAL", "60"))  # seconds
+
+    # Inter-service client settings
+    SERVICE_CLIENT_TIMEOUT: float = float(os.getenv("SERVICE_CLIENT_TIMEOUT", "5"))  # seconds
+    SERVICE_CLIENT_MAX_RETRIES: int = int(os.getenv("SERVICE_CLIENT_MAX_RETRIES", "2"))
+    SERVICE_CLIENT_BACKOFF_BASE: float = float(os.getenv("SERVICE_CLIENT_BACKOFF_BASE", "0.1"))  # seconds
+    SERVICE_CLIENT_BACKOFF_MAX: float = float(os.getenv("SERVICE_CLIENT_BACKOFF_MAX", "2"))  # seconds
+
+    # Circuit breaker settings
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_TIMEOUT", "30"))  # seconds
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+
+    # Retry budget settings (token bucket per service)
+    RETRY_BUDGET_CAPACITY: float = float(os.getenv("RETRY_BUDGET_CAPACITY", "10"))
+    RETRY_BUDGET_REFILL_RATE: float = float(os.getenv("RETRY_BUDGET_REFILL_RATE", "1"))  # tokens per second
+
+    # Hedged request settings (idempotent GETs only)
+    HEDGE_REQUESTS_ENABLED: bool = os.getenv("HEDGE_REQUESTS_ENABLED", "true").lower() == "true"
+    HEDGE_DEFAULT_DELAY: float = float(os.getenv("HEDGE_DEFAULT_DELAY", "0.5"))  # seconds
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))  # seconds
+    HEDGE_LATENCY_WINDOW: int = int(os.getenv("HEDGE_LATENCY_WINDOW", "200"))  # samples
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+    # Dependency health check settings
+    DEPENDENCY_SERVICES: list = os.getenv("DEPENDENCY_SERVICES", "login-service,order-service").split(",")
+    DEPENDENCY_HEALTH_TIMEOUT: float = float(os.getenv("DEPENDENCY_HEALTH_TIMEOUT", "2"))  # seconds
+    DEPENDENCY_HEALTH_CACHE_TTL: float = float(os.getenv("DEPENDENCY_HEALTH_CACHE_TTL", "10"))  # seconds
+    DEPENDENCY_HEALTH_REFRESH_INTERVAL: float = float(os.getenv("DEPENDENCY_HEALTH_REFRESH_INTERVAL", "10"))  # seconds
+
+    # Auth token validation cache settings
+    AUTH_CACHE_ENABLED: bool = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+    AUTH_CACHE_MAX_TTL: float = float(os.getenv("AUTH_CACHE_MAX_TTL", "60"))  # seconds
+    AUTH_CACHE_NEGATIVE_TTL: float = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "5"))  # seconds
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+    # Transactional outbox settings (order-service notifications)
+    # Off until order-service serves OUTBOX_BULK_ENDPOINT
+    OUTBOX_ENABLED: bool = os.getenv("OUTBOX_ENABLED", "false").lower() == "true"
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_FLUSH_INTERVAL_MS: int = int(os.getenv("OUTBOX_FLUSH_INTERVAL_MS", "200"))
+    OUTBOX_RETRY_BASE_DELAY: float = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "1"))  # seconds
+    OUTBOX_RETRY_MAX_DELAY: float = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "300"))  # seconds
+    OUTBOX_RETENTION_HOURS: int = int(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+    # Undelivered events older than this are dropped
+    OUTBOX_PENDING_RETENTION_HOURS: int = int(os.getenv("OUTBOX_PENDING_RETENTION_HOURS", "72"))
+    # How long a claimed batch stays reserved while it is being sent
+    OUTBOX_CLAIM_TIMEOUT: float = float(os.getenv("OUTBOX_CLAIM_TIMEOUT", "60"))  # seconds
+    OUTBOX_BULK_ENDPOINT: str = os.getenv("OUTBOX_BULK_ENDPOINT", "/notifications/user-events/bulk")
+
+    # Customer change stream (SSE fed by PostgreSQL LISTEN/NOTIFY). Off by
+    # default: it makes every write insert an outbox row and call pg_notify
+    CHANGE_STREAM_ENABLED: bool = os.getenv("CHANGE_STREAM_ENABLED", "false").lower() == "true"
+    CUSTOMER_EVENTS_CHANNEL: str = os.getenv("CUSTOMER_EVENTS_CHANNEL", "customer_events")
+    CHANGE_STREAM_QUEUE_SIZE: int = int(os.getenv("CHANGE_STREAM_QUEUE_SIZE", "1000"))  # events per subscriber
+    CHANGE_STREAM_BUFFER_SIZE: int = int(os.getenv("CHANGE_STREAM_BUFFER_SIZE", "10000"))  # events kept for resume
+    CHANGE_STREAM_HEARTBEAT: float = float(os.getenv("CHANGE_STREAM_HEARTBEAT", "15"))  # seconds
+    # Resuming from the outbox also replays lower-id events created this long
+    # before the client's last event, which may have committed after it
+    CHANGE_STREAM_REPLAY_OVERLAP: float = float(os.getenv("CHANGE_STREAM_REPLAY_OVERLAP", "30"))  # seconds
+
+    # Group commit (opt-in): concurrent customer creations share one transaction,
+    # with a SAVEPOINT per row
+    GROUP_COMMIT_ENABLED: bool = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+    GROUP_COMMIT_WINDOW_MS: float = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2"))
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "100"))
+
+    # Customer lookup cache (opt-in): L1 per worker, L2 in Redis when
+    # CUSTOMER_CACHE_REDIS_URL is set (e.g. redis://:password@redis:6379/1)
+    CUSTOMER_CACHE_ENABLED: bool = os.getenv("CUSTOMER_CACHE_ENABLED", "false").lower() == "true"
+    CUSTOMER_CACHE_L1_TTL: float = float(os.getenv("CUSTOMER_CACHE_L1_TTL", "30"))  # seconds
+    CUSTOMER_CACHE_L2_TTL: int = int(os.getenv("CUSTOMER_CACHE_L2_TTL", "300"))  # seconds
+    CUSTOMER_CACHE_MAX_ENTRIES: int = int(os.getenv("CUSTOMER_CACHE_MAX_ENTRIES", "10000"))
+    CUSTOMER_CACHE_REDIS_URL: str = os.getenv("CUSTOMER_CACHE_REDIS_URL", "")
+    CUSTOMER_CACHE_REDIS_TIMEOUT: float = float(os.getenv("CUSTOMER_CACHE_REDIS_TIMEOUT", "0.5"))  # seconds
+    CUSTOMER_CACHE_CHANNEL: str = os.getenv("CUSTOMER_CACHE_CHANNEL", "customer_cache_invalidations")
+    CUSTOMER_CACHE_LOCK_TTL_MS: int = int(os.getenv("CUSTOMER_CACHE_LOCK_TTL_MS", "2000"))
+
+    # Startup settings
+    # FAST_START verifies the alembic revision instead of running create_all,
+    # warms the pool and registers with Consul in the background
+    FAST_START: bool = os.getenv("FAST_START", "false").lower() == "true"
+    POOL_PREWARM_CONNECTIONS: int = int(os.getenv("POOL_PREWARM_CONNECTIONS", "5"))
+
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
+    @property
+    def db_pool_size(self) -> int:
+        """Pool size per worker process"""
+        if self.DB_CONNECTION_BUDGET:
+            workers = self.WEB_CONCURRENCY or os.cpu_count() or 1
+            # The LISTEN connection is opened outside the pool
+            listen = 1 if self.CHANGE_STREAM_ENABLED else 0
+            return max(1, self.DB_CONNECTION_BUDGET // workers - listen)
+        return self.DB_POOL_SIZE
+    
+    @property
+    def db_max_overflow(self) -> int:
+        """Overflow connections per worker (none when a global budget is set)"""
+        if self.DB_CONNECTION_BUDGET:
+            return 0
+        return self.DB_MAX_OVERFLOW
+    
     @property
     def consul_url(self) -> str:
         """Get Consul URL"""
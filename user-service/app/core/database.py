@@ -1,12 +1,17 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from collections import deque
+from typing import Callable, Generator, TypeVar
 from sqlalchemy import text
+import functools
 import logging
+import os
+import threading
+import time
 
 
 from app.core.config import settings
@@ -16,6 +21,8 @@ engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
     echo=False  # Set to True for SQL query logging
 )
 
@@ -29,11 +36,69 @@ Base = declarative_base()
 logger = logging.getLogger(__name__)
 
 
+class PoolHoldTimes:
+    """
+    How long connections stay checked out of the pool (checkout to checkin)
+
+    Keeps the most recent samples for percentiles plus running totals.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def summary(self) -> dict:
+        """Hold time statistics in milliseconds"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, longest = self.count, self.total_seconds, self.max_seconds
+        if not samples:
+            return {"checkouts": 0, "avg_ms": None, "p50_ms": None, "p99_ms": None, "max_ms": None}
+        return {
+            "checkouts": count,
+            "avg_ms": round(total / count * 1000, 2),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            "max_ms": round(longest * 1000, 2)
+        }
+
+
+pool_hold_times = PoolHoldTimes(settings.DB_POOL_HOLD_WINDOW)
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+        pool_hold_times.record(time.perf_counter() - checked_out_at)
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency to get database session
+
+    The session checks a connection out of the pool on its first query
+    only, so requests rejected before querying never take one. Loaded
+    objects are not expired when a transaction ends, which lets
+    release_connection() hand the connection back right after the CRUD
+    call while the endpoint still reads the results.
     """
-    db = SessionLocal()
+    db = SessionLocal(expire_on_commit=False)
     try:
         yield db
     except Exception as e:
@@ -44,6 +109,52 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def release_connection(db: Session):
+    """
+    End the session's transaction so its connection goes back to the pool
+
+    A read-only transaction is committed (nothing to write, and unlike a
+    rollback it keeps loaded objects usable); one that already failed (a
+    flush error the caller handled) is rolled back. The session stays
+    usable and checks out a connection again on its next query.
+    """
+    transaction = db.get_transaction()
+    if transaction is None:
+        return
+    if not transaction.is_active:
+        db.rollback()
+        return
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+F = TypeVar("F", bound=Callable)
+
+
+def releases_connection(func: F) -> F:
+    """
+    Decorate a function taking the session as first argument to release its
+    connection as soon as it returns (see release_connection)
+
+    If the function raises, its transaction is rolled back instead, and the
+    original exception propagates.
+    """
+    @functools.wraps(func)
+    def wrapper(db: Session, *args, **kwargs):
+        try:
+            result = func(db, *args, **kwargs)
+        except BaseException:
+            if db.in_transaction():
+                db.rollback()
+            raise
+        release_connection(db)
+        return result
+    return wrapper
+
+
 def create_tables():
     """
     Create all tables in the database
@@ -51,6 +162,8 @@ def create_tables():
     try:
         # Import all models to ensure they are registered
         from app.models.customer import Customer
+        from app.models.outbox import OutboxEvent
+        from app.models.tombstone import CustomerFeedHorizon, CustomerTombstone
         
         logger.info(f"Registered models in Base.metadata: {list(Base.metadata.tables.keys())}")
         
@@ -70,16 +183,137 @@ def create_tables():
         raise
 
 
-def check_database_connection() -> bool:
+def check_database_connection(log_success: bool = True) -> bool:
     """
     Check if database connection is working
+    
+    Args:
+        log_success: Log successful checks at INFO (off for periodic checks)
     """
     try:
         with engine.connect() as connection:
             connection.execute(text("SELECT 1"))
-        logger.info("Database connection successful")
+        if log_success:
+            logger.info("Database connection successful")
         return True
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return False
 
+
+def detect_customer_layout() -> bool:
+    """
+    Detect whether the customer table is hash-partitioned (alembic revision 0005)
+
+    Sets settings.CUSTOMER_PARTITIONED from the database instead of trusting
+    the environment, so email lookups always match the table they run on.
+
+    Returns:
+        True if the customer table is partitioned
+    """
+    partitioned = False
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            relkind = connection.execute(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass('customer')")
+            ).scalar()
+        partitioned = relkind == "p"
+
+    if partitioned != settings.CUSTOMER_PARTITIONED:
+        logger.warning(
+            f"CUSTOMER_PARTITIONED={settings.CUSTOMER_PARTITIONED} does not match the customer table; "
+            f"using the {'partitioned' if partitioned else 'plain'} layout"
+        )
+    settings.CUSTOMER_PARTITIONED = partitioned
+    return partitioned
+
+
+def verify_schema_revision() -> bool:
+    """
+    Check that the database is at the latest alembic revision
+
+    Much cheaper than create_tables(): a single read of alembic_version
+    compared against the migration scripts on disk.
+    """
+    try:
+        from alembic.config import Config
+        from alembic.runtime.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+
+        service_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        alembic_cfg = Config(os.path.join(service_root, "alembic.ini"))
+        alembic_cfg.set_main_option("script_location", os.path.join(service_root, "alembic"))
+        expected_heads = set(ScriptDirectory.from_config(alembic_cfg).get_heads())
+
+        with engine.connect() as connection:
+            current_heads = set(MigrationContext.configure(connection).get_current_heads())
+
+        if current_heads != expected_heads:
+            logger.error(
+                f"Database schema revision {sorted(current_heads)} does not match "
+                f"expected {sorted(expected_heads)}; run 'alembic upgrade head'"
+            )
+            return False
+
+        logger.info(f"Database schema at revision {sorted(current_heads)}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Schema revision check failed: {e}")
+        return False
+
+
+def prewarm_pool(connections: int) -> int:
+    """
+    Open pooled connections ahead of traffic so first requests skip the connect cost
+
+    Args:
+        connections: Number of connections to open (capped at the pool size)
+
+    Returns:
+        Number of connections warmed
+    """
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else connections
+    target = min(connections, pool_size)
+    opened = []
+    try:
+        # Hold them all at once so the pool really creates `target` connections
+        for _ in range(target):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            opened.append(connection)
+        logger.info(f"Pre-warmed {len(opened)} database connections")
+        return len(opened)
+    except Exception as e:
+        logger.error(f"Error pre-warming connection pool: {e}")
+        return len(opened)
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def get_pool_status() -> dict:
+    """
+    Get connection pool occupancy without touching the database
+
+    Returns:
+        Dictionary with pool size, checked-out connections, headroom and
+        how long connections are held per checkout
+    """
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {
+            "size": None, "checked_out": None, "overflow": None, "available": None,
+            "hold_time": pool_hold_times.summary()
+        }
+
+    size = pool.size()
+    checked_out = pool.checkedout()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "available": max(0, size + max(max_overflow, 0) - checked_out),
+        "hold_time": pool_hold_times.summary()
+    }
@@ -0,0 +1,85 @@
+"""
+Leader election among the worker processes of one instance
+Service-wide background jobs run in a single worker
+"""
+import asyncio
+import fcntl
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLeadership:
+    """
+    Elects the worker that runs the jobs meant to run once per instance
+
+    Under gunicorn every worker runs the application lifespan. The first
+    worker to take an exclusive flock on WORKER_LEADER_LOCK becomes leader;
+    the others keep retrying every WORKER_LEADER_RETRY seconds, so when the
+    leader is recycled (max_requests) or dies, a sibling takes over. The
+    kernel releases the lock with the process, even on SIGKILL.
+    """
+
+    def __init__(self):
+        self.path = settings.WORKER_LEADER_LOCK
+        self.retry_interval = settings.WORKER_LEADER_RETRY
+        self._fd: Optional[int] = None
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def _try_acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def _campaign(self, on_elected: Callable[[], None]):
+        while not self._try_acquire():
+            await asyncio.sleep(self.retry_interval)
+        logger.info(f"Worker {os.getpid()} elected to run service-wide jobs")
+        on_elected()
+
+    def start(self, on_elected: Callable[[], None]):
+        """
+        Call `on_elected` once this worker holds the lock
+
+        Args:
+            on_elected: Starts the service-wide jobs
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._campaign(on_elected))
+
+    async def stop(self):
+        """Stop campaigning and give up the lock (stop the jobs first)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get leadership state for monitoring"""
+        return {
+            "pid": os.getpid(),
+            "leader": self.is_leader
+        }
+
+
+# Global worker leadership instance
+worker_leadership = WorkerLeadership()
@@ -0,0 +1,81 @@
+"""
+Startup state tracking
+Readiness flag, warm-up phase timings and time-to-first-request
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reference point for all startup timings (module is imported early by app.main)
+PROCESS_STARTED_AT = time.monotonic()
+
+
+class StartupState:
+    """Tracks whether the service is warm and how long it took to get there"""
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.ready_after_ms: Optional[float] = None
+        self.first_request_after_ms: Optional[float] = None
+
+    @staticmethod
+    def _elapsed_ms() -> float:
+        return round((time.monotonic() - PROCESS_STARTED_AT) * 1000, 2)
+
+    def record_phase(self, name: str, started: float):
+        """
+        Record how long a warm-up phase took
+
+        Args:
+            name: Phase name
+            started: time.monotonic() value when the phase began
+        """
+        self.phases[name] = round((time.monotonic() - started) * 1000, 2)
+
+    def mark_ready(self):
+        """Flip readiness once the service is warm"""
+        self.ready = True
+        self.error = None
+        self.ready_after_ms = self._elapsed_ms()
+        logger.info(f"Service ready after {self.ready_after_ms} ms (phases: {self.phases})")
+
+    def mark_failed(self, error: str):
+        """Record a warm-up failure; readiness stays off"""
+        self.ready = False
+        self.error = error
+
+    def record_first_request(self):
+        """Record time-to-first-request (only the first call has an effect)"""
+        if self.first_request_after_ms is None:
+            self.first_request_after_ms = self._elapsed_ms()
+            logger.info(f"Time to first request: {self.first_request_after_ms} ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get startup state for the info and readiness endpoints"""
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "phases_ms": dict(self.phases),
+            "ready_after_ms": self.ready_after_ms,
+            "first_request_after_ms": self.first_request_after_ms
+        }
+
+
+# Global startup state instance
+startup_state = StartupState()
+
+
+class FirstRequestMiddleware:
+    """Pure ASGI middleware recording time-to-first-request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and startup_state.first_request_after_ms is None:
+            startup_state.record_first_request()
+        await self.app(scope, receive, send)
@@ -0,0 +1,16 @@
+"""
+Gunicorn worker class for production serving
+"""
+from uvicorn.workers import UvicornWorker
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker pinned to uvloop and httptools
+
+    The stock worker uses "auto", which silently falls back to asyncio and
+    h11 when the fast implementations are missing; pinning them makes a
+    missing dependency fail loudly instead of serving slowly.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
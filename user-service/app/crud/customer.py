@@ -1,21 +1,83 @@
 """
 CRUD operations for Customer entity
 """
+from sqlalchemy import bindparam, column, delete, exists, func, literal, null, select, table, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Tuple
 import logging
 
+from app.core.config import settings
+from app.core.database import releases_connection
 from app.models.customer import Customer
+from app.models.tombstone import CustomerFeedHorizon, CustomerTombstone
 from app.schemas.customer import CustomerCreateDTO, CustomerUpdateDTO
+from app.crud.outbox import outbox_crud
 
 logger = logging.getLogger(__name__)
 
 
+# Email -> document table kept in sync by triggers on the partitioned
+# customer table (alembic revision 0005)
+customer_email_table = table("customer_email", column("email"), column("document"))
+
+
+def _email_filter(email: str):
+    """
+    Filter clause matching a customer by email
+
+    With the hash-partitioned layout the email is resolved to its document
+    through customer_email first, so PostgreSQL prunes the scan to a single
+    partition instead of probing every partition's email index.
+    """
+    if settings.CUSTOMER_PARTITIONED:
+        owner = select(customer_email_table.c.document).where(customer_email_table.c.email == email)
+        return Customer.document == owner.scalar_subquery()
+    return Customer.email == email
+
+
+# Core statements for the hot lookups, built once. SQLAlchemy memoizes a
+# statement's cache key, so each call reuses the compiled SQL; the rows come
+# back as plain tuples, without identity-map bookkeeping or ORM instances.
+customer_table = Customer.__table__
+
+_CUSTOMER_ROW_BY_ID = select(customer_table).where(customer_table.c.document == bindparam("document"))
+
+_CUSTOMER_ROW_BY_EMAIL = select(customer_table).where(customer_table.c.email == bindparam("email"))
+
+# Partitioned layout: resolve the document first (see _email_filter)
+_CUSTOMER_ROW_BY_EMAIL_PARTITIONED = select(customer_table).where(
+    customer_table.c.document == select(customer_email_table.c.document)
+    .where(customer_email_table.c.email == bindparam("email"))
+    .scalar_subquery()
+)
+
+
+def _customer_event_data(customer: Customer) -> dict:
+    """Customer fields included in outbox events"""
+    return {
+        "document": customer.document,
+        "firstname": customer.firstname,
+        "lastname": customer.lastname,
+        "address": customer.address,
+        "phone": customer.phone,
+        "email": customer.email
+    }
+
+
 class CustomerCRUD:
-    """CRUD operations for Customer"""
+    """
+    CRUD operations for Customer
+
+    Every method hands its connection back to the pool when it returns
+    (see releases_connection), so a request only holds one while querying.
+    """
 
     @staticmethod
+    @releases_connection
     def create_customer(db: Session, customer_data) -> Optional[Customer]:
         """
         Create a new customer
@@ -56,7 +118,7 @@ class CustomerCRUD:
             
             # Check if email already exists
             existing_email = db.query(Customer).filter(
-                Customer.email == email
+                _email_filter(email)
             ).first()
             
             if existing_email:
@@ -74,6 +136,7 @@ class CustomerCRUD:
             )
             
             db.add(db_customer)
+            outbox_crud.enqueue_event(db, document, "user_created", _customer_event_data(db_customer))
             db.commit()
             db.refresh(db_customer)
             
@@ -90,6 +153,63 @@ class CustomerCRUD:
             return None
 
     @staticmethod
+    @releases_connection
+    def create_customers_batch(db: Session, customers_data: List[dict]) -> List[Optional[Customer]]:
+        """
+        Create several customers in one transaction (group commit)
+
+        Each row is inserted under its own SAVEPOINT, so a duplicate
+        document or email only rolls that row back; the rest share a single
+        commit, and with it a single WAL flush.
+
+        Args:
+            db: Database session
+            customers_data: Customer dicts to create
+
+        Returns:
+            One entry per input, in order: the Customer object if it was
+            created, None if it failed (every entry is None if the commit fails)
+        """
+        results: List[Optional[Customer]] = []
+        for data in customers_data:
+            db_customer = Customer(
+                document=data['document'],
+                firstname=data['firstname'],
+                lastname=data['lastname'],
+                address=data['address'],
+                phone=data['phone'],
+                email=data['email']
+            )
+            try:
+                with db.begin_nested():
+                    db.add(db_customer)
+                    outbox_crud.enqueue_event(db, db_customer.document, "user_created", _customer_event_data(db_customer))
+                results.append(db_customer)
+            except IntegrityError as e:
+                logger.warning(f"Customer {data['document']} not created, document or email already exists: {e.orig}")
+                results.append(None)
+            except Exception as e:
+                logger.error(f"Error creating customer {data['document']}: {e}")
+                results.append(None)
+
+        created = [customer.document for customer in results if customer is not None]
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error committing batch of {len(customers_data)} customers: {e}")
+            return [None] * len(customers_data)
+
+        if created:
+            # Load the server-side timestamps of the whole batch in one query
+            db.execute(
+                select(Customer).where(Customer.document.in_(created)).execution_options(populate_existing=True)
+            ).scalars().all()
+        logger.info(f"Created {len(created)} of {len(customers_data)} customers in one transaction")
+        return results
+
+    @staticmethod
+    @releases_connection
     def get_customer_by_id(db: Session, customer_id: str) -> Optional[Customer]:
         """
         Get customer by document ID
@@ -116,6 +236,34 @@ class CustomerCRUD:
             return None
 
     @staticmethod
+    @releases_connection
+    def get_customer_row_by_id(db: Session, customer_id: str) -> Optional[Row]:
+        """
+        Get customer by document ID as a plain row (Core fast path)
+        
+        Args:
+            db: Database session
+            customer_id: Customer document ID
+            
+        Returns:
+            Row with the customer columns if found, None if not found
+        """
+        try:
+            row = db.connection().execute(_CUSTOMER_ROW_BY_ID, {"document": customer_id}).first()
+            
+            if row:
+                logger.info(f"Customer found: {customer_id}")
+            else:
+                logger.warning(f"Customer not found: {customer_id}")
+                
+            return row
+            
+        except Exception as e:
+            logger.error(f"Error getting customer {customer_id}: {e}")
+            return None
+
+    @staticmethod
+    @releases_connection
     def update_customer(db: Session, customer_id: str, customer_data: CustomerUpdateDTO) -> Optional[Customer]:
         """
         Update customer information
@@ -139,7 +287,7 @@ class CustomerCRUD:
             # Check if email is being changed and if it already exists
             if customer_data.email and customer_data.email != db_customer.email:
                 existing_email = db.query(Customer).filter(
-                    Customer.email == customer_data.email,
+                    _email_filter(customer_data.email),
                     Customer.document != customer_id
                 ).first()
                 
@@ -152,6 +300,7 @@ class CustomerCRUD:
             for field, value in update_data.items():
                 setattr(db_customer, field, value)
             
+            outbox_crud.enqueue_event(db, customer_id, "user_updated", _customer_event_data(db_customer))
             db.commit()
             db.refresh(db_customer)
             
@@ -168,6 +317,7 @@ class CustomerCRUD:
             return None
 
     @staticmethod
+    @releases_connection
     def delete_customer(db: Session, customer_id: str) -> bool:
         """
         Delete customer by document ID
@@ -187,6 +337,8 @@ class CustomerCRUD:
                 return False
             
             db.delete(customer)
+            db.merge(CustomerTombstone(document=customer_id, deleted_at=func.now()))
+            outbox_crud.enqueue_event(db, customer_id, "user_deleted", {"document": customer_id})
             db.commit()
             
             logger.info(f"Customer deleted successfully: {customer_id}")
@@ -198,6 +350,7 @@ class CustomerCRUD:
             return False
 
     @staticmethod
+    @releases_connection
     def get_all_customers(db: Session, skip: int = 0, limit: int = 100) -> List[Customer]:
         """
         Get all customers with pagination
@@ -220,6 +373,7 @@ class CustomerCRUD:
             return []
 
     @staticmethod
+    @releases_connection
     def get_customer_by_email(db: Session, email: str) -> Optional[Customer]:
         """
         Get customer by email
@@ -232,7 +386,7 @@ class CustomerCRUD:
             Customer object if found, None if not found
         """
         try:
-            customer = db.query(Customer).filter(Customer.email == email).first()
+            customer = db.query(Customer).filter(_email_filter(email)).first()
             
             if customer:
                 logger.info(f"Customer found by email: {email}")
@@ -245,6 +399,167 @@ class CustomerCRUD:
             logger.error(f"Error getting customer by email {email}: {e}")
             return None
 
+    @staticmethod
+    @releases_connection
+    def get_customer_row_by_email(db: Session, email: str) -> Optional[Row]:
+        """
+        Get customer by email as a plain row (Core fast path)
+        
+        Args:
+            db: Database session
+            email: Customer email
+            
+        Returns:
+            Row with the customer columns if found, None if not found
+        """
+        try:
+            statement = _CUSTOMER_ROW_BY_EMAIL_PARTITIONED if settings.CUSTOMER_PARTITIONED else _CUSTOMER_ROW_BY_EMAIL
+            row = db.connection().execute(statement, {"email": email}).first()
+            
+            if row:
+                logger.info(f"Customer found by email: {email}")
+            else:
+                logger.warning(f"Customer not found by email: {email}")
+                
+            return row
+            
+        except Exception as e:
+            logger.error(f"Error getting customer by email {email}: {e}")
+            return None
+
+    @staticmethod
+    @releases_connection
+    def get_changes(
+        db: Session,
+        after: Optional[Tuple[int, str]],
+        limit: int = 500
+    ) -> List[Row]:
+        """
+        Get customers created, updated or deleted after a position
+
+        Live rows and tombstones are merged in (change_seq, document) order,
+        where change_seq is the id of the transaction that wrote the row.
+        Only transactions below the snapshot xmin are returned: they have
+        all finished, so no later commit can sort before the last position
+        handed out. A long-running write transaction holds the feed back
+        instead of being skipped.
+
+        Each branch is an index range scan that stops after `limit` rows, so
+        the cost depends on the number of changes, not the table size.
+
+        Args:
+            db: Database session
+            after: Exclusive (change_seq, document) position, None for the beginning
+            limit: Maximum number of changes to return
+
+        Returns:
+            Rows with op ("upsert" or "delete"), document, change_seq,
+            changed_at and the customer fields (None for deletions)
+        """
+        horizon = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        upserts = select(
+            literal("upsert").label("op"),
+            Customer.document,
+            Customer.change_seq,
+            Customer.updated_at.label("changed_at"),
+            Customer.firstname,
+            Customer.lastname,
+            Customer.address,
+            Customer.phone,
+            Customer.email
+        ).where(Customer.change_seq < horizon)
+        deletes = select(
+            literal("delete").label("op"),
+            CustomerTombstone.document,
+            CustomerTombstone.change_seq,
+            CustomerTombstone.deleted_at.label("changed_at"),
+            null().label("firstname"),
+            null().label("lastname"),
+            null().label("address"),
+            null().label("phone"),
+            null().label("email")
+        ).where(CustomerTombstone.change_seq < horizon)
+
+        if after is not None:
+            upserts = upserts.where(tuple_(Customer.change_seq, Customer.document) > tuple_(*after))
+            deletes = deletes.where(tuple_(CustomerTombstone.change_seq, CustomerTombstone.document) > tuple_(*after))
+
+        upserts = upserts.order_by(Customer.change_seq, Customer.document).limit(limit).subquery()
+        deletes = deletes.order_by(CustomerTombstone.change_seq, CustomerTombstone.document).limit(limit).subquery()
+        changes = union_all(select(upserts), select(deletes)).subquery()
+
+        # Errors propagate: an empty page would tell the caller it is up to date
+        return db.execute(
+            select(changes).order_by(changes.c.change_seq, changes.c.document).limit(limit)
+        ).all()
+
+    @staticmethod
+    @releases_connection
+    def is_behind_feed_horizon(db: Session, after: Tuple[int, str]) -> bool:
+        """
+        Check whether a change feed position predates purged tombstones
+
+        Args:
+            db: Database session
+            after: (change_seq, document) position of a cursor
+
+        Returns:
+            True if deletions after the position may have been purged
+        """
+        horizon = tuple_(CustomerFeedHorizon.change_seq, CustomerFeedHorizon.document)
+        return db.execute(select(exists().where(horizon > tuple_(*after)))).scalar()
+
+    @staticmethod
+    def purge_tombstones(db: Session, older_than: timedelta) -> int:
+        """
+        Delete tombstones older than the retention window and move the
+        change feed horizon up to the newest one deleted
+
+        Both happen in one transaction, so no cursor is accepted that a
+        purged deletion lies after.
+
+        Args:
+            db: Database session
+            older_than: Retention window for tombstones
+
+        Returns:
+            Number of deleted tombstones
+        """
+        try:
+            cutoff = datetime.now(timezone.utc) - older_than
+            purged = delete(CustomerTombstone).where(
+                CustomerTombstone.deleted_at < cutoff
+            ).returning(CustomerTombstone.change_seq, CustomerTombstone.document).cte("purged")
+            newest = db.execute(
+                select(purged.c.change_seq, purged.c.document, func.count().over().label("purged"))
+                .order_by(purged.c.change_seq.desc(), purged.c.document.desc())
+                .limit(1)
+            ).first()
+            if newest is None:
+                db.commit()
+                return 0
+
+            horizon = insert(CustomerFeedHorizon).values(id=1, change_seq=newest.change_seq, document=newest.document)
+            db.execute(horizon.on_conflict_do_update(
+                index_elements=[CustomerFeedHorizon.id],
+                set_={
+                    "change_seq": horizon.excluded.change_seq,
+                    "document": horizon.excluded.document,
+                    "purged_at": func.now()
+                },
+                # A tombstone committed late can sort behind the current horizon
+                where=tuple_(CustomerFeedHorizon.change_seq, CustomerFeedHorizon.document)
+                < tuple_(horizon.excluded.change_seq, horizon.excluded.document)
+            ))
+            db.commit()
+            logger.info(f"Purged {newest.purged} customer tombstones older than {older_than.days} days")
+            return newest.purged
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error purging customer tombstones: {e}")
+            return 0
+
 
 # Create instance for use in endpoints
 customer_crud = CustomerCRUD()
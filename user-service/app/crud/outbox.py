@@ -0,0 +1,286 @@
+"""
+CRUD operations for the transactional outbox
+"""
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import random
+
+from app.core.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key so that only one dispatcher (across replicas) drains the outbox
+OUTBOX_ADVISORY_LOCK_KEY = 0x6F7574626F78  # "outbox"
+
+
+def outbox_rows_enabled() -> bool:
+    """
+    Whether customer changes write outbox rows
+
+    Rows are needed for delivery to order-service (OUTBOX_ENABLED) and as
+    the resume log of the change stream (CHANGE_STREAM_ENABLED).
+    """
+    return settings.OUTBOX_ENABLED or settings.CHANGE_STREAM_ENABLED
+
+
+class OutboxCRUD:
+    """CRUD operations for OutboxEvent"""
+
+    @staticmethod
+    def enqueue_event(db: Session, customer_id: str, event_type: str, data: Dict[str, Any]) -> Optional[OutboxEvent]:
+        """
+        Add an event to the outbox as part of the caller's transaction
+
+        The caller is responsible for committing; the event becomes visible
+        to the dispatcher only if the customer change commits. Nothing is
+        written when neither the outbox nor the change stream is enabled;
+        with only the change stream, the row is written already dispatched
+        so that it just expires with the retention window.
+
+        Args:
+            db: Database session
+            customer_id: Customer document ID
+            event_type: Event type (user_created, user_updated, user_deleted)
+            data: Event data
+
+        Returns:
+            Pending OutboxEvent, or None if no row is written
+        """
+        if not outbox_rows_enabled():
+            return None
+        event = OutboxEvent(
+            aggregate_id=customer_id,
+            event_type=event_type,
+            payload=data,
+            attempts=0,
+            dispatched_at=None if settings.OUTBOX_ENABLED else datetime.now(timezone.utc)
+        )
+        db.add(event)
+        if settings.CHANGE_STREAM_ENABLED:
+            OutboxCRUD.notify_event(db, event)
+        return event
+
+    @staticmethod
+    def notify_event(db: Session, event: OutboxEvent):
+        """
+        Announce an event on the customer events channel (PostgreSQL only)
+
+        NOTIFY is transactional: listeners receive the event when the caller
+        commits, in commit order, and never if it rolls back.
+
+        Args:
+            db: Database session
+            event: Pending outbox event
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        # The event id is assigned on flush
+        db.flush([event])
+        message = {
+            "event_id": event.id,
+            "user_id": event.aggregate_id,
+            "event": event.event_type,
+            "data": event.payload,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.CUSTOMER_EVENTS_CHANNEL, "payload": json.dumps(message)}
+        )
+
+    @staticmethod
+    def claim_pending_events(db: Session, limit: int) -> List[OutboxEvent]:
+        """
+        Claim the next batch of deliverable events, oldest first, and commit
+
+        Customers with an event waiting for a retry (or claimed by another
+        dispatcher) are skipped entirely, so events for the same customer are
+        always delivered in order. Claimed events are reserved for
+        OUTBOX_CLAIM_TIMEOUT seconds through `next_attempt_at`; if they are
+        neither marked dispatched nor failed by then, they are claimed again.
+        On PostgreSQL a transaction-level advisory lock serializes claims
+        across replicas; it is released by the commit, before any delivery.
+
+        Args:
+            db: Database session (created with expire_on_commit=False)
+            limit: Maximum number of events to return
+
+        Returns:
+            List of OutboxEvent objects (empty if another dispatcher is claiming)
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            acquired = db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": OUTBOX_ADVISORY_LOCK_KEY}
+            ).scalar()
+            if not acquired:
+                db.rollback()
+                return []
+
+        now = datetime.now(timezone.utc)
+        blocked = select(OutboxEvent.aggregate_id).where(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.next_attempt_at > now
+        )
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.aggregate_id.not_in(blocked)
+        ).order_by(OutboxEvent.id).limit(limit).all()
+        claimed_until = now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        for event in events:
+            event.next_attempt_at = claimed_until
+        db.commit()
+        return events
+
+    @staticmethod
+    def get_events_after(db: Session, after_id: int, limit: int) -> List[OutboxEvent]:
+        """
+        Get events newer than an event id, dispatched or not
+
+        Args:
+            db: Database session
+            after_id: Exclusive lower bound on the event id
+            limit: Maximum number of events to return
+
+        Returns:
+            List of OutboxEvent objects in id order
+        """
+        return db.query(OutboxEvent).filter(
+            OutboxEvent.id > after_id
+        ).order_by(OutboxEvent.id).limit(limit).all()
+
+    @staticmethod
+    def get_events_created_before(db: Session, before_id: int, window: float, limit: int) -> List[OutboxEvent]:
+        """
+        Get events with a lower id created shortly before an event
+
+        Ids are assigned at insert time while events become visible at
+        commit, so these may have committed after `before_id`.
+
+        Args:
+            db: Database session
+            before_id: Exclusive upper bound on the event id
+            window: Seconds before the creation of `before_id`
+            limit: Maximum number of events to return
+
+        Returns:
+            List of OutboxEvent objects in id order (empty if `before_id` is gone)
+        """
+        anchor = select(OutboxEvent.created_at).where(OutboxEvent.id == before_id).scalar_subquery()
+        return db.query(OutboxEvent).filter(
+            OutboxEvent.id < before_id,
+            OutboxEvent.created_at >= anchor - timedelta(seconds=window)
+        ).order_by(OutboxEvent.id).limit(limit).all()
+
+    @staticmethod
+    def get_oldest_event_id(db: Session) -> Optional[int]:
+        """
+        Get the id of the oldest event still in the outbox
+
+        Args:
+            db: Database session
+
+        Returns:
+            Oldest event id, None if the outbox is empty
+        """
+        return db.query(func.min(OutboxEvent.id)).scalar()
+
+    @staticmethod
+    def mark_dispatched(db: Session, events: List[OutboxEvent]):
+        """
+        Mark events as delivered and commit
+
+        Args:
+            db: Database session
+            events: Delivered events
+        """
+        now = datetime.now(timezone.utc)
+        for event in events:
+            event.dispatched_at = now
+            event.last_error = None
+        db.commit()
+
+    @staticmethod
+    def mark_failed(db: Session, events: List[OutboxEvent], error: str):
+        """
+        Schedule events for another delivery attempt with exponential backoff and commit
+
+        Args:
+            db: Database session
+            events: Events whose delivery failed
+            error: Error description
+        """
+        now = datetime.now(timezone.utc)
+        for event in events:
+            event.attempts = (event.attempts or 0) + 1
+            delay = min(
+                settings.OUTBOX_RETRY_MAX_DELAY,
+                settings.OUTBOX_RETRY_BASE_DELAY * (2 ** (event.attempts - 1))
+            )
+            event.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            event.last_error = error[:500]
+        db.commit()
+
+    @staticmethod
+    def purge_dispatched(db: Session, older_than: timedelta, pending_older_than: timedelta) -> int:
+        """
+        Delete delivered events older than the retention window, and
+        undelivered ones older than the pending retention window
+
+        Args:
+            db: Database session
+            older_than: Retention window for delivered events
+            pending_older_than: Retention window for events never delivered
+
+        Returns:
+            Number of deleted events
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            deleted = db.query(OutboxEvent).filter(
+                OutboxEvent.dispatched_at.is_not(None),
+                OutboxEvent.dispatched_at < now - older_than
+            ).delete(synchronize_session=False)
+            expired = db.query(OutboxEvent).filter(
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.created_at < now - pending_older_than
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.info(f"Purged {deleted} dispatched outbox events")
+            if expired:
+                logger.warning(f"Dropped {expired} outbox events never delivered to order-service")
+            return deleted + expired
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error purging outbox events: {e}")
+            return 0
+
+    @staticmethod
+    def to_message(event: OutboxEvent) -> Dict[str, Any]:
+        """
+        Build the notification message sent to order-service
+
+        Args:
+            event: Outbox event
+
+        Returns:
+            Message dictionary
+        """
+        return {
+            "event_id": event.id,
+            "user_id": event.aggregate_id,
+            "event": event.event_type,
+            "data": event.payload,
+            "timestamp": event.created_at.isoformat() if event.created_at else None
+        }
+
+
+# Create instance for use in services
+outbox_crud = OutboxCRUD()
@@ -3,7 +3,9 @@ FastAPI main application
 User Service - Customer Management Microservice
 """
 
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,9 +13,26 @@ from fastapi.responses import JSONResponse
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import create_tables, check_database_connection
-from app.api.endpoints import customer, health
-from app.utils.consul import register_with_consul, deregister_from_consul
+from app.core.startup import startup_state, FirstRequestMiddleware
+from app.core.database import (
+    create_tables,
+    check_database_connection,
+    verify_schema_revision,
+    detect_customer_layout,
+    prewarm_pool,
+    engine,
+)
+from app.api.endpoints import customer, events, health
+from app.core.leadership import worker_leadership
+from app.utils.consul import register_with_consul, deregister_from_consul, consul_heartbeat
+from app.services.service_client import service_client
+from app.services.outbox_dispatcher import outbox_dispatcher
+from app.services.tombstone_purger import tombstone_purger
+from app.crud.outbox import outbox_rows_enabled
+from app.services.health_monitor import health_monitor
+from app.services.change_stream import change_stream
+from app.services.group_commit import group_committer
+from app.services.customer_cache import customer_cache
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +42,83 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def start_service_wide_jobs():
+    """Start the jobs that run in one worker only (the elected leader)"""
+    # Deliver outbox events to order-service in the background, and expire
+    # the rows kept for the change stream
+    if outbox_rows_enabled():
+        outbox_dispatcher.start()
+
+    # Expire the deletion tombstones kept for the change feed
+    if settings.CUSTOMER_TOMBSTONE_RETENTION_DAYS > 0:
+        tombstone_purger.start()
+
+    # The gunicorn master registered the service; one worker reports its TTL
+    if settings.GUNICORN_MASTER and settings.CONSUL_CHECK_MODE == "ttl":
+        consul_heartbeat.start()
+
+
+def start_background_services():
+    """Start background tasks that need a working database"""
+    # Keep this worker's probe snapshot (database, pool, dependencies) fresh
+    health_monitor.start()
+
+    # Keep a dependency health snapshot warm for the health endpoints
+    service_client.start_dependency_monitor()
+
+    # Run the service-wide jobs in a single worker
+    worker_leadership.start(start_service_wide_jobs)
+
+    # Share one LISTEN connection among this worker's change stream subscribers
+    if settings.CHANGE_STREAM_ENABLED and engine.dialect.name == "postgresql":
+        change_stream.start()
+
+    # Coalesce concurrent customer creations into shared commits
+    if settings.GROUP_COMMIT_ENABLED:
+        group_committer.start()
+
+    # Cache customer lookups, shared across replicas through Redis when configured
+    if settings.CUSTOMER_CACHE_ENABLED:
+        customer_cache.start()
+
+
+async def fast_start_warm_up():
+    """
+    Warm the service up in the background (FAST_START mode)
+
+    The server is already accepting connections; /ready stays 503 until the
+    schema check and pool pre-warm have finished.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        # Verify schema via alembic revision instead of create_all
+        started = time.monotonic()
+        if not await loop.run_in_executor(None, verify_schema_revision):
+            startup_state.mark_failed("Database schema is not at the latest alembic revision")
+            return
+        await loop.run_in_executor(None, detect_customer_layout)
+        startup_state.record_phase("schema_check", started)
+
+        # Open pool connections ahead of traffic
+        started = time.monotonic()
+        await loop.run_in_executor(None, prewarm_pool, settings.POOL_PREWARM_CONNECTIONS)
+        startup_state.record_phase("pool_prewarm", started)
+
+        start_background_services()
+        startup_state.mark_ready()
+
+        # Register only once warm so Consul never routes traffic to a cold
+        # replica (under gunicorn the master registers)
+        if not settings.GUNICORN_MASTER:
+            await register_with_consul(initial_delay=0)
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Fast-start warm-up failed: {e}")
+        startup_state.mark_failed(str(e))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -31,21 +127,36 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Starting User Service...")
+    warm_up_task = None
 
     try:
-        # Create database tables
-        logger.info("Creating database tables...")
-        create_tables()
+        if settings.FAST_START:
+            logger.info("Fast start enabled, warming up in the background...")
+            warm_up_task = asyncio.create_task(fast_start_warm_up())
+        else:
+            # Create database tables (under gunicorn the master already did)
+            if not settings.GUNICORN_MASTER:
+                logger.info("Creating database tables...")
+                started = time.monotonic()
+                create_tables()
+                startup_state.record_phase("create_tables", started)
 
-        # Check database connection
-        logger.info("Checking database connection...")
-        if not check_database_connection():
-            logger.error("Database connection failed!")
-            raise Exception("Database connection failed")
+            # Check database connection
+            logger.info("Checking database connection...")
+            if not check_database_connection():
+                logger.error("Database connection failed!")
+                raise Exception("Database connection failed")
+            detect_customer_layout()
 
-        # Register with Consul
-        logger.info("Registering with Consul...")
-        await register_with_consul()
+            # Register with Consul (under gunicorn the master already did)
+            if not settings.GUNICORN_MASTER:
+                logger.info("Registering with Consul...")
+                started = time.monotonic()
+                await register_with_consul()
+                startup_state.record_phase("consul_registration", started)
+
+            start_background_services()
+            startup_state.mark_ready()
 
         logger.info("User Service started successfully!")
 
@@ -58,8 +169,25 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down User Service...")
     try:
-        # Deregister from Consul
-        await deregister_from_consul()
+        if warm_up_task is not None and not warm_up_task.done():
+            warm_up_task.cancel()
+
+        # Stop background tasks
+        await customer_cache.stop()
+        await group_committer.stop()
+        await change_stream.stop()
+        await outbox_dispatcher.stop()
+        await tombstone_purger.stop()
+        await health_monitor.stop()
+        await service_client.stop_dependency_monitor()
+        if settings.GUNICORN_MASTER:
+            await consul_heartbeat.stop()
+        await worker_leadership.stop()
+
+        # Deregister from Consul (under gunicorn the master does it on exit,
+        # so recycling a worker does not take the service out of Consul)
+        if not settings.GUNICORN_MASTER:
+            await deregister_from_consul()
         logger.info("User Service shutdown completed!")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
@@ -85,6 +213,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record time-to-first-request
+app.add_middleware(FirstRequestMiddleware)
+
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -106,8 +237,10 @@ async def global_exception_handler(request, exc):
 app.include_router(health.router, tags=["Health"])
 
 app.include_router(customer.router, prefix="/customer", tags=["Customer"])
+app.include_router(events.router, prefix="/customer", tags=["Customer Events"])
 
 # Include health endpoints under /customer prefix for API Gateway
+# (Traefik does not strip /customer); probes are answered from memory
 app.include_router(health.router, prefix="/customer", tags=["Health-Customer"])
 
 
@@ -127,20 +260,6 @@ async def root():
     }
 
 
-# Direct health endpoint for Consul
-@app.get("/health")
-async def direct_health_check():
-    """
-    Direct health check endpoint for Consul
-    """
-    return {
-        "status": "healthy",
-        "service": settings.SERVICE_NAME,
-        "version": settings.VERSION,
-        "message": "User Service is running",
-    }
-
-
 # Service info endpoint
 @app.get("/info")
 async def service_info():
@@ -161,10 +280,19 @@ async def service_info():
             "delete_customer": "DELETE /customer/deletecustomer/{customerid}",
             "get_all_customers": "GET /customer/customers",
             "get_customer_by_email": "GET /customer/customerbyemail/{email}",
+            "customer_changes": "GET /customer/changes?since={cursor}",
+            "customer_events_stream": "GET /customer/events/stream (SSE)",
             "health": "GET /health/health",
             "ready": "GET /health/ready",
             "live": "GET /health/live",
+            "circuit_breakers": "GET /circuit-breakers",
+            "dependencies": "GET /dependencies",
         },
+        "startup": startup_state.snapshot(),
+        "worker": worker_leadership.snapshot(),
+        "change_stream": change_stream.stats(),
+        "group_commit": group_committer.stats(),
+        "customer_cache": customer_cache.stats(),
     }
 
 
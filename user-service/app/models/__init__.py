@@ -1,5 +1,6 @@
 # Database models
 from .customer import Customer
+from .outbox import OutboxEvent
+from .tombstone import CustomerFeedHorizon, CustomerTombstone
 
-__all__ = ["Customer"]
-
+__all__ = ["Customer", "OutboxEvent", "CustomerTombstone", "CustomerFeedHorizon"]
@@ -1,13 +1,40 @@
 """
 SQLAlchemy models for Customer entity
 """
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import BigInteger, Column, DDL, String, DateTime, Index, event, text
 from sqlalchemy.sql import func
 from datetime import datetime
 
 # Import the shared Base from database config
 from app.core.database import Base
 
+# Id of the writing transaction (alembic revision 0004). The change feed only
+# returns rows whose transaction is below the snapshot xmin, i.e. finished,
+# so a late commit can never land behind a cursor already handed out.
+CHANGE_SEQ_DEFAULT = "pg_current_xact_id()::text::bigint"
+
+_change_seq_function = DDL(f"""
+    CREATE OR REPLACE FUNCTION stamp_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := {CHANGE_SEQ_DEFAULT};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+""")
+
+
+def stamp_change_seq_on_update(table):
+    """Have updates of `table` restamp change_seq (inserts use the column default)"""
+    event.listen(table, "after_create", _change_seq_function.execute_if(dialect="postgresql"))
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {table.name}_change_seq BEFORE UPDATE ON {table.name} "
+            f"FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()"
+        ).execute_if(dialect="postgresql")
+    )
+
 
 class Customer(Base):
     """
@@ -23,7 +50,16 @@ class Customer(Base):
     email = Column(String(100), nullable=False, unique=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=False, server_default=text(CHANGE_SEQ_DEFAULT))
+
+    __table_args__ = (
+        # Change feed reads customers in (change_seq, document) order
+        Index("ix_customer_change_seq", "change_seq", "document"),
+    )
 
     def __repr__(self):
         return f"<Customer(document='{self.document}', firstname='{self.firstname}', lastname='{self.lastname}')>"
 
+
+stamp_change_seq_on_update(Customer.__table__)
+
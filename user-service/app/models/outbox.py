@@ -0,0 +1,37 @@
+"""
+SQLAlchemy models for the transactional outbox
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String
+from sqlalchemy.sql import func
+
+# Import the shared Base from database config
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    Customer event waiting to be delivered to order-service
+
+    Rows are written in the same transaction as the customer change and
+    delivered asynchronously by the outbox dispatcher.
+    """
+    __tablename__ = "customer_outbox"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    aggregate_id = Column(String(50), nullable=False)  # customer document
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String(500), nullable=True)
+
+    __table_args__ = (
+        # Pending events are always read in id order
+        Index("ix_customer_outbox_pending", "id", postgresql_where=dispatched_at.is_(None)),
+        Index("ix_customer_outbox_aggregate_id", "aggregate_id"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, aggregate_id='{self.aggregate_id}', event_type='{self.event_type}')>"
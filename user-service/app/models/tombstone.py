@@ -0,0 +1,54 @@
+"""
+SQLAlchemy models for deleted-customer tombstones
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, text
+from sqlalchemy.sql import func
+
+# Import the shared Base from database config
+from app.core.database import Base
+from app.models.customer import CHANGE_SEQ_DEFAULT, stamp_change_seq_on_update
+
+
+class CustomerTombstone(Base):
+    """
+    Marker left behind when a customer is deleted
+
+    Lets the change feed report deletions; written in the same transaction
+    as the delete, and purged after CUSTOMER_TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = "customer_tombstone"
+
+    document = Column(String(50), primary_key=True, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    change_seq = Column(BigInteger, nullable=False, server_default=text(CHANGE_SEQ_DEFAULT))
+
+    __table_args__ = (
+        # Change feed reads tombstones in (change_seq, document) order
+        Index("ix_customer_tombstone_change_seq", "change_seq", "document"),
+        # The retention purge reads them by age
+        Index("ix_customer_tombstone_deleted_at", "deleted_at"),
+    )
+
+    def __repr__(self):
+        return f"<CustomerTombstone(document='{self.document}', deleted_at='{self.deleted_at}')>"
+
+
+stamp_change_seq_on_update(CustomerTombstone.__table__)
+
+
+class CustomerFeedHorizon(Base):
+    """
+    Newest (change_seq, document) position whose tombstone was purged
+
+    A single row (id 1). A change feed cursor behind it may have missed
+    deletions, so the feed refuses it and the consumer resyncs.
+    """
+    __tablename__ = "customer_feed_horizon"
+
+    id = Column(Integer, primary_key=True)
+    change_seq = Column(BigInteger, nullable=False)
+    document = Column(String(50), nullable=False)
+    purged_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<CustomerFeedHorizon(change_seq={self.change_seq}, document='{self.document}')>"
@@ -2,7 +2,7 @@
 Pydantic schemas for Customer DTOs
 """
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -109,3 +109,17 @@ class CustomerFindResponseDTO(BaseModel):
     phone: str
     email: str
 
+
+class CustomerChangeDTO(BaseModel):
+    """DTO for one entry of the customer change feed"""
+    op: str = Field(..., description="upsert or delete")
+    document: str
+    changed_at: datetime
+    customer: Optional[CustomerFindResponseDTO] = Field(None, description="Current data (null for deletions)")
+
+
+class CustomerChangesResponseDTO(BaseModel):
+    """DTO for a page of the customer change feed"""
+    changes: List[CustomerChangeDTO]
+    next_cursor: Optional[str] = Field(None, description="Pass as `since` to get the following changes")
+    has_more: bool = Field(..., description="Whether more changes are available right away")
@@ -0,0 +1 @@
+# Inter-service communication
@@ -0,0 +1,284 @@
+"""
+Customer change stream
+Fans PostgreSQL LISTEN/NOTIFY customer events out to SSE subscribers
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.outbox import outbox_crud
+from app.services.resilience import compute_backoff
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeSubscriber:
+    """
+    One stream client
+
+    Events are queued up to `queue_size`; a client that falls further
+    behind is cut off with `overflowed` set, and is expected to reconnect
+    with its last event id.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event without blocking
+
+        Returns:
+            False if the subscriber overflowed and must be dropped
+        """
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Free the queue and wake the reader with the end-of-stream marker
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class CustomerChangeStream:
+    """
+    Shared LISTEN connection fanned out to many subscribers
+
+    A single psycopg2 connection per process listens on the customer events
+    channel; the event loop is woken through add_reader, so no thread is
+    needed. Recent events are kept in a ring buffer so clients can resume
+    from Last-Event-ID; older positions fall back to the outbox table.
+    """
+
+    def __init__(self):
+        self.channel = settings.CUSTOMER_EVENTS_CHANNEL
+        self.queue_size = settings.CHANGE_STREAM_QUEUE_SIZE
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=settings.CHANGE_STREAM_BUFFER_SIZE)
+        self._buffered_ids: Set[int] = set()
+        self._subscribers: Set[ChangeSubscriber] = set()
+        self._connection = None
+        self._connection_lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Future] = None
+        self._last_event_id: Optional[int] = None
+        self._total_published = 0
+        self._total_dropped = 0
+
+    # Listener
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        connection = psycopg2.connect(
+            settings.DATABASE_URL, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+        )
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return connection
+
+    def _on_readable(self):
+        try:
+            self._connection.poll()
+        except Exception as e:
+            logger.warning(f"Change stream listener connection lost: {e}")
+            self._connection_lost.set()
+            return
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            try:
+                self.publish(json.loads(notify.payload))
+            except ValueError:
+                logger.warning(f"Ignoring malformed customer event payload: {notify.payload[:200]}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                self._connection = await loop.run_in_executor(None, self._connect)
+                self._connection_lost = asyncio.Event()
+                loop.add_reader(self._connection.fileno(), self._on_readable)
+                logger.info(f"Listening for customer events on channel '{self.channel}'")
+                if attempt and self._last_event_id is not None:
+                    # Notifications sent while disconnected are gone; recover them from the outbox
+                    events, lost = await self._load_from_outbox(
+                        self._last_event_id, settings.CHANGE_STREAM_REPLAY_OVERLAP
+                    )
+                    if lost:
+                        logger.warning(
+                            f"Change stream missed events after {self._last_event_id} that are no longer "
+                            f"in the outbox; resuming clients will be told to resync"
+                        )
+                    for event in events:
+                        self.publish(event)
+                attempt = 0
+                await self._connection_lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Change stream listener error: {e}")
+            finally:
+                self._close_connection(loop)
+            await asyncio.sleep(compute_backoff(attempt, 0.5, 30.0))
+            attempt += 1
+
+    def _close_connection(self, loop):
+        if self._connection is None:
+            return
+        try:
+            loop.remove_reader(self._connection.fileno())
+        except Exception:
+            pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def start(self):
+        """Start the shared listener"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info("Customer change stream started")
+
+    async def stop(self):
+        """Stop the listener and end every subscription"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Customer change stream stopped")
+        # Wake every client with the end-of-stream marker
+        for subscriber in list(self._subscribers):
+            subscriber.offer(None)
+        self._subscribers.clear()
+
+    # Fan-out
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        Record an event and hand it to every subscriber
+
+        Args:
+            event: Outbox message (event_id, user_id, event, data, timestamp)
+        """
+        if event["event_id"] in self._buffered_ids:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self._buffered_ids.discard(self._buffer[0]["event_id"])
+        self._buffer.append(event)
+        self._buffered_ids.add(event["event_id"])
+        # Replays from the outbox may publish late commits with lower ids
+        if self._last_event_id is None or event["event_id"] > self._last_event_id:
+            self._last_event_id = event["event_id"]
+        self._total_published += 1
+        for subscriber in list(self._subscribers):
+            if not subscriber.offer(event):
+                self._subscribers.discard(subscriber)
+                self._total_dropped += 1
+                logger.warning("Dropped slow change stream subscriber")
+
+    async def _load_from_outbox(self, after_id: int, overlap: float = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Load the events after `after_id` from the outbox
+
+        Returns:
+            Tuple of (events, whether events after `after_id` are missing:
+            purged from the outbox or past the replay cap). With an
+            `overlap`, lower-id events created up to that many seconds before
+            `after_id` come first, as they may have committed after it.
+        """
+        loop = asyncio.get_running_loop()
+        limit = self._buffer.maxlen
+
+        def load():
+            db = SessionLocal()
+            try:
+                oldest_id = outbox_crud.get_oldest_event_id(db)
+                earlier = outbox_crud.get_events_created_before(db, after_id, overlap, limit) if overlap > 0 else []
+                later = outbox_crud.get_events_after(db, after_id, limit + 1)
+                return oldest_id, [outbox_crud.to_message(event) for event in earlier + later]
+            finally:
+                db.close()
+
+        oldest_id, events = await loop.run_in_executor(None, load)
+        later = sum(1 for event in events if event["event_id"] > after_id)
+        if oldest_id is None:
+            # Empty outbox: everything this process published since was purged
+            lost = self._last_event_id is not None and after_id < self._last_event_id
+        else:
+            lost = later > limit or oldest_id > after_id + 1
+        return events[:len(events) - later + limit], lost
+
+    async def subscribe(self, last_event_id: Optional[int] = None):
+        """
+        Register a subscriber, replaying what it missed since `last_event_id`
+
+        Args:
+            last_event_id: Id of the last event the client received
+
+        Returns:
+            Tuple of (subscriber, events to replay, whether the position was
+            lost). When it was lost the client must resync: the replay then
+            holds only what is still available.
+        """
+        subscriber = ChangeSubscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        if last_event_id is None:
+            return subscriber, [], False
+
+        # Replay by position in the buffer rather than by id: ids are
+        # assigned at insert time, while NOTIFY arrives in commit order
+        buffered = list(self._buffer)
+        for index, event in enumerate(buffered):
+            if event["event_id"] == last_event_id:
+                return subscriber, buffered[index + 1:], False
+
+        # Past the buffer, ids are all there is to go on: the replay also
+        # covers lower-id events created shortly before the position, and
+        # the position counts as lost when events after it were purged or
+        # do not fit in one replay
+        replay, lost = await self._load_from_outbox(last_event_id, settings.CHANGE_STREAM_REPLAY_OVERLAP)
+        if lost:
+            return subscriber, [], True
+        replayed_ids = {event["event_id"] for event in replay}
+        # Drop live events that the replay already covers
+        pending = []
+        while not subscriber.queue.empty():
+            event = subscriber.queue.get_nowait()
+            if event is None or event["event_id"] not in replayed_ids:
+                pending.append(event)
+        for event in pending:
+            subscriber.queue.put_nowait(event)
+        return subscriber, replay, False
+
+    def unsubscribe(self, subscriber: ChangeSubscriber):
+        """Remove a subscriber"""
+        self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get stream statistics for monitoring"""
+        return {
+            "listening": self._connection is not None,
+            "subscribers": len(self._subscribers),
+            "buffered_events": len(self._buffer),
+            "last_event_id": self._last_event_id,
+            "total_published": self._total_published,
+            "total_dropped_subscribers": self._total_dropped
+        }
+
+
+# Global change stream instance
+change_stream = CustomerChangeStream()
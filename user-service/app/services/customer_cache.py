@@ -0,0 +1,429 @@
+"""
+Multi-tier cache for customer lookups
+In-process L1 in front of an optional L2 shared by every replica in Redis
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.rate_limited_log import RateLimitedLogger
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import WatchError
+except ImportError:  # L2 is optional: without redis-py only the L1 tier runs
+    aioredis = None
+    WatchError = None
+
+logger = logging.getLogger(__name__)
+
+# Result handed to coalesced callers when the lookup they waited for failed
+_FAILED = object()
+
+# fakeredis:// caches in one process share this server, like replicas share Redis
+_fake_server = None
+
+
+class CustomerCache:
+    """
+    Customer lookups by document or email, cached in two tiers (CUSTOMER_CACHE_ENABLED)
+
+    L1 is a bounded LRU per worker with a short TTL. L2, when
+    CUSTOMER_CACHE_REDIS_URL is set, keeps the same entries in Redis for
+    every replica. Customers are stored by document; an email entry only
+    points to a document and is checked against the customer's email on
+    read, so an update or delete invalidates a single key.
+
+    On update or delete, the key is removed from L2 and the document is
+    published on CUSTOMER_CACHE_CHANNEL; every replica drops it from its L1.
+    Without a shared Redis no other process hears about an invalidation, so
+    the cache refuses to start under several gunicorn workers; with a single
+    worker per replica, other replicas serve stale entries for up to the L1 TTL.
+
+    Misses are loaded once: concurrent misses for the same key in a worker
+    wait for the first one, and across replicas a short Redis lock lets one
+    load while the others wait for it to fill L2.
+
+    A load that overlapped an invalidation, in any replica, is returned but
+    not cached. Every invalidation bumps a version in Redis: one per
+    document, and an epoch shared by all of them for lookups by email, which
+    do not know the document before loading. The L2 write is a WATCH/MULTI
+    transaction that only goes through if the version read before the load
+    is unchanged. Document versions expire with the L2 TTL, so only a load
+    slower than that could still cache a stale customer.
+    """
+
+    def __init__(self):
+        self.l1_ttl = settings.CUSTOMER_CACHE_L1_TTL
+        self.l2_ttl = settings.CUSTOMER_CACHE_L2_TTL
+        self.max_entries = settings.CUSTOMER_CACHE_MAX_ENTRIES
+        self.redis_url = settings.CUSTOMER_CACHE_REDIS_URL
+        self.channel = settings.CUSTOMER_CACHE_CHANNEL
+        self.lock_ttl = settings.CUSTOMER_CACHE_LOCK_TTL_MS / 1000
+        self.prefix = f"{settings.SERVICE_NAME}:customer"
+        self.enabled = False
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> future of the lookup in flight
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Bumped on every invalidation; a load that sees it change is not cached
+        # in L1 (the versions in Redis cover L2)
+        self._generation = 0
+        self._origin = uuid.uuid4().hex
+        self._redis = None
+        self._listener: Optional[asyncio.Future] = None
+        self._subscribed = False
+        self._log = RateLimitedLogger(logger, settings.PROBE_LOG_INTERVAL)
+        self._hits = 0
+        self._l2_hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._coalesced = 0
+        self._lock_waits = 0
+        self._stale_loads = 0
+        self._invalidations_sent = 0
+        self._invalidations_received = 0
+        self._l2_errors = 0
+
+    # Keys
+
+    def _document_key(self, document: str) -> str:
+        return f"{self.prefix}:document:{document}"
+
+    def _email_key(self, email: str) -> str:
+        return f"{self.prefix}:email:{email}"
+
+    def _version_key(self, document: Optional[str]) -> str:
+        """Version bumped when `document` is invalidated, or the epoch bumped by any invalidation"""
+        return f"{self.prefix}:version:{document}" if document is not None else f"{self.prefix}:epoch"
+
+    # L1
+
+    def _l1_get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _l1_put(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.l1_ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _drop(self, document: str):
+        """Forget a customer in L1 (its email entries fail the check on read)"""
+        self._entries.pop(self._document_key(document), None)
+        self._generation += 1
+
+    # L2
+
+    async def _l2(self, command, default: Any = None) -> Any:
+        """Run a Redis command; L2 errors degrade to a miss instead of failing the request"""
+        try:
+            return await command
+        except Exception as e:
+            self._l2_errors += 1
+            self._log.warning("l2_error", f"Customer cache L2 unavailable: {e}")
+            return default
+
+    async def _read(self, key: str) -> Optional[Any]:
+        """Read a key from L1, then from L2 (copied into L1)"""
+        value = self._l1_get(key)
+        if value is not None or self._redis is None:
+            return value
+        generation = self._generation
+        raw = await self._l2(self._redis.get(key))
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._l2_hits += 1
+        if generation == self._generation:
+            self._l1_put(key, value)
+        return value
+
+    async def _cached(self, document: Optional[str], email: Optional[str]) -> Optional[Dict[str, Any]]:
+        if email is not None:
+            document = await self._read(self._email_key(email))
+            if document is None:
+                return None
+        customer = await self._read(self._document_key(document))
+        if customer is None or (email is not None and customer["email"] != email):
+            return None
+        return customer
+
+    async def _store_l2(self, customer: Dict[str, Any], version_key: str, version: Optional[str]) -> bool:
+        """
+        Write a loaded customer to L2 unless it was invalidated since `version` was read
+
+        Returns:
+            False if the version changed: the customer may be stale
+        """
+        async with self._redis.pipeline(transaction=True) as pipeline:
+            try:
+                await pipeline.watch(version_key)
+                if await pipeline.get(version_key) != version:
+                    return False
+                pipeline.multi()
+                pipeline.set(self._document_key(customer["document"]), json.dumps(customer), ex=self.l2_ttl)
+                pipeline.set(self._email_key(customer["email"]), json.dumps(customer["document"]), ex=self.l2_ttl)
+                await pipeline.execute()
+                return True
+            except WatchError:
+                # Invalidated between the check and the write
+                return False
+
+    async def _store(self, customer: Dict[str, Any], generation: int, version_key: str, version: Optional[str]):
+        """Cache a loaded customer in both tiers, unless an invalidation overlapped the load"""
+        if self._redis is not None and not await self._l2(self._store_l2(customer, version_key, version), True):
+            self._stale_loads += 1
+            return
+        if generation == self._generation:
+            self._l1_put(self._document_key(customer["document"]), customer)
+            self._l1_put(self._email_key(customer["email"]), customer["document"])
+
+    # Loading
+
+    async def _wait_for_fill(self, document: Optional[str], email: Optional[str], lock_key: str) -> Optional[Dict[str, Any]]:
+        """Wait for the replica holding the lock to fill L2, until it releases the lock or it expires"""
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+            customer = await self._cached(document, email)
+            if customer is not None:
+                return customer
+            if not await self._l2(self._redis.exists(lock_key), 0):
+                return None
+        return None
+
+    async def _fill(
+        self,
+        key: str,
+        document: Optional[str],
+        email: Optional[str],
+        load: Callable[[], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        generation = self._generation
+        locked = False
+        lock_key = f"{key}:lock"
+        locked_at = time.monotonic()
+        if self._redis is not None:
+            # Without L2 (error) there is no one to wait for: load right away
+            locked = await self._l2(self._redis.set(lock_key, self._origin, nx=True, px=int(self.lock_ttl * 1000)), True)
+            if not locked:
+                self._lock_waits += 1
+                customer = await self._wait_for_fill(document, email, lock_key)
+                if customer is not None:
+                    return customer
+        try:
+            version_key = self._version_key(document if email is None else None)
+            version = None
+            if self._redis is not None:
+                # Read before loading: an invalidation after this changes it
+                version = await self._l2(self._redis.get(version_key))
+            self._loads += 1
+            customer = load()
+            if customer is not None:
+                await self._store(customer, generation, version_key, version)
+            return customer
+        finally:
+            # Past its TTL the lock may already belong to another replica
+            if locked and time.monotonic() - locked_at < self.lock_ttl:
+                await self._l2(self._redis.delete(lock_key))
+
+    async def get(
+        self,
+        load: Callable[[], Optional[Dict[str, Any]]],
+        document: Optional[str] = None,
+        email: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a customer by document or by email
+
+        Args:
+            load: Reads the customer from the database as a JSON-serializable
+                dict (None if it does not exist); called on a miss
+            document: Customer document
+            email: Customer email (when looking up by email)
+
+        Returns:
+            Customer dict, or None if it does not exist
+        """
+        if not self.enabled:
+            return load()
+
+        customer = await self._cached(document, email)
+        if customer is not None:
+            self._hits += 1
+            return customer
+        self._misses += 1
+
+        key = self._email_key(email) if email is not None else self._document_key(document)
+        pending = self._loading.get(key)
+        if pending is not None:
+            self._coalesced += 1
+            result = await asyncio.shield(pending)
+            if result is not _FAILED:
+                return result
+            return await self._fill(key, document, email, load)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        result = _FAILED
+        try:
+            result = await self._fill(key, document, email, load)
+            return result
+        finally:
+            del self._loading[key]
+            future.set_result(result)
+
+    # Invalidation
+
+    async def invalidate(self, document: str):
+        """
+        Drop a customer from every tier and every replica after it was updated or deleted
+
+        Args:
+            document: Customer document
+        """
+        if not self.enabled:
+            return
+        self._drop(document)
+        self._invalidations_sent += 1
+        if self._redis is not None:
+            # Loads in flight anywhere see the versions change and skip L2
+            version_key = self._version_key(document)
+            pipeline = self._redis.pipeline(transaction=True)
+            pipeline.incr(version_key)
+            pipeline.expire(version_key, self.l2_ttl)
+            pipeline.incr(self._version_key(None))
+            pipeline.delete(self._document_key(document))
+            await self._l2(pipeline.execute())
+            await self._l2(self._redis.publish(self.channel, json.dumps({"origin": self._origin, "document": document})))
+
+    async def _listen(self):
+        """Apply invalidations published by other replicas"""
+        backoff = 1.0
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Invalidations sent while unsubscribed are lost: start over
+                self._entries.clear()
+                self._generation += 1
+                self._subscribed = True
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    invalidation = json.loads(message["data"])
+                    if invalidation["origin"] != self._origin:
+                        self._drop(invalidation["document"])
+                        self._invalidations_received += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._log.warning("l2_error", f"Customer cache invalidation channel lost, retrying in {backoff:.0f}s: {e}")
+            finally:
+                self._subscribed = False
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    # Lifecycle
+
+    def _connect(self):
+        global _fake_server
+        if self.redis_url.startswith("fakeredis://"):
+            import fakeredis
+
+            if _fake_server is None:
+                _fake_server = fakeredis.FakeServer()
+            return fakeredis.FakeAsyncRedis(server=_fake_server, decode_responses=True)
+        if aioredis is None:
+            logger.warning("CUSTOMER_CACHE_REDIS_URL is set but redis is not installed; customer cache runs L1 only")
+            return None
+        return aioredis.Redis.from_url(
+            self.redis_url,
+            decode_responses=True,
+            socket_timeout=settings.CUSTOMER_CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.CUSTOMER_CACHE_REDIS_TIMEOUT
+        )
+
+    def start(self):
+        """Enable the cache and subscribe to invalidations"""
+        if self.enabled:
+            return
+        if self.redis_url:
+            self._redis = self._connect()
+        shared = self._redis is not None and not self.redis_url.startswith("fakeredis://")
+        workers = settings.WEB_CONCURRENCY or os.cpu_count() or 1
+        if not shared and settings.GUNICORN_MASTER and workers > 1:
+            # Invalidations would only reach the worker that made them
+            logger.error(
+                f"Customer cache disabled: {workers} workers need a shared Redis (CUSTOMER_CACHE_REDIS_URL) "
+                f"to invalidate each other's L1"
+            )
+            self._redis = None
+            return
+        if self._redis is not None:
+            self._listener = asyncio.ensure_future(self._listen())
+        self.enabled = True
+        tiers = "L1 + Redis L2" if self._redis is not None else "L1 only"
+        logger.info(f"Customer cache started ({tiers}, L1 TTL {self.l1_ttl:.0f}s)")
+
+    async def stop(self):
+        """Disable the cache and close the Redis connection"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._entries.clear()
+        logger.info("Customer cache stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics for monitoring"""
+        return {
+            "enabled": self.enabled,
+            "l2": self._redis is not None,
+            "subscribed": self._subscribed,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "l2_hits": self._l2_hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "coalesced": self._coalesced,
+            "lock_waits": self._lock_waits,
+            "stale_loads": self._stale_loads,
+            "invalidations_sent": self._invalidations_sent,
+            "invalidations_received": self._invalidations_received,
+            "l2_errors": self._l2_errors
+        }
+
+
+# Global customer cache instance
+customer_cache = CustomerCache()
@@ -0,0 +1,145 @@
+"""
+Group commit for customer creation
+Coalesces concurrent create requests into shared transactions
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.customer import customer_crud
+from app.models.customer import Customer
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerGroupCommitter:
+    """
+    Background task committing customer creations in groups (GROUP_COMMIT_ENABLED)
+
+    A create request queues its customer and waits. The task takes the first
+    queued customer, keeps collecting for GROUP_COMMIT_WINDOW_MS or until
+    GROUP_COMMIT_MAX_BATCH customers, and inserts them in one transaction
+    with a SAVEPOINT per row. Every caller then gets its own result. While a
+    group is committing, the next one forms in the queue, so under load one
+    commit (and one WAL fsync) covers many rows.
+    """
+
+    def __init__(self):
+        self.window = settings.GROUP_COMMIT_WINDOW_MS / 1000
+        self.max_batch = settings.GROUP_COMMIT_MAX_BATCH
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Future] = None
+        self._total_batches = 0
+        self._total_rows = 0
+        self._largest_batch = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def create_customer(self, customer_data: Dict[str, Any]) -> Optional[Customer]:
+        """
+        Create a customer as part of the next group
+
+        Args:
+            customer_data: Customer fields
+
+        Returns:
+            Customer object once the group's commit lands, None if its row failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((customer_data, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        """Wait for a first customer, then gather more until the window closes or the group is full"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                raise
+        return batch
+
+    @staticmethod
+    def _commit(customers_data: List[Dict[str, Any]]) -> List[Optional[Customer]]:
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            return customer_crud.create_customers_batch(db, customers_data)
+        finally:
+            db.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                results = await loop.run_in_executor(None, self._commit, [data for data, _ in batch])
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Group commit of {len(batch)} customers failed: {e}")
+                results = [None] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                # The caller may have gone away (request cancelled)
+                if not future.done():
+                    future.set_result(result)
+            self._total_batches += 1
+            self._total_rows += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+    def start(self):
+        """Start the background committer"""
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Group commit started (window {self.window * 1000:.0f}ms, up to {self.max_batch} rows)")
+
+    async def stop(self):
+        """Stop the background committer (customers still queued get None)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            while self._queue is not None and not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result(None)
+            logger.info("Group commit stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get group commit statistics for monitoring"""
+        return {
+            "enabled": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "total_batches": self._total_batches,
+            "total_rows": self._total_rows,
+            "avg_batch_size": round(self._total_rows / self._total_batches, 2) if self._total_batches else None,
+            "largest_batch": self._largest_batch
+        }
+
+
+# Global group committer instance
+group_committer = CustomerGroupCommitter()
@@ -0,0 +1,117 @@
+"""
+Health snapshot maintained in the background
+Lets readiness and liveness probes answer from memory
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.database import check_database_connection, get_pool_status
+from app.core.startup import startup_state
+from app.services.service_client import service_client
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Periodically refreshes a snapshot of database connectivity, pool
+    headroom, dependency status and event loop lag
+
+    Probes only read the snapshot, so answering one costs no I/O.
+    """
+
+    def __init__(self):
+        self.interval = settings.HEALTH_SNAPSHOT_INTERVAL
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._updated_at: Optional[float] = None
+        self._loop_lag_ms = 0.0
+        self._task: Optional[asyncio.Future] = None
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Rebuild the snapshot
+
+        Returns:
+            The new snapshot
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        database_ok = await loop.run_in_executor(None, check_database_connection, False)
+        database_ms = round((loop.time() - started) * 1000, 2)
+
+        dependencies = service_client.get_dependency_snapshot()["services"]
+        self._snapshot = {
+            "database": {
+                "status": "connected" if database_ok else "disconnected",
+                "latency_ms": database_ms
+            },
+            "pool": get_pool_status(),
+            "dependencies": {
+                name: "healthy" if status.get("healthy") else "unhealthy"
+                for name, status in dependencies.items()
+            },
+            "loop_lag_ms": round(self._loop_lag_ms, 2)
+        }
+        self._updated_at = time.monotonic()
+        return self._snapshot
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last refresh, or None if never refreshed"""
+        if self._updated_at is None:
+            return None
+        return time.monotonic() - self._updated_at
+
+    def is_ready(self) -> bool:
+        """Ready when warm, the database answered and the snapshot is fresh"""
+        age = self.age()
+        return (
+            startup_state.ready
+            and self._snapshot is not None
+            and self._snapshot["database"]["status"] == "connected"
+            and age is not None
+            and age <= settings.HEALTH_SNAPSHOT_MAX_AGE
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current snapshot without doing any I/O"""
+        age = self.age()
+        return {
+            **(self._snapshot or {}),
+            "age_seconds": round(age, 3) if age is not None else None
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health snapshot refresh failed: {e}")
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._loop_lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+
+    def start(self):
+        """Start refreshing the snapshot in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info("Health monitor started")
+
+    async def stop(self):
+        """Stop refreshing the snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
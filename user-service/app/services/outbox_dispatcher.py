@@ -0,0 +1,118 @@
+"""
+Outbox dispatcher
+Delivers customer events from the outbox table to order-service in batches
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.outbox import outbox_crud
+from app.services.service_client import service_client
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """
+    Background task draining the customer outbox
+
+    Pending events are sent as one bulk POST per OUTBOX_BATCH_SIZE events or
+    every OUTBOX_FLUSH_INTERVAL_MS, whichever comes first. Failed batches are
+    retried with exponential backoff; events for the same customer are never
+    delivered out of order.
+
+    With OUTBOX_ENABLED off, only the retention purge runs (for the rows
+    kept as the change stream's resume log).
+    """
+
+    def __init__(self):
+        self.batch_size = settings.OUTBOX_BATCH_SIZE
+        self.flush_interval = settings.OUTBOX_FLUSH_INTERVAL_MS / 1000
+        self._task: Optional[asyncio.Future] = None
+        self._last_purge = 0.0
+
+    async def dispatch_once(self) -> int:
+        """
+        Deliver one batch of pending events
+
+        Returns:
+            Number of events delivered
+        """
+        loop = asyncio.get_running_loop()
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            # Claiming commits, so no lock or transaction is held across the POST
+            events = await loop.run_in_executor(None, outbox_crud.claim_pending_events, db, self.batch_size)
+            if not events:
+                return 0
+
+            messages = [outbox_crud.to_message(event) for event in events]
+            delivered = await service_client.notify_order_service_batch(messages)
+
+            if delivered:
+                await loop.run_in_executor(None, outbox_crud.mark_dispatched, db, events)
+                logger.info(f"Dispatched {len(events)} outbox events")
+                return len(events)
+
+            await loop.run_in_executor(None, outbox_crud.mark_failed, db, events, "order-service notification failed")
+            logger.warning(f"Outbox batch of {len(events)} events failed, scheduled for retry")
+            return 0
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Outbox dispatch error: {e}")
+            return 0
+        finally:
+            db.close()
+
+    async def _purge_if_due(self):
+        if time.monotonic() - self._last_purge < 3600:
+            return
+        self._last_purge = time.monotonic()
+        loop = asyncio.get_running_loop()
+        db = SessionLocal()
+        try:
+            retention = timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+            pending_retention = timedelta(hours=settings.OUTBOX_PENDING_RETENTION_HOURS)
+            await loop.run_in_executor(None, outbox_crud.purge_dispatched, db, retention, pending_retention)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                delivered = await self.dispatch_once() if settings.OUTBOX_ENABLED else 0
+                await self._purge_if_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox dispatcher loop error: {e}")
+                delivered = 0
+            # A full batch means more events are probably waiting
+            if delivered < self.batch_size:
+                await asyncio.sleep(self.flush_interval if settings.OUTBOX_ENABLED else 60)
+
+    def start(self):
+        """Start the background dispatcher"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info("Outbox dispatcher started")
+
+    async def stop(self):
+        """Stop the background dispatcher"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox dispatcher stopped")
+
+
+# Global outbox dispatcher instance
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,237 @@
+"""
+Resilience primitives for inter-service communication
+Circuit breakers, retry budgets, jittered backoff and latency tracking
+"""
+import random
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+    def __init__(self, service_name: str):
+        super().__init__(f"Circuit breaker open for {service_name}")
+        self.service_name = service_name
+
+
+class CircuitBreaker:
+    """
+    Per-service circuit breaker (closed -> open -> half-open -> closed)
+
+    The breaker opens after `failure_threshold` consecutive failures and
+    rejects calls until `recovery_timeout` seconds have passed. It then lets
+    up to `half_open_max_calls` trial calls through; one success closes it,
+    one failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Counters for monitoring
+        self._total_successes = 0
+        self._total_failures = 0
+        self._total_rejected = 0
+        self._last_state_change = time.time()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the timeout expires"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, new_state: str):
+        self._state = new_state
+        self._last_state_change = time.time()
+        if new_state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if new_state != self.HALF_OPEN:
+            self._half_open_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed
+
+        Returns:
+            True if the call is allowed, False if it must be rejected
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        self._total_rejected += 1
+        return False
+
+    def release_trial(self):
+        """Give back a half-open trial slot for a call that never completed (cancelled)"""
+        if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def record_success(self):
+        """Record a successful call"""
+        self._total_successes += 1
+        self._consecutive_failures = 0
+        if self._state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Record a failed call"""
+        self._total_failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+        elif self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get breaker state for monitoring
+
+        Returns:
+            Dictionary with state and counters
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "total_successes": self._total_successes,
+            "total_failures": self._total_failures,
+            "total_rejected": self._total_rejected,
+            "last_state_change": self._last_state_change
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket limiting how many retries (and hedges) a service may receive
+
+    Tokens refill continuously at `refill_rate` per second up to `capacity`.
+    Each retry spends one token, so a struggling dependency never receives
+    more than a bounded amount of extra load.
+    """
+
+    def __init__(self, capacity: float = 10.0, refill_rate: float = 1.0):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._total_denied = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+
+    def try_acquire(self) -> bool:
+        """
+        Spend one token if available
+
+        Returns:
+            True if a token was spent, False if the budget is exhausted
+        """
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self._total_denied += 1
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get budget state for monitoring"""
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "capacity": self.capacity,
+            "refill_rate": self.refill_rate,
+            "total_denied": self._total_denied
+        }
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies used to derive hedge delays"""
+
+    def __init__(
+        self,
+        window_size: int = 200,
+        min_samples: int = 20,
+        default_delay: float = 0.5,
+        min_delay: float = 0.05
+    ):
+        self._samples = deque(maxlen=window_size)
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+
+    def record(self, seconds: float):
+        """Record the latency of a successful call"""
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Get a latency percentile from the window
+
+        Args:
+            fraction: Percentile as a fraction (0.95 for p95)
+
+        Returns:
+            Latency in seconds, or 0.0 if there are no samples
+        """
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    def hedge_delay(self) -> float:
+        """Delay before sending a hedged request, based on the observed p95"""
+        if len(self._samples) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.percentile(0.95))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get latency statistics for monitoring"""
+        return {
+            "samples": len(self._samples),
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 2)
+        }
+
+
+def compute_backoff(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Delay in seconds, uniformly drawn from [0, min(cap, base * 2^attempt)]
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
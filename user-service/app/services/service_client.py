@@ -5,94 +5,332 @@ Handles inter-service communication using Consul service discovery
 import aiohttp
 import asyncio
 import json
+import logging
+import time
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
-from app.utils.consul import consul_service
+from app.utils.consul import async_consul_service
 from app.core.config import settings
-from app.core.logger import logger
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    LatencyTracker,
+    RetryBudget,
+    compute_backoff
+)
+from app.services.token_cache import TokenValidationCache
+
+logger = logging.getLogger(__name__)
+
+# Methods that may be sent again after a timeout without duplicating effects
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class ServiceHTTPError(Exception):
+    """Raised when a discovered service answers with an HTTP error status"""
+
+    def __init__(self, status: int, error_text: str):
+        super().__init__(f"HTTP {status}: {error_text}")
+        self.status = status
 
 
 class ServiceClient:
     """HTTP client for inter-service communication with service discovery"""
     
     def __init__(self):
-        self.timeout = aiohttp.ClientTimeout(total=30)
+        self.timeout = aiohttp.ClientTimeout(total=settings.SERVICE_CLIENT_TIMEOUT)
         self.headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'user-service/1.0'
         }
+        self.max_retries = settings.SERVICE_CLIENT_MAX_RETRIES
+        
+        # Per-service resilience state
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._retry_budgets: Dict[str, RetryBudget] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        
+        # Dependency health cache and background refresher
+        self._health_cache: Dict[str, Dict[str, Any]] = {}
+        self._health_cache_updated_at: Optional[float] = None
+        self._health_refresh: Optional[asyncio.Future] = None
+        self._health_monitor: Optional[asyncio.Future] = None
+        self._health_session: Optional[aiohttp.ClientSession] = None
+        
+        # Auth token validation cache
+        self.token_cache = TokenValidationCache(
+            max_ttl=settings.AUTH_CACHE_MAX_TTL,
+            negative_ttl=settings.AUTH_CACHE_NEGATIVE_TTL,
+            max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+        )
     
-    async def _make_service_request(
+    def _get_breaker(self, service_name: str) -> CircuitBreaker:
+        """Get (or lazily create) the circuit breaker for a service"""
+        breaker = self._breakers.get(service_name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                service_name,
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+                half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
+            )
+            self._breakers[service_name] = breaker
+        return breaker
+    
+    def _get_retry_budget(self, service_name: str) -> RetryBudget:
+        """Get (or lazily create) the retry budget for a service"""
+        budget = self._retry_budgets.get(service_name)
+        if budget is None:
+            budget = RetryBudget(
+                capacity=settings.RETRY_BUDGET_CAPACITY,
+                refill_rate=settings.RETRY_BUDGET_REFILL_RATE
+            )
+            self._retry_budgets[service_name] = budget
+        return budget
+    
+    def _get_latency_tracker(self, service_name: str) -> LatencyTracker:
+        """Get (or lazily create) the latency tracker for a service"""
+        tracker = self._latencies.get(service_name)
+        if tracker is None:
+            tracker = LatencyTracker(
+                window_size=settings.HEDGE_LATENCY_WINDOW,
+                min_samples=settings.HEDGE_MIN_SAMPLES,
+                default_delay=settings.HEDGE_DEFAULT_DELAY,
+                min_delay=settings.HEDGE_MIN_DELAY
+            )
+            self._latencies[service_name] = tracker
+        return tracker
+    
+    async def _send_request(
         self,
         service_name: str,
         endpoint: str,
         method: str = 'GET',
         data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a single HTTP request to a discovered service (no retries)
+        
+        Args:
+            service_name: Name of the service to call
+            endpoint: API endpoint to call
+            method: HTTP method (GET, POST, etc.)
+            data: Request body data
+            
+        Returns:
+            Response data as dictionary
+            
+        Raises:
+            ServiceHTTPError: If the service answers with an error status
+            Exception: If service discovery or the request fails
+        """
+        # Discover the service
+        service_info = await async_consul_service.get_service(service_name)
+        if not service_info:
+            raise Exception(f"Service {service_name} not found in Consul")
+        
+        # Build URL
+        url = f"http://{service_info['address']}:{service_info['port']}{endpoint}"
+        logger.info(f"Making {method} request to {service_name}: {url}")
+        
+        # Prepare request data
+        json_data = None
+        if data and method.upper() in ['POST', 'PUT', 'PATCH']:
+            json_data = data
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        
+        # Make the request
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            async with session.request(
+                method.upper(),
+                url,
+                headers=self.headers,
+                json=json_data
+            ) as response:
+                
+                if response.status >= 400:
+                    error_text = await response.text()
+                    raise ServiceHTTPError(response.status, error_text)
+                
+                # Try to parse JSON response
+                try:
+                    result = await response.json()
+                except:
+                    # If not JSON, return text
+                    text_response = await response.text()
+                    result = {"response": text_response}
+        
+        self._get_latency_tracker(service_name).record(loop.time() - started)
+        return result
+    
+    async def _send_hedged_request(
+        self,
+        service_name: str,
+        endpoint: str,
+        method: str = 'GET',
+        data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a request and, if it has not answered within the observed p95,
+        send a second identical request and take whichever answers first
+        
+        Only safe for idempotent requests. The hedge spends a token from the
+        service's retry budget, so hedging backs off when the budget is empty.
+        """
+        delay = self._get_latency_tracker(service_name).hedge_delay()
+        primary = asyncio.ensure_future(self._send_request(service_name, endpoint, method, data))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._get_retry_budget(service_name).try_acquire():
+                return await primary
+            
+            logger.info(f"Hedging {method} {endpoint} to {service_name} after {delay * 1000:.0f} ms")
+            hedge = asyncio.ensure_future(self._send_request(service_name, endpoint, method, data))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # Also reached when the caller is cancelled: no request outlives it
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _make_service_request(
+        self,
+        service_name: str,
+        endpoint: str,
+        method: str = 'GET',
+        data: Optional[Dict[str, Any]] = None,
+        hedge: bool = False,
+        retry: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Make HTTP request to a discovered service
         
+        Calls go through the service's circuit breaker. Failed attempts
+        (connection errors, timeouts, 5xx) of idempotent methods are retried
+        with jittered exponential backoff while the service's retry budget
+        allows it. Other methods are only retried when the connection could
+        not be established, since a timed-out request may have been applied.
+        
         Args:
             service_name: Name of the service to call
             endpoint: API endpoint to call
             method: HTTP method (GET, POST, etc.)
             data: Request body data
+            hedge: Send a hedged request if the first one is slow (GET only)
+            retry: Retry any failed attempt (defaults to True for idempotent methods)
             
         Returns:
             Response data as dictionary
             
         Raises:
+            CircuitBreakerOpenError: If the service's circuit breaker is open
             Exception: If service discovery or request fails
         """
+        breaker = self._get_breaker(service_name)
+        budget = self._get_retry_budget(service_name)
+        use_hedge = hedge and settings.HEDGE_REQUESTS_ENABLED and method.upper() == 'GET'
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        last_error: Optional[Exception] = None
+        
         try:
-            # Discover the service
-            service_info = consul_service.get_service(service_name)
-            if not service_info:
-                raise Exception(f"Service {service_name} not found in Consul")
-            
-            # Build URL
-            url = f"http://{service_info['address']}:{service_info['port']}{endpoint}"
-            logger.info(f"Making {method} request to {service_name}: {url}")
-            
-            # Prepare request data
-            json_data = None
-            if data and method.upper() in ['POST', 'PUT', 'PATCH']:
-                json_data = data
-            
-            # Make the request
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.request(
-                    method.upper(),
-                    url,
-                    headers=self.headers,
-                    json=json_data
-                ) as response:
-                    
-                    if response.status >= 400:
-                        error_text = await response.text()
-                        raise Exception(f"HTTP {response.status}: {error_text}")
-                    
-                    # Try to parse JSON response
-                    try:
-                        return await response.json()
-                    except:
-                        # If not JSON, return text
-                        text_response = await response.text()
-                        return {"response": text_response}
-                    
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0:
+                    if not retry and not isinstance(last_error, aiohttp.ClientConnectorError):
+                        break
+                    if not budget.try_acquire():
+                        logger.warning(f"Retry budget exhausted for {service_name}, not retrying")
+                        break
+                    delay = compute_backoff(
+                        attempt - 1,
+                        settings.SERVICE_CLIENT_BACKOFF_BASE,
+                        settings.SERVICE_CLIENT_BACKOFF_MAX
+                    )
+                    logger.info(f"Retrying {service_name} in {delay:.2f}s (attempt {attempt + 1})")
+                    await asyncio.sleep(delay)
+                
+                trial = breaker.state == CircuitBreaker.HALF_OPEN
+                if not breaker.allow_request():
+                    if last_error is None:
+                        raise CircuitBreakerOpenError(service_name)
+                    break
+                
+                try:
+                    if use_hedge:
+                        result = await self._send_hedged_request(service_name, endpoint, method, data)
+                    else:
+                        result = await self._send_request(service_name, endpoint, method, data)
+                except ServiceHTTPError as e:
+                    if e.status < 500:
+                        # The service answered; client errors are not retried
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    last_error = e
+                except asyncio.CancelledError:
+                    # Neither a success nor a failure: free the trial slot
+                    if trial:
+                        breaker.release_trial()
+                    raise
+                except Exception as e:
+                    breaker.record_failure()
+                    last_error = e
+                else:
+                    breaker.record_success()
+                    return result
+            
+            raise last_error
+            
         except Exception as e:
             logger.error(f"Service call to {service_name} failed: {e}")
             raise
     
+    def get_circuit_breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get circuit breaker, retry budget and latency state per service
+        
+        Returns:
+            Dictionary keyed by service name
+        """
+        states = {}
+        for service_name, breaker in self._breakers.items():
+            states[service_name] = {
+                "circuit_breaker": breaker.snapshot(),
+                "retry_budget": self._get_retry_budget(service_name).snapshot(),
+                "latency": self._get_latency_tracker(service_name).snapshot()
+            }
+        return states
+    
     async def validate_auth_token(self, token: str) -> Dict[str, Any]:
         """
         Validate authentication token with login service
         
+        Results are cached locally (see TokenValidationCache); only cache
+        misses reach login-service.
+        
         Args:
             token: JWT token to validate
             
         Returns:
             Validation result with user info
         """
+        if settings.AUTH_CACHE_ENABLED:
+            cached = self.token_cache.get(token)
+            if cached is not None:
+                return cached
+        
         try:
             logger.info("Validating auth token with login-service")
             
@@ -103,15 +341,52 @@ class ServiceClient:
                 {'token': token}
             )
             
-            return {
+            validation = {
                 'valid': result.get('valid', False),
                 'user_id': result.get('user_id'),
                 'email': result.get('email')
             }
             
+        except ServiceHTTPError as e:
+            if e.status >= 500:
+                logger.error(f"Auth token validation failed: {e}")
+                return {'valid': False}
+            # login-service rejected the token (401/4xx): cache the answer
+            logger.info(f"Auth token rejected by login-service: HTTP {e.status}")
+            if settings.AUTH_CACHE_ENABLED:
+                self.token_cache.set_invalid(token)
+            return {'valid': False}
         except Exception as e:
+            # Transport failures are not cached; the next call asks again
             logger.error(f"Auth token validation failed: {e}")
             return {'valid': False}
+        
+        if settings.AUTH_CACHE_ENABLED:
+            if validation['valid']:
+                self.token_cache.set_valid(token, validation, result.get('expires_at'))
+            else:
+                self.token_cache.set_invalid(token)
+        
+        return validation
+    
+    def invalidate_auth_token(self, token: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """
+        Invalidation hook for logout events
+        
+        Args:
+            token: Token that was logged out
+            user_id: User whose tokens should all be dropped
+            
+        Returns:
+            Number of cache entries removed
+        """
+        removed = 0
+        if token:
+            removed += int(self.token_cache.invalidate(token))
+        if user_id:
+            removed += self.token_cache.invalidate_user(user_id)
+        logger.info(f"Invalidated {removed} cached auth token(s)")
+        return removed
     
     async def notify_order_service(self, user_id: str, event: str, data: Dict[str, Any]) -> bool:
         """
@@ -136,7 +411,7 @@ class ServiceClient:
                     'user_id': user_id,
                     'event': event,
                     'data': data,
-                    'timestamp': settings.get_current_timestamp()
+                    'timestamp': datetime.now(timezone.utc).isoformat()
                 }
             )
             
@@ -148,37 +423,143 @@ class ServiceClient:
             logger.warning(f"Failed to notify order service: {e}")
             return False
     
-    async def check_service_health(self, service_name: str) -> bool:
+    async def notify_order_service_batch(self, events: List[Dict[str, Any]]) -> bool:
         """
-        Check if a service is healthy
+        Deliver a batch of user events to order service in a single request
+        
+        Used by the outbox dispatcher; events are ordered by event_id.
         
         Args:
-            service_name: Name of the service to check
+            events: Event messages (event_id, user_id, event, data, timestamp)
             
         Returns:
-            True if service is healthy, False otherwise
+            True if the batch was accepted, False otherwise
         """
         try:
-            await self._make_service_request(service_name, '/health', 'GET')
+            logger.info(f"Sending {len(events)} user events to order-service")
+            
+            await self._make_service_request(
+                'order-service',
+                settings.OUTBOX_BULK_ENDPOINT,
+                'POST',
+                {'events': events}
+            )
             return True
-        except:
+            
+        except Exception as e:
+            logger.warning(f"Failed to deliver event batch to order service: {e}")
             return False
     
+    async def check_service_health(
+        self,
+        service_name: str,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Check if a service is healthy
+        
+        Health checks bypass retries, hedging and the circuit breaker and
+        are bounded by a short deadline so a slow dependency cannot stall
+        the caller.
+        
+        Args:
+            service_name: Name of the service to check
+            timeout: Deadline in seconds (defaults to DEPENDENCY_HEALTH_TIMEOUT)
+            
+        Returns:
+            Dictionary with health flag, latency and error (if any)
+        """
+        deadline = timeout if timeout is not None else settings.DEPENDENCY_HEALTH_TIMEOUT
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        status = {
+            "healthy": False,
+            "checked_at": time.time(),
+            "latency_ms": None,
+            "error": None
+        }
+        try:
+            await asyncio.wait_for(self._probe_health(service_name), timeout=deadline)
+            status["healthy"] = True
+        except asyncio.TimeoutError:
+            status["error"] = f"timed out after {deadline}s"
+        except Exception as e:
+            status["error"] = str(e)
+        status["latency_ms"] = round((loop.time() - started) * 1000, 2)
+        return status
+    
+    async def _probe_health(self, service_name: str):
+        """Single GET /health against a service using the shared health session"""
+        service_info = await async_consul_service.get_service(service_name)
+        if not service_info:
+            raise Exception(f"Service {service_name} not found in Consul")
+        
+        if self._health_session is None or self._health_session.closed:
+            self._health_session = aiohttp.ClientSession(headers=self.headers)
+        
+        url = f"http://{service_info['address']}:{service_info['port']}/health"
+        async with self._health_session.get(url) as response:
+            if response.status >= 400:
+                raise ServiceHTTPError(response.status, await response.text())
+    
+    async def refresh_dependency_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Check all dependencies concurrently and update the cached snapshot
+        
+        Concurrent callers share a single in-flight refresh.
+        
+        Returns:
+            Health status keyed by service name
+        """
+        if self._health_refresh is None or self._health_refresh.done():
+            self._health_refresh = asyncio.ensure_future(self._refresh_dependency_health())
+        return await asyncio.shield(self._health_refresh)
+    
+    async def _refresh_dependency_health(self) -> Dict[str, Dict[str, Any]]:
+        services = settings.DEPENDENCY_SERVICES
+        results = await asyncio.gather(*(self.check_service_health(service) for service in services))
+        self._health_cache.update(zip(services, results))
+        self._health_cache_updated_at = time.monotonic()
+        return dict(self._health_cache)
+    
+    def get_dependency_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the last known dependency health without doing any I/O
+        
+        Returns:
+            Snapshot with per-service status and its age in seconds
+        """
+        age = None
+        if self._health_cache_updated_at is not None:
+            age = round(time.monotonic() - self._health_cache_updated_at, 3)
+        return {
+            "services": dict(self._health_cache),
+            "age_seconds": age,
+            "refresh_interval": settings.DEPENDENCY_HEALTH_REFRESH_INTERVAL
+        }
+    
     async def get_available_services(self) -> List[str]:
         """
         Get list of available and healthy services
         
+        Results are served from the cache while younger than
+        DEPENDENCY_HEALTH_CACHE_TTL; otherwise all services are checked
+        concurrently.
+        
         Returns:
             List of service names that are available
         """
         try:
-            services = ['login-service', 'order-service']
-            available_services = []
+            fresh = (
+                self._health_cache_updated_at is not None
+                and time.monotonic() - self._health_cache_updated_at < settings.DEPENDENCY_HEALTH_CACHE_TTL
+            )
+            statuses = self._health_cache if fresh else await self.refresh_dependency_health()
             
-            for service in services:
-                is_healthy = await self.check_service_health(service)
-                if is_healthy:
-                    available_services.append(service)
+            available_services = [
+                service for service in settings.DEPENDENCY_SERVICES
+                if statuses.get(service, {}).get("healthy")
+            ]
             
             logger.info(f"Available services: {available_services}")
             return available_services
@@ -187,6 +568,36 @@ class ServiceClient:
             logger.error(f"Failed to check available services: {e}")
             return []
     
+    async def _dependency_monitor_loop(self):
+        """Refresh the dependency snapshot in the background"""
+        while True:
+            try:
+                await self.refresh_dependency_health()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dependency health refresh failed: {e}")
+            await asyncio.sleep(settings.DEPENDENCY_HEALTH_REFRESH_INTERVAL)
+    
+    def start_dependency_monitor(self):
+        """Start the background dependency health refresher"""
+        if self._health_monitor is None or self._health_monitor.done():
+            self._health_monitor = asyncio.ensure_future(self._dependency_monitor_loop())
+            logger.info("Dependency health monitor started")
+    
+    async def stop_dependency_monitor(self):
+        """Stop the background refresher and close the shared health session"""
+        if self._health_monitor is not None:
+            self._health_monitor.cancel()
+            try:
+                await self._health_monitor
+            except asyncio.CancelledError:
+                pass
+            self._health_monitor = None
+        if self._health_session is not None:
+            await self._health_session.close()
+            self._health_session = None
+    
     async def get_user_orders(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get user's orders from order service
@@ -203,7 +614,8 @@ class ServiceClient:
             result = await self._make_service_request(
                 'order-service',
                 f'/order/user/{user_id}',
-                'GET'
+                'GET',
+                hedge=True
             )
             
             return result.get('orders', [])
@@ -0,0 +1,155 @@
+"""
+Local cache for auth token validation results
+Avoids a login-service round trip for every authenticated request
+"""
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def _parse_expiry(value: Any) -> Optional[float]:
+    """
+    Parse an expiry value into an epoch timestamp
+
+    Accepts epoch seconds (int/float/numeric string) or ISO 8601 strings.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """
+    Read the `exp` claim of a JWT without verifying it
+
+    Only used to bound how long a validation result may be cached; the
+    token itself has already been validated by login-service.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return _parse_expiry(claims.get("exp"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenValidationCache:
+    """
+    Bounded LRU cache of token validation results keyed by SHA-256 of the token
+
+    Valid tokens are cached until the earlier of the token's own expiry and
+    `max_ttl`. Invalid tokens are cached for `negative_ttl` so that repeated
+    bad tokens do not hammer login-service. Raw tokens are never stored.
+    """
+
+    def __init__(self, max_ttl: float = 60.0, negative_ttl: float = 5.0, max_entries: int = 10000):
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, result)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached validation result
+
+        Returns:
+            Cached result, or None on a miss or expired entry
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        expires_at, result = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return dict(result)
+
+    def _store(self, token: str, result: Dict[str, Any], ttl: float):
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (time.time() + ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set_valid(self, token: str, result: Dict[str, Any], expires_at: Any = None):
+        """
+        Cache a positive validation result
+
+        Args:
+            token: Validated token
+            result: Validation result to cache
+            expires_at: Token expiry reported by login-service (epoch or ISO 8601)
+        """
+        ttl = self.max_ttl
+        expiry = _parse_expiry(expires_at) or _jwt_expiry(token)
+        if expiry is not None:
+            ttl = min(ttl, expiry - time.time())
+        self._store(token, result, ttl)
+
+    def set_invalid(self, token: str):
+        """Cache a negative validation result for a short time"""
+        self._store(token, {"valid": False}, self.negative_ttl)
+
+    def invalidate(self, token: str) -> bool:
+        """
+        Drop the cached result for a token (e.g. on logout)
+
+        Returns:
+            True if an entry was removed
+        """
+        return self._entries.pop(self._key(token), None) is not None
+
+    def invalidate_user(self, user_id: str) -> int:
+        """
+        Drop every cached result belonging to a user
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [key for key, (_, result) in self._entries.items() if result.get("user_id") == user_id]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics for monitoring"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses
+        }
@@ -0,0 +1,74 @@
+"""
+Tombstone purger
+Expires the deleted-customer tombstones kept for the change feed
+"""
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.customer import customer_crud
+
+logger = logging.getLogger(__name__)
+
+
+class TombstonePurger:
+    """
+    Background task deleting tombstones older than CUSTOMER_TOMBSTONE_RETENTION_DAYS
+
+    Runs hourly in one worker (the leader). Each purge moves the change
+    feed horizon, so consumers that fell further behind resync instead of
+    missing deletions.
+    """
+
+    def __init__(self):
+        self.interval = 3600  # seconds
+        self._task: Optional[asyncio.Future] = None
+
+    async def purge_once(self) -> int:
+        """
+        Delete the tombstones past the retention window
+
+        Returns:
+            Number of deleted tombstones
+        """
+        loop = asyncio.get_running_loop()
+        db = SessionLocal()
+        try:
+            retention = timedelta(days=settings.CUSTOMER_TOMBSTONE_RETENTION_DAYS)
+            return await loop.run_in_executor(None, customer_crud.purge_tombstones, db, retention)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tombstone purge error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background purge"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Tombstone purger started ({settings.CUSTOMER_TOMBSTONE_RETENTION_DAYS} day retention)")
+
+    async def stop(self):
+        """Stop the background purge"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Tombstone purger stopped")
+
+
+# Global tombstone purger instance
+tombstone_purger = TombstonePurger()
@@ -1,17 +1,22 @@
 """
 Consul service discovery integration
 """
+import aiohttp
 import consul
 import logging
 import asyncio
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class ConsulService:
-    """Consul service discovery client"""
+    """
+    Synchronous Consul service discovery client
+    
+    Blocking; kept for scripts. Async code uses AsyncConsulService.
+    """
     
     def __init__(self):
         self.consul_client = None
@@ -187,21 +192,295 @@ class ConsulService:
 consul_service = ConsulService()
 
 
-async def register_with_consul():
+class AsyncConsulService:
+    """
+    Non-blocking Consul client using the agent HTTP API
+
+    Used from async code (startup, service discovery) so that Consul calls
+    never block the event loop.
+    """
+    
+    def __init__(self):
+        self.base_url = settings.consul_url
+        self.service_id = f"{settings.SERVICE_NAME}-{settings.SERVICE_PORT}"
+        self.timeout = aiohttp.ClientTimeout(total=settings.CONSUL_REQUEST_TIMEOUT)
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    @property
+    def check_id(self) -> str:
+        """ID Consul assigns to the check embedded in the service registration"""
+        return f"service:{self.service_id}"
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+    
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """
+        Call the Consul HTTP API
+        
+        Raises:
+            Exception: If Consul answers with an error status
+        """
+        async with self._get_session().request(method, f"{self.base_url}{path}", **kwargs) as response:
+            if response.status >= 400:
+                error_text = await response.text()
+                raise Exception(f"Consul HTTP {response.status}: {error_text}")
+            if response.content_type == "application/json":
+                return await response.json()
+            return await response.text()
+    
+    def _build_check(self) -> Dict[str, Any]:
+        """Health check definition for the configured check mode"""
+        if settings.CONSUL_CHECK_MODE == "ttl":
+            # The service pushes its own status; Consul never probes it
+            return {
+                "TTL": f"{settings.CONSUL_TTL_SECONDS}s",
+                "DeregisterCriticalServiceAfter": "1m"
+            }
+        return {
+            "HTTP": f"http://user-service:{settings.SERVICE_PORT}/health",
+            "Interval": f"{settings.HEALTH_CHECK_INTERVAL}s",
+            "Timeout": "10s",
+            "DeregisterCriticalServiceAfter": "30s"
+        }
+    
+    async def register_service(self) -> bool:
+        """
+        Register this service with Consul
+        
+        Returns:
+            True if registration successful, False otherwise
+        """
+        try:
+            service_data = {
+                "ID": self.service_id,
+                "Name": settings.SERVICE_NAME,
+                "Tags": ["user", "api", "microservice", "python", "fastapi"],
+                "Address": "user-service",  # Container name for internal communication
+                "Port": settings.SERVICE_PORT,
+                "Check": self._build_check()
+            }
+            await self._request("PUT", "/v1/agent/service/register", json=service_data)
+            logger.info(f"Service registered successfully: {self.service_id} ({settings.CONSUL_CHECK_MODE} check)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error registering service with Consul: {e}")
+            return False
+    
+    async def deregister_service(self) -> bool:
+        """
+        Deregister this service from Consul
+        
+        Returns:
+            True if deregistration successful, False otherwise
+        """
+        try:
+            await self._request("PUT", f"/v1/agent/service/deregister/{self.service_id}")
+            logger.info(f"Service deregistered successfully: {self.service_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deregistering service from Consul: {e}")
+            return False
+    
+    async def get_service(self, service_name: str) -> Optional[dict]:
+        """
+        Get service information from Consul
+        
+        Args:
+            service_name: Name of the service to find
+            
+        Returns:
+            Service information if found, None otherwise
+        """
+        try:
+            services = await self._request("GET", f"/v1/health/service/{service_name}", params={"passing": "true"})
+            
+            if services:
+                service = services[0]
+                logger.info(f"Service found: {service_name}")
+                return {
+                    "address": service["Service"]["Address"],
+                    "port": service["Service"]["Port"],
+                    "tags": service["Service"]["Tags"]
+                }
+            else:
+                logger.warning(f"Service not found: {service_name}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"Error getting service {service_name} from Consul: {e}")
+            return None
+    
+    async def get_services(self) -> list:
+        """
+        Get all services registered with the local agent
+        
+        Returns:
+            List of available services
+        """
+        try:
+            services = await self._request("GET", "/v1/agent/services")
+            return [
+                {
+                    "id": service_id,
+                    "name": service_info["Service"],
+                    "address": service_info["Address"],
+                    "port": service_info["Port"],
+                    "tags": service_info["Tags"]
+                }
+                for service_id, service_info in services.items()
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error getting services from Consul: {e}")
+            return []
+    
+    async def is_consul_available(self) -> bool:
+        """
+        Check if Consul is available
+        
+        Returns:
+            True if Consul has a leader, False otherwise
+        """
+        try:
+            leader = await self._request("GET", "/v1/status/leader")
+            return bool(leader)
+        except Exception as e:
+            logger.error(f"Consul not available: {e}")
+            return False
+    
+    async def update_ttl_check(self, status: str, output: str = "") -> bool:
+        """
+        Push the status of this service's TTL check
+        
+        Args:
+            status: passing, warning or critical
+            output: Human readable detail shown in Consul
+            
+        Returns:
+            True if Consul accepted the update
+        """
+        try:
+            await self._request(
+                "PUT",
+                f"/v1/agent/check/update/{self.check_id}",
+                json={"Status": status, "Output": output}
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to update Consul TTL check: {e}")
+            return False
+    
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class ConsulHeartbeat:
+    """
+    Pushes TTL check updates reflecting real internal health
+
+    The reported status is derived from event loop lag (how late the
+    heartbeat's own sleep wakes up), connection pool headroom and
+    startup readiness.
+    """
+    
+    def __init__(self, client: AsyncConsulService):
+        self.client = client
+        self.interval = max(1.0, settings.CONSUL_TTL_SECONDS / 3)
+        self.last_loop_lag_ms = 0.0
+        self.last_status: Optional[str] = None
+        self._task: Optional[asyncio.Future] = None
+    
+    def evaluate(self) -> Tuple[str, str]:
+        """
+        Derive the check status from internal signals
+        
+        Returns:
+            Tuple of (status, output)
+        """
+        from app.core.database import get_pool_status
+        from app.core.startup import startup_state
+        
+        pool = get_pool_status()
+        lag = self.last_loop_lag_ms
+        output = f"loop_lag_ms={lag:.1f} pool_available={pool['available']} pool_checked_out={pool['checked_out']}"
+        
+        if not startup_state.ready:
+            return "critical", f"not ready ({startup_state.error or 'warming up'}); {output}"
+        if lag >= settings.CONSUL_LOOP_LAG_CRITICAL_MS:
+            return "critical", output
+        if lag >= settings.CONSUL_LOOP_LAG_WARNING_MS or pool["available"] == 0:
+            return "warning", output
+        return "passing", output
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                status, output = self.evaluate()
+                if await self.client.update_ttl_check(status, output) and status != self.last_status:
+                    logger.info(f"Consul TTL check is now {status}: {output}")
+                    self.last_status = status
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Consul heartbeat error: {e}")
+            
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_loop_lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+    
+    def start(self):
+        """Start pushing heartbeats"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Consul TTL heartbeat started (every {self.interval:.1f}s)")
+    
+    async def stop(self):
+        """Stop pushing heartbeats"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global async Consul client and heartbeat
+async_consul_service = AsyncConsulService()
+consul_heartbeat = ConsulHeartbeat(async_consul_service)
+
+
+async def register_with_consul(initial_delay: float = 5, heartbeat: bool = True):
     """
     Async function to register service with Consul
+    
+    Args:
+        initial_delay: Seconds to wait for Consul to be ready before the first attempt
+        heartbeat: Start the TTL heartbeat in this process (TTL check mode)
     """
     try:
         logger.info("Starting Consul registration...")
         
         # Wait a bit for Consul to be ready
-        await asyncio.sleep(5)
+        if initial_delay:
+            await asyncio.sleep(initial_delay)
         
         # Try to register service
         max_retries = 5
         for attempt in range(max_retries):
-            if consul_service.register_service():
+            if await async_consul_service.register_service():
                 logger.info("Successfully registered with Consul")
+                if heartbeat and settings.CONSUL_CHECK_MODE == "ttl":
+                    consul_heartbeat.start()
                 return True
             else:
                 logger.warning(f"Consul registration attempt {attempt + 1} failed, retrying...")
@@ -221,7 +500,9 @@ async def deregister_from_consul():
     """
     try:
         logger.info("Deregistering from Consul...")
-        consul_service.deregister_service()
+        await consul_heartbeat.stop()
+        await async_consul_service.deregister_service()
+        await async_consul_service.close()
         logger.info("Successfully deregistered from Consul")
     except Exception as e:
         logger.error(f"Error deregistering from Consul: {e}")
@@ -0,0 +1,31 @@
+"""
+Helpers for process-pool pipelines used by the data loading scripts
+"""
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator
+
+
+def bounded_map(pool: Executor, func: Callable, tasks: Iterable, window: int) -> Iterator:
+    """
+    Like pool.map(), but with at most `window` tasks in flight
+
+    Results are yielded in task order; keeping the window small bounds memory
+    to a few chunks no matter how large the input is.
+
+    Args:
+        pool: Executor running the tasks
+        func: Picklable callable applied to each task
+        tasks: Iterable of task arguments, consumed lazily
+        window: Maximum number of submitted but unconsumed tasks
+
+    Returns:
+        Iterator over func(task) results, in order
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
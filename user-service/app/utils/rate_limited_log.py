@@ -0,0 +1,48 @@
+"""
+Rate-limited logging for high-frequency events such as health probes
+"""
+import logging
+import time
+from typing import Dict, Tuple
+
+
+class RateLimitedLogger:
+    """
+    Emits a given message key at most once per interval
+
+    Suppressed occurrences are counted and reported with the next emitted
+    message, so probe traffic stays visible without flooding the logs.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 60.0):
+        self.logger = logger
+        self.interval = interval
+        # key -> (last emitted at, suppressed count)
+        self._state: Dict[str, Tuple[float, int]] = {}
+
+    def log(self, level: int, key: str, message: str):
+        """
+        Log a message unless the same key was logged within the interval
+
+        Args:
+            level: Logging level
+            key: Identifies the kind of message being rate-limited
+            message: Message to log
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        last, suppressed = self._state.get(key, (0.0, 0))
+        if last and now - last < self.interval:
+            self._state[key] = (last, suppressed + 1)
+            return
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        self._state[key] = (now, 0)
+        self.logger.log(level, message)
+
+    def info(self, key: str, message: str):
+        self.log(logging.INFO, key, message)
+
+    def warning(self, key: str, message: str):
+        self.log(logging.WARNING, key, message)
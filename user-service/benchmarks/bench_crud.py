@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+CRUD micro-benchmark suite for the User Service
+
+Measures every CustomerCRUD method, the customer endpoints (driven
+in-process through httpx's ASGI transport, no network), response
+serialization and the ORM vs Core read paths, at several table sizes. Results are written as JSON and can
+be stored as baselines and compared later to catch regressions.
+
+The database is taken from DATABASE_URL and the `customer` table is
+TRUNCATED before every table size - point it at a scratch database.
+
+Usage:
+    # Run and save a baseline
+    DATABASE_URL=postgresql://.../bench python benchmarks/bench_crud.py run \\
+        --sizes 1000 100000 1000000 --output benchmarks/baselines/main.json
+
+    # Compare a new run against the baseline (exit code 1 on regression)
+    python benchmarks/bench_crud.py compare benchmarks/baselines/main.json current.json --threshold 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_ROOT)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+def summarize(samples_ns):
+    """Statistics for a list of per-operation timings in nanoseconds"""
+    ordered = sorted(samples_ns)
+    median = statistics.median(ordered)
+    return {
+        "rounds": len(ordered),
+        "min_us": round(ordered[0] / 1000, 2),
+        "median_us": round(median / 1000, 2),
+        "mean_us": round(statistics.fmean(ordered) / 1000, 2),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] / 1000, 2),
+        "stddev_us": round(statistics.pstdev(ordered) / 1000, 2),
+        "ops_per_sec": round(1e9 / median, 1) if median else None,
+    }
+
+
+def measure(func, rounds, warmup):
+    """Time a synchronous callable"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - started)
+    return summarize(samples)
+
+
+async def measure_async(func, rounds, warmup):
+    """Time a coroutine function"""
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        await func()
+        samples.append(time.perf_counter_ns() - started)
+    return summarize(samples)
+
+
+def seed_customers(engine, size):
+    """Replace the contents of the customer table with `size` synthetic rows"""
+    from sqlalchemy import text
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM customer_outbox"))
+        if engine.dialect.name == "postgresql":
+            connection.execute(text("TRUNCATE customer"))
+            connection.execute(text(
+                "INSERT INTO customer (document, firstname, lastname, address, phone, email) "
+                "SELECT 'B' || lpad(g::text, 9, '0'), 'Nombre' || g, 'Apellido' || g, "
+                "'Calle ' || (g % 200) || ' #' || (g % 99) || '-' || (g % 97) || ', Bogotá', "
+                "'+57 300 ' || lpad(g::text, 7, '0'), 'bench' || g || '@example.com' "
+                "FROM generate_series(1, :size) AS g"
+            ), {"size": size})
+        else:
+            connection.execute(text("DELETE FROM customer"))
+            batch = []
+            for g in range(1, size + 1):
+                batch.append({
+                    "document": f"B{g:09d}", "firstname": f"Nombre{g}", "lastname": f"Apellido{g}",
+                    "address": f"Calle {g % 200} #{g % 99}-{g % 97}, Bogotá",
+                    "phone": f"+57 300 {g:07d}", "email": f"bench{g}@example.com",
+                })
+                if len(batch) == 10_000 or g == size:
+                    connection.execute(text(
+                        "INSERT INTO customer (document, firstname, lastname, address, phone, email) "
+                        "VALUES (:document, :firstname, :lastname, :address, :phone, :email)"
+                    ), batch)
+                    batch = []
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM ANALYZE customer"))
+
+
+def run_crud_cases(size, rounds, warmup, rng):
+    """Benchmark CustomerCRUD methods directly against the database"""
+    from app.core.database import SessionLocal
+    from app.crud.customer import customer_crud
+    from app.schemas.customer import CustomerUpdateDTO
+
+    results = {}
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        def random_document():
+            return f"B{rng.randint(1, size):09d}"
+
+        results["crud.get_customer_by_id"] = measure(
+            lambda: customer_crud.get_customer_by_id(db, random_document()), rounds, warmup)
+        results["crud.get_customer_by_email"] = measure(
+            lambda: customer_crud.get_customer_by_email(db, f"bench{rng.randint(1, size)}@example.com"), rounds, warmup)
+        results["crud.get_customer_row_by_id"] = measure(
+            lambda: customer_crud.get_customer_row_by_id(db, random_document()), rounds, warmup)
+        results["crud.get_customer_row_by_email"] = measure(
+            lambda: customer_crud.get_customer_row_by_email(db, f"bench{rng.randint(1, size)}@example.com"), rounds, warmup)
+
+        created = []
+
+        def create():
+            document = f"N{len(created):09d}"
+            created.append(document)
+            customer_crud.create_customer(db, {
+                "document": document, "firstname": "Nuevo", "lastname": "Cliente",
+                "address": "Calle 1 #2-3, Tunja", "phone": "+57 310 000 0000",
+                "email": f"new{document}@example.com",
+            })
+
+        results["crud.create_customer"] = measure(create, rounds, warmup)
+
+        update = CustomerUpdateDTO(address="Carrera 7 #8-9, Medellín")
+        results["crud.update_customer"] = measure(
+            lambda: customer_crud.update_customer(db, random_document(), update), rounds, warmup)
+
+        to_delete = list(created)
+        results["crud.delete_customer"] = measure(
+            lambda: customer_crud.delete_customer(db, to_delete.pop()), min(rounds, len(to_delete) - warmup), warmup)
+
+        limit = 100
+        for label, skip in (("first", 0), ("middle", size // 2), ("deep", max(0, size - limit))):
+            results[f"crud.get_all_customers.offset_{label}"] = measure(
+                lambda skip=skip: customer_crud.get_all_customers(db, skip=skip, limit=limit), rounds, warmup)
+            db.expunge_all()
+    finally:
+        db.close()
+    return results
+
+
+def run_serialization_cases(rounds, warmup):
+    """Benchmark turning ORM rows into response payloads"""
+    from app.core.database import SessionLocal
+    from app.crud.customer import customer_crud
+    from app.schemas.customer import CustomerFindResponseDTO, CustomerResponseDTO
+
+    results = {}
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        page = customer_crud.get_all_customers(db, skip=0, limit=100)
+        one = page[0]
+
+        def find_dto():
+            CustomerFindResponseDTO(
+                document=one.document, firstname=one.firstname, lastname=one.lastname,
+                address=one.address, phone=one.phone, email=one.email,
+            ).model_dump_json()
+
+        def response_dto():
+            CustomerResponseDTO.model_validate(one).model_dump_json()
+
+        def list_page():
+            json.dumps([{
+                "document": c.document, "firstname": c.firstname, "lastname": c.lastname,
+                "address": c.address, "phone": c.phone, "email": c.email,
+                "created_at": c.created_at.isoformat() if c.created_at else None,
+                "updated_at": c.updated_at.isoformat() if c.updated_at else None,
+            } for c in page])
+
+        results["serialize.find_response_dto"] = measure(find_dto, rounds, warmup)
+        results["serialize.customer_response_dto"] = measure(response_dto, rounds, warmup)
+        results["serialize.list_page_100"] = measure(list_page, rounds, warmup)
+    finally:
+        db.close()
+    return results
+
+
+def run_read_path_cases(size, rounds, warmup, rng):
+    """
+    ORM vs Core read path, as a request runs it: fresh session, lookup,
+    response DTO serialized to JSON
+    """
+    from app.core.database import SessionLocal
+    from app.crud.customer import customer_crud
+    from app.schemas.customer import CustomerFindResponseDTO
+
+    def read_path(lookup, key):
+        def run_once():
+            db = SessionLocal(expire_on_commit=False)
+            try:
+                customer = lookup(db, key())
+                CustomerFindResponseDTO(
+                    document=customer.document, firstname=customer.firstname, lastname=customer.lastname,
+                    address=customer.address, phone=customer.phone, email=customer.email,
+                ).model_dump_json()
+            finally:
+                db.close()
+        return run_once
+
+    def document():
+        return f"B{rng.randint(1, size):09d}"
+
+    def email():
+        return f"bench{rng.randint(1, size)}@example.com"
+
+    return {
+        "read_path.by_id.orm": measure(read_path(customer_crud.get_customer_by_id, document), rounds, warmup),
+        "read_path.by_id.core": measure(read_path(customer_crud.get_customer_row_by_id, document), rounds, warmup),
+        "read_path.by_email.orm": measure(read_path(customer_crud.get_customer_by_email, email), rounds, warmup),
+        "read_path.by_email.core": measure(read_path(customer_crud.get_customer_row_by_email, email), rounds, warmup),
+    }
+
+
+async def run_endpoint_cases(size, rounds, warmup, rng):
+    """Benchmark the customer endpoints in-process through the ASGI app"""
+    import httpx
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        def random_document():
+            return f"B{rng.randint(1, size):09d}"
+
+        async def find():
+            response = await client.get("/customer/findcustomerbyid", params={"customerid": random_document()})
+            assert response.status_code == 200, response.text
+
+        async def by_email():
+            response = await client.get(f"/customer/customerbyemail/bench{rng.randint(1, size)}@example.com")
+            assert response.status_code == 200, response.text
+
+        counter = iter(range(10**9))
+
+        async def create():
+            document = f"E{next(counter):09d}"
+            response = await client.post("/customer/createcustomer", json={
+                "document": document, "firstname": "Nuevo", "lastname": "Cliente",
+                "address": "Calle 1 #2-3, Tunja", "phone": "+57 310 000 0000",
+                "email": f"ep{document}@example.com",
+            })
+            assert response.status_code == 200, response.text
+
+        async def update():
+            response = await client.put(
+                "/customer/updatecustomer", params={"customerid": random_document()},
+                json={"address": "Carrera 7 #8-9, Medellín"},
+            )
+            assert response.status_code == 200, response.text
+
+        async def list_deep():
+            response = await client.get("/customer/customers", params={"skip": max(0, size - 100), "limit": 100})
+            assert response.status_code == 200, response.text
+
+        results["endpoint.findcustomerbyid"] = await measure_async(find, rounds, warmup)
+        results["endpoint.customerbyemail"] = await measure_async(by_email, rounds, warmup)
+        results["endpoint.createcustomer"] = await measure_async(create, rounds, warmup)
+        results["endpoint.updatecustomer"] = await measure_async(update, rounds, warmup)
+        results["endpoint.customers.offset_deep"] = await measure_async(list_deep, rounds, warmup)
+    return results
+
+
+def run(args):
+    logging.disable(logging.WARNING)
+    from app.core.database import Base, engine
+    from app.models import Customer, OutboxEvent  # noqa: F401 - register tables
+
+    Base.metadata.create_all(bind=engine)
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "rounds": args.rounds,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"Seeding {size} customers...", file=sys.stderr)
+        started = time.perf_counter()
+        seed_customers(engine, size)
+        print(f"  seeded in {time.perf_counter() - started:.1f}s, running benchmarks...", file=sys.stderr)
+
+        rng = random.Random(args.seed)
+        results = run_crud_cases(size, args.rounds, args.warmup, rng)
+        results.update(run_serialization_cases(args.rounds, args.warmup))
+        results.update(run_read_path_cases(size, args.rounds, args.warmup, rng))
+        results.update(asyncio.run(run_endpoint_cases(size, args.rounds, args.warmup, rng)))
+        report["sizes"][str(size)] = results
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    threshold = args.threshold / 100
+    regressions = []
+    rows = []
+    for size, cases in current["sizes"].items():
+        for name, stats in cases.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            change = (stats["median_us"] - base["median_us"]) / base["median_us"] if base["median_us"] else 0.0
+            flag = "REGRESSION" if change > threshold else ("improved" if change < -threshold else "")
+            rows.append((size, name, base["median_us"], stats["median_us"], change, flag))
+            if flag == "REGRESSION":
+                regressions.append((size, name, change))
+
+    print(f"{'size':>9}  {'case':<40} {'base µs':>10} {'now µs':>10} {'change':>8}")
+    for size, name, base_us, now_us, change, flag in rows:
+        print(f"{size:>9}  {name:<40} {base_us:>10.1f} {now_us:>10.1f} {change:>+7.1%}  {flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0f}%", file=sys.stderr)
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0f}%", file=sys.stderr)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--rounds", type=int, default=200)
+    run_parser.add_argument("--warmup", type=int, default=20)
+    run_parser.add_argument("--seed", type=int, default=1234)
+    run_parser.add_argument("--output", help="JSON file for the results (stdout if omitted)")
+
+    compare_parser = subparsers.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="allowed median slowdown in percent")
+
+    args = parser.parse_args()
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the production serving profile
+
+Starts the service under gunicorn (gunicorn.conf.py) with 1, 2, 4 and 8
+workers, drives it with a fixed number of concurrent keep-alive clients and
+reports throughput and latency percentiles for each worker count as JSON.
+
+The database settings are taken from the environment (DATABASE_URL,
+DB_CONNECTION_BUDGET, ...), so the benchmark can run against the same
+PostgreSQL instance as the service.
+
+Usage:
+    python benchmarks/bench_workers.py --path "/customer/customers?limit=20" \
+        --workers 1 2 4 8 --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 2)
+
+
+def start_server(workers, port):
+    env = dict(os.environ)
+    env.update({
+        "WEB_CONCURRENCY": str(workers),
+        "SERVICE_HOST": "127.0.0.1",
+        "SERVICE_PORT": str(port),
+        "GUNICORN_MAX_REQUESTS": "0",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    return subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=SERVICE_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+async def wait_ready(base_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get("/ready")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Service at {base_url} did not become ready")
+
+
+async def drive_load(base_url, path, concurrency, duration, warmup):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+
+        async def client_loop():
+            nonlocal errors
+            while True:
+                started = loop.time()
+                if started >= stop_at:
+                    return
+                try:
+                    response = await client.get(path)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if started >= measure_from:
+                    if failed:
+                        errors += 1
+                    else:
+                        latencies.append(loop.time() - started)
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    latencies.sort()
+    completed = len(latencies)
+    return {
+        "requests": completed,
+        "errors": errors,
+        "throughput_rps": round(completed / duration, 1),
+        "p50_ms": percentile(latencies, 0.50),
+        "p90_ms": percentile(latencies, 0.90),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--path", default="/customer/customers?limit=20")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds per run")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for workers in args.workers:
+        process = start_server(workers, args.port)
+        try:
+            asyncio.run(wait_ready(base_url))
+            run = asyncio.run(drive_load(base_url, args.path, args.concurrency, args.duration, args.warmup))
+        finally:
+            stop_server(process)
+        run = {"workers": workers, **run}
+        print(json.dumps(run), file=sys.stderr)
+        results.append(run)
+
+    baseline = results[0]["throughput_rps"] or 1
+    for run in results:
+        run["speedup"] = round(run["throughput_rps"] / baseline, 2)
+
+    report = {
+        "path": args.path,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Async load generator for the customer services
+
+Drives either user-service or customer-service-simple with a configurable
+request mix (create/find/update/list) and reports latency percentiles,
+throughput and error rates as JSON, so the two services can be compared.
+
+Two arrival models are supported:
+    closed loop (--concurrency N)  N clients, each sends its next request
+                                   as soon as the previous one completes
+    open loop   (--rate R)         requests arrive as a Poisson process at
+                                   R req/s regardless of how fast the
+                                   service answers; latency is measured from
+                                   the scheduled arrival time, so queueing
+                                   delay is not hidden (no coordinated omission)
+
+Usage:
+    python benchmarks/loadgen.py --target user-service --concurrency 32 --duration 30
+    python benchmarks/loadgen.py --target customer-service-simple \\
+        --base-url http://localhost:3000 --rate 500 --mix create=1,find=7,update=1,list=1
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+# Endpoint layout of each service
+TARGETS = {
+    "user-service": {
+        "base_url": "http://localhost:8000",
+        "create": ("POST", "/customer/createcustomer"),
+        "find": ("GET", "/customer/findcustomerbyid"),
+        "update": ("PUT", "/customer/updatecustomer"),
+        "list": ("GET", "/customer/customers"),
+    },
+    "customer-service-simple": {
+        "base_url": "http://localhost:3000",
+        "create": ("POST", "/createcustomer"),
+        "find": ("GET", "/findcustomerbyid"),
+        "update": ("PUT", "/updatecustomer"),
+        "list": ("GET", "/customers"),
+    },
+}
+
+OPERATIONS = ("create", "find", "update", "list")
+
+FIRST_NAMES = ["Juan", "María", "Carlos", "Ana", "Luis", "Laura", "Andrés", "Camila"]
+LAST_NAMES = ["Pérez", "García", "Rodríguez", "Martínez", "Gómez", "López", "Díaz"]
+CITIES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga", "Tunja"]
+
+
+def parse_mix(value):
+    """Parse "create=1,find=6,update=2,list=1" into a weight dictionary"""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (expected one of {OPERATIONS})")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("Request mix must have at least one positive weight")
+    return weights
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 3)
+
+
+class LoadGenerator:
+    """Issues requests against one target and records per-operation results"""
+
+    def __init__(self, args):
+        self.args = args
+        self.endpoints = TARGETS[args.target]
+        self.rng = random.Random(args.seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = 0
+        self.documents = []
+        self.operations = [op for op in OPERATIONS if args.mix.get(op, 0) > 0]
+        self.weights = [args.mix[op] for op in self.operations]
+
+        self.measuring = False
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+
+    def _new_customer(self):
+        self.counter += 1
+        first = self.rng.choice(FIRST_NAMES)
+        last = self.rng.choice(LAST_NAMES)
+        document = f"LG{self.run_id}{self.counter:08d}"
+        return {
+            "document": document,
+            "firstname": first,
+            "lastname": last,
+            "address": f"Calle {self.rng.randint(1, 200)} #{self.rng.randint(1, 99)}-{self.rng.randint(1, 99)}, {self.rng.choice(CITIES)}",
+            "phone": f"+57 3{self.rng.randint(0, 9)}{self.rng.randint(0, 9)} {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}",
+            "email": f"{document.lower()}@loadtest.example.com",
+        }
+
+    def _build_request(self, operation):
+        method, path = self.endpoints[operation]
+        if operation != "create" and not self.documents:
+            operation = "create"
+            method, path = self.endpoints[operation]
+
+        if operation == "create":
+            customer = self._new_customer()
+            return operation, method, path, {"json": customer}, customer["document"]
+        if operation == "find":
+            return operation, method, path, {"params": {"customerid": self.rng.choice(self.documents)}}, None
+        if operation == "update":
+            body = {"address": f"Carrera {self.rng.randint(1, 120)} #{self.rng.randint(1, 99)}-{self.rng.randint(1, 99)}"}
+            return operation, method, path, {"params": {"customerid": self.rng.choice(self.documents)}, "json": body}, None
+        return operation, method, path, {"params": {"skip": 0, "limit": self.args.list_limit}}, None
+
+    async def _issue(self, client, operation, scheduled_at=None):
+        operation, method, path, kwargs, created = self._build_request(operation)
+        loop = asyncio.get_running_loop()
+        started = scheduled_at if scheduled_at is not None else loop.time()
+        measuring = self.measuring
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = loop.time() - started
+
+        ok = isinstance(status, int) and status < 400
+        if ok and created:
+            self.documents.append(created)
+        if measuring:
+            self.statuses[operation][str(status)] += 1
+            if ok:
+                self.latencies[operation].append(elapsed)
+            else:
+                self.errors[operation] += 1
+
+    def _pick(self):
+        return self.rng.choices(self.operations, weights=self.weights)[0]
+
+    async def seed(self, client):
+        """Create the initial customers that find/update requests target"""
+        for _ in range(self.args.seed_customers):
+            await self._issue(client, "create")
+
+    async def run_closed_loop(self, client, stop_at):
+        loop = asyncio.get_running_loop()
+
+        async def worker():
+            while loop.time() < stop_at:
+                await self._issue(client, self._pick())
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def run_open_loop(self, client, stop_at):
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+        next_arrival = loop.time()
+        dropped = 0
+        while next_arrival < stop_at:
+            delay = next_arrival - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.args.max_in_flight:
+                # Client-side saturation; count it so it is not silently hidden
+                dropped += 1
+                if self.measuring:
+                    self.errors["client_dropped"] += 1
+            else:
+                task = asyncio.ensure_future(self._issue(client, self._pick(), scheduled_at=next_arrival))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_arrival += self.rng.expovariate(self.args.rate)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def run(self):
+        args = self.args
+        base_url = args.base_url or self.endpoints["base_url"]
+        pool = args.max_in_flight if args.rate else args.concurrency
+        limits = httpx.Limits(max_connections=pool, max_keepalive_connections=pool)
+
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await self.seed(client)
+            loop = asyncio.get_running_loop()
+            runner = self.run_open_loop if args.rate else self.run_closed_loop
+
+            # Warmup: same traffic, not recorded
+            if args.warmup > 0:
+                await runner(client, loop.time() + args.warmup)
+
+            self.measuring = True
+            started = time.time()
+            await runner(client, loop.time() + args.duration)
+            self.measuring = False
+
+        return self.report(base_url, started)
+
+    def report(self, base_url, started):
+        args = self.args
+        per_operation = {}
+        all_latencies = []
+        total_errors = sum(self.errors.values())
+        for operation in OPERATIONS + ("client_dropped",):
+            latencies = sorted(self.latencies.get(operation, []))
+            errors = self.errors.get(operation, 0)
+            if not latencies and not errors:
+                continue
+            all_latencies.extend(latencies)
+            per_operation[operation] = self._summary(latencies, errors)
+            per_operation[operation]["status_codes"] = dict(self.statuses.get(operation, {}))
+        all_latencies.sort()
+
+        return {
+            "target": args.target,
+            "base_url": base_url,
+            "started_at": started,
+            "mode": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "concurrency": None if args.rate else args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": args.mix,
+            "overall": self._summary(all_latencies, total_errors),
+            "operations": per_operation,
+        }
+
+    def _summary(self, latencies, errors):
+        count = len(latencies)
+        total = count + errors
+        return {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(count / self.args.duration, 2),
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "p99.9": percentile(latencies, 0.999),
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+                "mean": round(sum(latencies) / count * 1000, 3) if count else None,
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), default="user-service")
+    parser.add_argument("--base-url", help="override the target's default base URL")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("create=1,find=6,update=2,list=1"))
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate (req/s); enables open-loop mode")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open-loop cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--seed-customers", type=int, default=100, help="customers created before the run")
+    parser.add_argument("--list-limit", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the request mix")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(LoadGenerator(args).run())
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    return 0 if report["overall"]["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
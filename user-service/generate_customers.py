@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Generador determinista de customers sintéticos para pruebas de rendimiento
+Produce N customers con nombres, direcciones y teléfonos colombianos y los
+carga en PostgreSQL (COPY en paralelo) y/o los escribe como CSV/Parquet
+
+El resultado depende solo de --seed, --count y --chunk-size: la misma
+combinación genera siempre los mismos registros, sin importar --workers.
+
+Uso:
+    python generate_customers.py --count 1000000 --postgres --workers 4
+    python generate_customers.py --count 1000000 --csv fixtures/customers.csv --parquet fixtures/customers.parquet
+"""
+import argparse
+import csv
+import io
+import logging
+import random
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+from app.utils.parallel import bounded_map
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("document", "firstname", "lastname", "address", "phone", "email")
+
+FIRST_NAMES = [
+    "Juan", "María", "Carlos", "Ana", "Luis", "Laura", "Andrés", "Camila", "Jorge", "Valentina",
+    "Santiago", "Daniela", "Felipe", "Paula", "Sebastián", "Natalia", "Alejandro", "Carolina",
+    "Diego", "Juliana", "Javier", "Sofía", "Mateo", "Isabella", "Nicolás", "Mariana", "Miguel",
+    "Gabriela", "David", "Catalina", "Óscar", "Diana", "Fernando", "Manuela", "Ricardo", "Lorena",
+    "Esteban", "Ángela", "Camilo", "Marcela", "Julián", "Sara", "Gustavo", "Luisa", "Hernán",
+    "Adriana", "Jaime", "Liliana", "Mauricio", "Paola", "Édgar", "Yolanda", "Álvaro", "Gloria",
+]
+
+SURNAMES = [
+    "Rodríguez", "Gómez", "González", "Martínez", "García", "López", "Hernández", "Sánchez",
+    "Ramírez", "Pérez", "Díaz", "Muñoz", "Rojas", "Moreno", "Jiménez", "Vargas", "Castro",
+    "Gutiérrez", "Álvarez", "Romero", "Ortiz", "Torres", "Suárez", "Ruiz", "Valencia", "Quintero",
+    "Restrepo", "Osorio", "Castaño", "Cárdenas", "Mejía", "Salazar", "Ospina", "Ríos", "Zapata",
+    "Henao", "Cardona", "Arango", "Londoño", "Giraldo", "Aguilar", "Patiño", "Becerra", "Camargo",
+]
+
+STREET_TYPES = ["Calle", "Carrera", "Avenida", "Transversal", "Diagonal", "Avenida Calle", "Avenida Carrera"]
+
+CITIES = [
+    "Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga", "Cúcuta", "Pereira",
+    "Manizales", "Santa Marta", "Ibagué", "Villavicencio", "Pasto", "Montería", "Neiva", "Tunja",
+    "Armenia", "Popayán", "Sincelejo", "Valledupar", "Duitama", "Sogamoso",
+]
+
+EMAIL_DOMAINS = ["gmail.com", "hotmail.com", "outlook.com", "yahoo.com", "une.net.co", "email.com"]
+
+MOBILE_PREFIXES = [str(p) for p in range(300, 306)] + [str(p) for p in range(310, 325)] + ["350", "351"]
+
+# Documents are a bijection of the row index over 10-digit cédula numbers,
+# so they look random but can never collide
+DOCUMENT_BASE = 1_000_000_000
+DOCUMENT_SPACE = 9_000_000_000
+DOCUMENT_MULTIPLIER = 2_654_435_761  # prime, coprime with DOCUMENT_SPACE
+
+
+def _ascii(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+
+
+def document_for(index: int, seed: int) -> str:
+    """Unique document number for a row index"""
+    offset = (seed * 7_919) % DOCUMENT_SPACE
+    return str(DOCUMENT_BASE + ((index + offset) * DOCUMENT_MULTIPLIER) % DOCUMENT_SPACE)
+
+
+def generate_chunk(seed: int, chunk_index: int, chunk_size: int, count: int) -> List[Tuple[str, ...]]:
+    """
+    Generate one chunk of customers
+
+    Args:
+        seed: Dataset seed
+        chunk_index: Zero-based chunk number
+        chunk_size: Rows per chunk
+        count: Total number of rows in the dataset
+
+    Returns:
+        List of rows in COLUMNS order
+    """
+    rng = random.Random(seed * 1_000_003 + chunk_index)
+    start = chunk_index * chunk_size
+    rows = []
+    for index in range(start, min(start + chunk_size, count)):
+        firstname = rng.choice(FIRST_NAMES)
+        surname1 = rng.choice(SURNAMES)
+        surname2 = rng.choice(SURNAMES)
+        address = (
+            f"{rng.choice(STREET_TYPES)} {rng.randint(1, 200)} "
+            f"#{rng.randint(1, 120)}-{rng.randint(1, 99)}, {rng.choice(CITIES)}"
+        )
+        phone = f"+57 {rng.choice(MOBILE_PREFIXES)} {rng.randint(0, 999):03d} {rng.randint(0, 9999):04d}"
+        # The row index keeps emails unique
+        email = _ascii(f"{firstname}.{surname1}{index}@{rng.choice(EMAIL_DOMAINS)}").lower()
+        rows.append((document_for(index, seed), firstname, f"{surname1} {surname2}", address, phone, email))
+    return rows
+
+
+def rows_to_csv(rows: List[Tuple[str, ...]], header: bool = False) -> str:
+    """Serialize rows as CSV text"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _generate_task(task: Tuple[int, int, int, int]) -> List[Tuple[str, ...]]:
+    return generate_chunk(*task)
+
+
+def _copy_task(task: Tuple[str, int, int, int, int]) -> int:
+    """Generate a chunk and COPY it into PostgreSQL on the worker's own connection"""
+    import psycopg2
+
+    dsn, seed, chunk_index, chunk_size, count = task
+    rows = generate_chunk(seed, chunk_index, chunk_size, count)
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY customer ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                io.StringIO(rows_to_csv(rows))
+            )
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def iter_chunks(seed: int, count: int, chunk_size: int, workers: int) -> Iterator[List[Tuple[str, ...]]]:
+    """
+    Yield the dataset chunk by chunk, in order, generating in a process pool
+
+    Args:
+        seed: Dataset seed
+        count: Total number of rows
+        chunk_size: Rows per chunk
+        workers: Number of generator processes
+    """
+    tasks = ((seed, index, chunk_size, count) for index in range(-(-count // chunk_size)))
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_task(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from bounded_map(pool, _generate_task, tasks, workers * 2)
+
+
+def load_postgres(seed: int, count: int, chunk_size: int, workers: int, truncate: bool) -> int:
+    """
+    Load the dataset into the customer table with parallel COPY
+
+    Rows are written straight to the table, without outbox events.
+
+    Returns:
+        Number of rows loaded
+    """
+    from app.core.config import settings
+    from app.core.database import create_tables
+
+    create_tables()
+    dsn = settings.DATABASE_URL
+    if truncate:
+        import psycopg2
+
+        connection = psycopg2.connect(dsn)
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute("TRUNCATE customer")
+        finally:
+            connection.close()
+        logger.info("🧹 Tabla customer vaciada")
+
+    tasks = ((dsn, seed, index, chunk_size, count) for index in range(-(-count // chunk_size)))
+    loaded = 0
+    started = time.perf_counter()
+    workers = max(1, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in bounded_map(pool, _copy_task, tasks, workers * 2):
+            loaded += rows
+            elapsed = time.perf_counter() - started
+            logger.info(f"📥 {loaded}/{count} customers cargados ({loaded / elapsed:,.0f} filas/s)")
+    return loaded
+
+
+def write_fixtures(seed: int, count: int, chunk_size: int, workers: int, csv_path: str, parquet_path: str):
+    """Write the dataset as CSV and/or Parquet files"""
+    parquet_writer = None
+    schema = None
+    if parquet_path:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("pyarrow is required for --parquet (pip install pyarrow)")
+        schema = pa.schema([(column, pa.string()) for column in COLUMNS])
+        parquet_writer = pq.ParquetWriter(parquet_path, schema)
+
+    csv_file = open(csv_path, "w", newline="", encoding="utf-8") if csv_path else None
+    written = 0
+    started = time.perf_counter()
+    try:
+        if csv_file:
+            csv_file.write(rows_to_csv([], header=True))
+        for rows in iter_chunks(seed, count, chunk_size, workers):
+            if csv_file:
+                csv_file.write(rows_to_csv(rows))
+            if parquet_writer:
+                columns = list(zip(*rows))
+                parquet_writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=pa.string()) for column in columns], schema=schema
+                ))
+            written += len(rows)
+            elapsed = time.perf_counter() - started
+            logger.info(f"💾 {written}/{count} customers escritos ({written / elapsed:,.0f} filas/s)")
+    finally:
+        if csv_file:
+            csv_file.close()
+        if parquet_writer:
+            parquet_writer.close()
+
+
+def main() -> bool:
+    """Función principal del generador"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000, help="número de customers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="filas por chunk (parte de la semilla efectiva)")
+    parser.add_argument("--workers", type=int, default=4, help="procesos generadores / conexiones COPY")
+    parser.add_argument("--postgres", action="store_true", help="cargar en la tabla customer de DATABASE_URL")
+    parser.add_argument("--truncate", action="store_true", help="vaciar la tabla customer antes de cargar")
+    parser.add_argument("--csv", help="ruta del CSV de salida")
+    parser.add_argument("--parquet", help="ruta del Parquet de salida (requiere pyarrow)")
+    args = parser.parse_args()
+
+    if not (args.postgres or args.csv or args.parquet):
+        parser.error("indique al menos un destino: --postgres, --csv o --parquet")
+
+    started = time.perf_counter()
+    try:
+        if args.csv or args.parquet:
+            write_fixtures(args.seed, args.count, args.chunk_size, args.workers, args.csv, args.parquet)
+        if args.postgres:
+            load_postgres(args.seed, args.count, args.chunk_size, args.workers, args.truncate)
+    except Exception as e:
+        logger.error(f"❌ Error generando customers: {e}")
+        return False
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"🎉 {args.count} customers generados en {elapsed:.1f}s ({args.count / elapsed:,.0f} filas/s)")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,98 @@
+"""
+Gunicorn configuration - production serving profile for the User Service
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Environment:
+    WEB_CONCURRENCY          Number of worker processes (default: CPU count)
+    DB_CONNECTION_BUDGET     Total PostgreSQL connections shared by all workers
+    GUNICORN_MAX_REQUESTS    Requests before a worker is recycled (0 disables)
+
+The master creates the tables and registers the instance with Consul once,
+and deregisters it on exit; workers only serve. Jobs meant to run once per
+instance (outbox dispatcher, Consul TTL heartbeat) run in one elected
+worker (see app.core.leadership).
+"""
+import asyncio
+import gc
+import multiprocessing
+import os
+
+# Read by the settings below and inherited by every worker
+os.environ["GUNICORN_MASTER"] = "true"
+
+from app.core.config import settings
+
+# Server socket
+bind = f"{settings.SERVICE_HOST}:{settings.SERVICE_PORT}"
+backlog = 2048
+
+# Workers: one async worker per core; each owns its own DB pool slice
+workers = settings.WEB_CONCURRENCY or multiprocessing.cpu_count()
+worker_class = "app.core.workers.ProductionUvicornWorker"
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+
+# Graceful recycling: restart workers after N requests (jittered so they
+# do not all restart at once) to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Import the application once in the master so workers share its pages
+preload_app = True
+
+# Logging
+loglevel = settings.LOG_LEVEL.lower()
+accesslog = None
+errorlog = "-"
+
+
+def _consul(action):
+    """Run a Consul coroutine from the master, which has no event loop of its own"""
+    from app.utils.consul import async_consul_service
+
+    async def run():
+        try:
+            return await action()
+        finally:
+            await async_consul_service.close()
+
+    return asyncio.run(run())
+
+
+def when_ready(server):
+    """Prepare the database and register with Consul once, then freeze everything before workers are forked"""
+    from app.core.database import create_tables, engine
+    from app.utils.consul import register_with_consul
+
+    # With FAST_START the workers only verify the alembic revision
+    if not settings.FAST_START:
+        create_tables()
+    engine.dispose()
+    # No initial delay: registration retries while Consul is not up yet
+    _consul(lambda: register_with_consul(initial_delay=0, heartbeat=False))
+
+    # Objects created at import time are moved to a permanent generation that
+    # the collector never touches, so forked workers do not dirty (and copy)
+    # those pages when gc runs
+    gc.freeze()
+    server.log.info(
+        f"Frozen {gc.get_freeze_count()} objects; starting {workers} workers "
+        f"(DB pool {settings.db_pool_size}+{settings.db_max_overflow} per worker)"
+    )
+
+
+def on_exit(server):
+    """Take the instance out of Consul once every worker has stopped"""
+    from app.utils.consul import deregister_from_consul
+
+    _consul(deregister_from_consul)
+
+
+def post_fork(server, worker):
+    """Make sure no pooled connection is shared with the master"""
+    from app.core.database import engine
+
+    engine.dispose(close=False)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Importación masiva de customers desde CSV
+Valida las filas en paralelo con las reglas de CustomerCreateDTO, las carga
+con COPY en una tabla temporal y las fusiona en customer por lotes
+
+Cada lote se confirma por separado: si la importación se interrumpe, los
+lotes anteriores quedan cargados y se puede reanudar con --skip-rows.
+Las filas rechazadas se escriben en un CSV de errores con el motivo.
+
+Uso:
+    python import_customers.py partner.csv
+    python import_customers.py partner.csv --on-conflict skip --workers 8 --errors rechazados.csv
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.customer import CustomerCreateDTO
+from app.utils.parallel import bounded_map
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("document", "firstname", "lastname", "address", "phone", "email")
+
+STAGING_TABLE = "customer_import_staging"
+
+# Merge attempts per batch when concurrent writers keep taking its emails
+EMAIL_RACE_RETRIES = 5
+
+# A row is (line number, values in COLUMNS order)
+Row = Tuple[int, Tuple[str, ...]]
+# A rejection is (line number, reason, raw values)
+Rejection = Tuple[int, str, Dict[str, str]]
+
+
+def validate_batch(batch: List[Tuple[int, Dict[str, str]]]) -> Tuple[List[Row], List[Rejection]]:
+    """
+    Validate raw CSV rows with CustomerCreateDTO (runs in a worker process)
+
+    Args:
+        batch: List of (line number, raw CSV row)
+
+    Returns:
+        Tuple of (normalized valid rows, rejected rows)
+    """
+    valid = []
+    rejected = []
+    for line_no, raw in batch:
+        try:
+            customer = CustomerCreateDTO(**{column: raw.get(column) or "" for column in COLUMNS})
+            valid.append((line_no, tuple(str(getattr(customer, column)) for column in COLUMNS)))
+        except ValidationError as e:
+            reasons = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            rejected.append((line_no, reasons, raw))
+    return valid, rejected
+
+
+def read_batches(path: str, batch_size: int, skip_rows: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """
+    Stream the CSV file in batches of raw rows
+
+    Line numbers refer to the file (the header is line 1).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+        rows = ((line_no, raw) for line_no, raw in enumerate(reader, start=2))
+        rows = islice(rows, skip_rows, None)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+class CustomerImporter:
+    """Loads validated rows into the customer table through a staging table"""
+
+    def __init__(self, dsn: str, on_conflict: str = "update", emit_events: bool = True, partitioned: bool = False,
+                 deliver_events: bool = True, notify_channel: Optional[str] = None):
+        import psycopg2
+
+        self.connection = psycopg2.connect(dsn)
+        self.on_conflict = on_conflict
+        self.emit_events = emit_events
+        # Without delivery, outbox rows only feed the change stream and are written dispatched
+        self.deliver_events = deliver_events
+        # Change stream channel the imported events are announced on (None: no NOTIFY)
+        self.notify_channel = notify_channel
+        # The partitioned layout has no email index on customer itself
+        self.email_owners = "customer_email" if partitioned else "customer"
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ("
+                "line_no bigint NOT NULL, document varchar(50) NOT NULL, "
+                "firstname varchar(100) NOT NULL, lastname varchar(100) NOT NULL, "
+                "address varchar(500) NOT NULL, phone varchar(20) NOT NULL, "
+                "email varchar(100) NOT NULL)"
+            )
+
+    def _merge_sql(self) -> str:
+        if self.on_conflict == "update":
+            conflict = (
+                "ON CONFLICT (document) DO UPDATE SET firstname = EXCLUDED.firstname, "
+                "lastname = EXCLUDED.lastname, address = EXCLUDED.address, phone = EXCLUDED.phone, "
+                "email = EXCLUDED.email, updated_at = now()"
+            )
+        else:
+            conflict = "ON CONFLICT (document) DO NOTHING"
+
+        columns = ", ".join(COLUMNS)
+        # When a document appears several times in a batch, its last line wins
+        merge = (
+            f"INSERT INTO customer ({columns}) "
+            f"SELECT DISTINCT ON (document) {columns} FROM {STAGING_TABLE} ORDER BY document, line_no DESC "
+            f"{conflict} "
+            f"RETURNING {columns}, (xmax = 0) AS inserted"
+        )
+        if not self.emit_events:
+            return f"WITH merged AS ({merge}) SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+
+        # Outbox rows are written in the same statement, so order-service
+        # and the change stream hear about imported customers exactly like
+        # API-created ones
+        payload = "json_build_object(" + ", ".join(f"'{column}', {column}" for column in COLUMNS) + ")"
+        events = (
+            f"events AS (INSERT INTO customer_outbox (aggregate_id, event_type, payload, attempts, dispatched_at) "
+            f"SELECT document, CASE WHEN inserted THEN 'user_created' ELSE 'user_updated' END, {payload}, 0, "
+            f"{'NULL' if self.deliver_events else 'now()'} "
+            f"FROM merged RETURNING id, aggregate_id, event_type, payload, created_at)"
+        )
+        if not self.notify_channel:
+            return (
+                f"WITH merged AS ({merge}), {events} "
+                f"SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+            )
+
+        # Same message as OutboxCRUD.notify_event; delivered on commit. The
+        # count forces the notifying CTE to run.
+        message = (
+            "json_build_object('event_id', id, 'user_id', aggregate_id, 'event', event_type, "
+            "'data', payload, 'timestamp', created_at)::text"
+        )
+        return (
+            f"WITH merged AS ({merge}), {events}, "
+            f"notified AS (SELECT pg_notify('{self.notify_channel}', {message}) FROM events ORDER BY id) "
+            f"SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted), "
+            f"(SELECT count(*) FROM notified) FROM merged"
+        )
+
+    def _reject_taken_emails(self, cursor) -> List[Tuple[int, str]]:
+        """Drop staged rows whose email belongs to another customer"""
+        cursor.execute(
+            f"DELETE FROM {STAGING_TABLE} s WHERE EXISTS ("
+            f"SELECT 1 FROM {self.email_owners} c WHERE c.email = s.email AND c.document <> s.document"
+            ") RETURNING line_no"
+        )
+        return [(line_no, "email: already used by another customer") for (line_no,) in cursor.fetchall()]
+
+    def load_batch(self, rows: List[Row]) -> Tuple[int, int, List[Tuple[int, str]]]:
+        """
+        COPY a batch into staging and merge it into customer in one transaction
+
+        Rows whose email already belongs to another customer (or to another
+        document earlier in the same batch) are rejected instead of failing
+        the whole batch. If a concurrent writer takes one of those emails
+        between the check and the merge, the merge is rolled back to a
+        savepoint, the emails are checked again and the merge is retried.
+
+        Args:
+            rows: Validated rows
+
+        Returns:
+            Tuple of (inserted, updated, [(line number, reason)] of rejected rows)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows((line_no, *values) for line_no, values in rows)
+        buffer.seek(0)
+
+        from psycopg2.errors import UniqueViolation
+
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+            cursor.copy_expert(f"COPY {STAGING_TABLE} (line_no, {', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+            rejected = self._reject_taken_emails(cursor)
+
+            cursor.execute(
+                f"DELETE FROM {STAGING_TABLE} s WHERE EXISTS ("
+                f"SELECT 1 FROM {STAGING_TABLE} o WHERE o.email = s.email AND o.document <> s.document "
+                "AND o.line_no < s.line_no"
+                ") RETURNING line_no"
+            )
+            rejected += [(line_no, "email: duplicated in file for another document") for (line_no,) in cursor.fetchall()]
+
+            for attempt in range(EMAIL_RACE_RETRIES):
+                cursor.execute("SAVEPOINT merge_batch")
+                try:
+                    cursor.execute(self._merge_sql())
+                    break
+                except UniqueViolation as e:
+                    # Documents are handled by ON CONFLICT; anything else is an email
+                    # committed by another writer after the check above
+                    if e.diag.constraint_name == "customer_pkey" or attempt == EMAIL_RACE_RETRIES - 1:
+                        raise
+                    cursor.execute("ROLLBACK TO SAVEPOINT merge_batch")
+                    rejected += self._reject_taken_emails(cursor)
+            inserted, updated = cursor.fetchone()[:2]
+        return inserted, updated, rejected
+
+    def close(self):
+        self.connection.close()
+
+
+def run_import(args) -> bool:
+    from app.core.config import settings
+    from app.core.database import detect_customer_layout
+    from app.crud.outbox import outbox_rows_enabled
+
+    errors_path = args.errors or f"{os.path.splitext(args.csv_file)[0]}.errors.csv"
+    importer = CustomerImporter(
+        settings.DATABASE_URL,
+        on_conflict=args.on_conflict,
+        emit_events=outbox_rows_enabled() and not args.no_events,
+        partitioned=detect_customer_layout(),
+        deliver_events=settings.OUTBOX_ENABLED,
+        notify_channel=settings.CUSTOMER_EVENTS_CHANNEL if settings.CHANGE_STREAM_ENABLED else None,
+    )
+
+    totals = {"read": 0, "inserted": 0, "updated": 0, "skipped": 0, "rejected": 0}
+    started = time.perf_counter()
+    try:
+        with open(errors_path, "w", newline="", encoding="utf-8") as errors_file, \
+                ProcessPoolExecutor(max_workers=args.workers) as pool:
+            errors = csv.writer(errors_file)
+            errors.writerow(("line", "error", *COLUMNS))
+
+            batches = read_batches(args.csv_file, args.batch_size, args.skip_rows)
+            for valid, rejected in bounded_map(pool, validate_batch, batches, args.workers * 2):
+                raw_by_line = {line_no: values for line_no, values in valid}
+                inserted, updated, conflicts = importer.load_batch(valid) if valid else (0, 0, [])
+
+                for line_no, reason, raw in rejected:
+                    errors.writerow((line_no, reason, *(raw.get(column, "") for column in COLUMNS)))
+                for line_no, reason in conflicts:
+                    errors.writerow((line_no, reason, *raw_by_line[line_no]))
+
+                totals["read"] += len(valid) + len(rejected)
+                totals["inserted"] += inserted
+                totals["updated"] += updated
+                totals["skipped"] += len(valid) - len(conflicts) - inserted - updated
+                totals["rejected"] += len(rejected) + len(conflicts)
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"📥 {totals['read']} filas leídas: {totals['inserted']} insertadas, "
+                    f"{totals['updated']} actualizadas, {totals['skipped']} omitidas, {totals['rejected']} rechazadas "
+                    f"({totals['read'] / elapsed:,.0f} filas/s)"
+                )
+    finally:
+        importer.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"🎉 Importación completada en {elapsed:.1f}s ({totals['read'] / max(elapsed, 1e-9):,.0f} filas/s)")
+    if totals["rejected"]:
+        logger.warning(f"⚠️ {totals['rejected']} filas rechazadas, ver {errors_path}")
+    return True
+
+
+def main() -> bool:
+    """Función principal de importación"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_file", help="CSV con columnas document,firstname,lastname,address,phone,email")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="filas por lote")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos de validación")
+    parser.add_argument("--on-conflict", choices=("update", "skip"), default="update",
+                        help="qué hacer si el documento ya existe")
+    parser.add_argument("--errors", help="CSV de filas rechazadas (por defecto <archivo>.errors.csv)")
+    parser.add_argument("--skip-rows", type=int, default=0, help="filas de datos a omitir (para reanudar)")
+    parser.add_argument("--no-events", action="store_true", help="no generar eventos en el outbox")
+    args = parser.parse_args()
+
+    try:
+        return run_import(args)
+    except Exception as e:
+        logger.error(f"❌ Error durante la importación: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
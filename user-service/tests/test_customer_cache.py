@@ -0,0 +1,188 @@
+"""
+Tests for the two-tier customer cache, with fakeredis standing in for Redis
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import settings
+from app.services import customer_cache as customer_cache_module
+from app.services.customer_cache import CustomerCache
+
+CUSTOMER = {
+    "document": "1001",
+    "firstname": "Ana",
+    "lastname": "Gomez",
+    "address": "Calle 1",
+    "phone": "555-0101",
+    "email": "ana@example.com"
+}
+
+
+class CountingLoader:
+    """Database stand-in counting how many lookups reach it"""
+
+    def __init__(self, customer):
+        self.customer = customer
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return dict(self.customer) if self.customer is not None else None
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def fake_server(monkeypatch):
+    """A fresh fake Redis server per test"""
+    monkeypatch.setattr(customer_cache_module, "_fake_server", None)
+
+
+@asynccontextmanager
+async def replicas():
+    """Two cache instances sharing one fake Redis, like two replicas"""
+    caches = []
+    try:
+        for _ in range(2):
+            cache = CustomerCache()
+            cache.redis_url = "fakeredis://"
+            cache.start()
+            caches.append(cache)
+        await wait_for(lambda: all(cache.stats()["subscribed"] for cache in caches))
+        yield caches
+    finally:
+        for cache in caches:
+            await cache.stop()
+
+
+@pytest.mark.asyncio
+async def test_l1_then_l2_hits():
+    async with replicas() as (first, second):
+        loader = CountingLoader(CUSTOMER)
+
+        assert await first.get(loader, document="1001") == CUSTOMER
+        assert await first.get(loader, document="1001") == CUSTOMER
+        assert await first.get(loader, email="ana@example.com") == CUSTOMER
+        assert loader.calls == 1
+        assert first.stats()["hits"] == 2
+
+        # The other replica finds it in L2 and keeps it in its own L1
+        assert await second.get(loader, document="1001") == CUSTOMER
+        assert await second.get(loader, document="1001") == CUSTOMER
+        assert loader.calls == 1
+        assert second.stats()["l2_hits"] == 1
+        assert second.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_replica():
+    async with replicas() as (first, second):
+        loader = CountingLoader(CUSTOMER)
+        await first.get(loader, document="1001")
+        await second.get(loader, document="1001")
+
+        updated = {**CUSTOMER, "phone": "555-0202"}
+        loader.customer = updated
+        await second.invalidate("1001")
+        await wait_for(lambda: first.stats()["invalidations_received"] == 1)
+
+        assert await first.get(loader, document="1001") == updated
+        assert await second.get(loader, document="1001") == updated
+        assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lookup", [{"document": "1001"}, {"email": "ana@example.com"}])
+async def test_load_overlapping_other_replica_update_not_cached(lookup):
+    async with replicas() as (first, second):
+        updated = {**CUSTOMER, "phone": "555-0202"}
+        store_l2 = second._store_l2
+
+        async def updated_before_store(*args):
+            # The other replica commits and invalidates after this one read the old row
+            await first.invalidate("1001")
+            return await store_l2(*args)
+
+        second._store_l2 = updated_before_store
+        assert await second.get(CountingLoader(CUSTOMER), **lookup) == CUSTOMER
+        assert second.stats()["stale_loads"] == 1
+        assert await second._redis.get(second._document_key("1001")) is None
+
+        loader = CountingLoader(updated)
+        await wait_for(lambda: second.stats()["invalidations_received"] == 1)
+        assert await first.get(loader, document="1001") == updated
+        assert await second.get(loader, **lookup) == updated
+
+
+@pytest.mark.asyncio
+async def test_email_entry_checked_against_customer():
+    async with replicas() as (first, _):
+        loader = CountingLoader(CUSTOMER)
+        await first.get(loader, email="ana@example.com")
+
+        # The email moved to another customer: the stale email entry must not match
+        loader.customer = {**CUSTOMER, "email": "ana.gomez@example.com"}
+        await first.invalidate("1001")
+        email_loader = CountingLoader(None)
+        assert await first.get(email_loader, email="ana@example.com") is None
+        assert email_loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    async with replicas() as (first, second):
+        loader = CountingLoader(CUSTOMER)
+
+        results = await asyncio.gather(
+            *(first.get(loader, document="1001") for _ in range(10)),
+            *(second.get(loader, document="1001") for _ in range(10))
+        )
+
+        assert all(result == CUSTOMER for result in results)
+        assert loader.calls == 1
+        assert first.stats()["coalesced"] + second.stats()["coalesced"] >= 18
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_shared():
+    async with replicas() as (first, _):
+        calls = 0
+
+        def failing():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("database unavailable")
+            return dict(CUSTOMER)
+
+        results = await asyncio.gather(
+            first.get(failing, document="1001"),
+            first.get(failing, document="1001"),
+            return_exceptions=True
+        )
+
+        # The waiter retries on its own instead of inheriting the failure
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] == CUSTOMER
+
+
+@pytest.mark.asyncio
+async def test_l1_only_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(settings, "GUNICORN_MASTER", True)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    cache = CustomerCache()
+    cache.redis_url = ""
+    cache.start()
+
+    assert not cache.stats()["enabled"]
+    loader = CountingLoader(CUSTOMER)
+    await cache.get(loader, document="1001")
+    await cache.get(loader, document="1001")
+    assert loader.calls == 2